@@ -1,80 +1,185 @@
 # app.py  (at repo/cv-service/app.py)
-from fastapi import FastAPI
+import os
+from fastapi import FastAPI, HTTPException
 from tracking.schemas import StartBody
 from tracking.worker import SimpleHumanTracker
+from tracking.chunks import create_worker
+from tracking.inference import InferenceScheduler
+from tracking.models import registry
+from tracking.emitter import emitter
+from tracking.pool import PoolError, WorkerPool
 
 app = FastAPI()
 workers: dict[str, SimpleHumanTracker] = {}
 
+# Batch frames from all cameras into shared detector passes (CV_BATCHING=0 runs each worker directly)
+batch_options: dict | None = None
+if os.getenv("CV_BATCHING", "1") != "0":
+    batch_options = {
+        "max_batch_size": int(os.getenv("CV_BATCH_MAX_SIZE", "8")),
+        "max_wait_ms": float(os.getenv("CV_BATCH_MAX_WAIT_MS", "20")),
+    }
+
+# CV_WORKER_PROCESSES=N runs cameras in N worker processes (each with its own
+# scheduler); 0 keeps them as threads of this process
+pool: WorkerPool | None = None
+scheduler: InferenceScheduler | None = None
+if int(os.getenv("CV_WORKER_PROCESSES", "0")) > 0:
+    pool = WorkerPool(int(os.getenv("CV_WORKER_PROCESSES")), batch_options=batch_options)
+elif batch_options is not None:
+    scheduler = InferenceScheduler(**batch_options)
+
+# "onnx" / "torchscript" run the detector graph written by export_models.py (eager fallback)
+DETECTOR_BACKEND = os.getenv("CV_DETECTOR_BACKEND", "eager")
+
+def worker_options(b: StartBody) -> dict:
+    """Inference and pipeline settings shared by the live and MP4 start endpoints"""
+    return {
+        "model_name": b.model,
+        "model_backend": DETECTOR_BACKEND,
+        "conf": b.conf,
+        "imgsz": b.imgsz,
+        "frame_skip": b.frame_skip,
+        "cpu_budget": b.cpu_budget,
+        "latency_target_ms": b.latency_target_ms,
+        "record": b.record,
+        "record_every": b.record_every,
+        "record_start_s": b.record_start_s,
+        "record_duration_s": b.record_duration_s,
+        "tracking": b.tracking,
+        "motion_gate": b.motion_gate,
+        "motion_threshold": b.motion_threshold,
+        "motion_zones": [(z.polygon, z.threshold) for z in b.motion_zones or []],
+        "redetect_s": b.redetect_s,
+        "capture_process": b.capture_process,
+        "sampling": b.sampling,
+        "sample_fps": b.sample_fps,
+        "chunked": b.chunked,
+        "chunk_processes": b.chunk_processes,
+        "video_start_ts": b.video_start_ts,
+        "batched": b.batched,
+    }
+
+def pool_call(fn, *args):
+    """Run a worker pool command; an unavailable or unresponsive worker process is a 503"""
+    try:
+        return fn(*args)
+    except (PoolError, TimeoutError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def launch(camera_id: str, options: dict) -> bool:
+    """Start a camera in the worker pool, or as a thread of this process; False if already running"""
+    if pool:
+        return pool_call(pool.start_camera, camera_id, options)
+    if camera_id in workers:
+        return False
+    w = create_worker(camera_id, scheduler=scheduler, **options)
+    workers[camera_id] = w
+    w.start()
+    return True
+
+def halt(camera_id: str) -> bool:
+    if pool:
+        return pool_call(pool.stop_camera, camera_id)
+    w = workers.pop(camera_id, None)
+    if not w:
+        return False
+    w.stop()
+    return True
+
+@app.on_event("startup")
+def on_startup():
+    if pool:
+        pool.start()
+        return
+    if scheduler:
+        scheduler.start()
+    emitter.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    if pool:
+        pool.stop()
+        return
+    for w in list(workers.values()):
+        w.stop()
+    if scheduler:
+        scheduler.stop()
+    emitter.stop()
+
 @app.get("/health")
 def health():
-    return {"ok": True, "workers": list(workers.keys())}
+    if pool:
+        return {
+            "ok": True,
+            "workers": pool.cameras(),
+            "processes": pool.stats(),
+        }
+    return {
+        "ok": True,
+        "workers": list(workers.keys()),
+        "scheduler": scheduler.stats() if scheduler else None,
+        "models": registry.stats(),
+        "emitter": emitter.stats(),
+    }
 
 @app.post("/track/start")
 def start(b: StartBody):
-    if b.cameraId in workers:
-        return {"ok": True, "message": "already running"}
-    
     # Create worker with appropriate parameters
-    w = SimpleHumanTracker(
-        camera_id=b.cameraId,
+    started = launch(b.cameraId, dict(
         rtsp_url=b.rtsp if hasattr(b, 'rtsp') else None,
         hls_url=b.hlsUrl if hasattr(b, 'hlsUrl') else None,
         file_path=b.filePath if hasattr(b, 'filePath') else None,
         webhook=b.webhook,
         secret=b.secret,
         line=b.line if hasattr(b, 'line') else None,
-        zone=b.zone if hasattr(b, 'zone') else None
-    )
-    
-    workers[b.cameraId] = w
-    w.start()
+        zone=b.zone if hasattr(b, 'zone') else None,
+        **worker_options(b)
+    ))
+    if not started:
+        return {"ok": True, "message": "already running"}
     return {"ok": True}
 
 @app.post("/track/stop/{camera_id}")
 def stop(camera_id: str):
-    w = workers.get(camera_id)
-    if not w:
+    if not halt(camera_id):
         return {"ok": True, "message": "not running"}
-    w.stop()
-    workers.pop(camera_id, None)
     return {"ok": True}
 
 @app.get("/track/status/{camera_id}")
 def status(camera_id: str):
-    return {"running": camera_id in workers}
+    if pool:
+        stats = pool_call(pool.status, camera_id)
+    else:
+        w = workers.get(camera_id)
+        stats = w.pipeline_stats() if w else None
+    if stats is None:
+        return {"running": False}
+    return {"running": True, "stats": stats}
 
 # MP4-specific endpoints
 @app.post("/track/mp4/start")
 def start_mp4(b: StartBody):
-    if b.cameraId in workers:
-        return {"ok": True, "message": "already running"}
     if not b.filePath:
         return {"error": "filePath is required for MP4 analytics"}
     
     # Create worker for MP4
-    w = SimpleHumanTracker(
-        camera_id=b.cameraId,
+    started = launch(b.cameraId, dict(
         file_path=b.filePath,
         webhook=b.webhook,
         secret=b.secret,
         line=b.line if hasattr(b, 'line') else None,
-        zone=b.zone if hasattr(b, 'zone') else None
-    )
-    
-    workers[b.cameraId] = w
-    w.start()
+        zone=b.zone if hasattr(b, 'zone') else None,
+        **worker_options(b)
+    ))
+    if not started:
+        return {"ok": True, "message": "already running"}
     return {"ok": True}
 
 @app.post("/track/mp4/stop/{camera_id}")
 def stop_mp4(camera_id: str):
-    w = workers.get(camera_id)
-    if not w:
-        return {"ok": True, "message": "not running"}
-    w.stop()
-    workers.pop(camera_id, None)
-    return {"ok": True}
+    return stop(camera_id)
 
 @app.get("/track/mp4/status/{camera_id}")
 def status_mp4(camera_id: str):
-    return {"running": camera_id in workers}
+    return status(camera_id)
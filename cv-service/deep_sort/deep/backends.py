@@ -0,0 +1,138 @@
+import logging
+import os
+
+import torch
+import torch.nn as nn
+
+
+EAGER_BACKENDS = ("eager", "int8-dynamic", "int8-static")
+EXPORTED_BACKENDS = ("torchscript", "onnx")
+BACKENDS = EAGER_BACKENDS + EXPORTED_BACKENDS
+EXPORT_SUFFIX = {"torchscript": ".torchscript", "onnx": ".onnx"}
+INPUT_SHAPE = (3, 128, 64)
+
+logger = logging.getLogger("root.tracker")
+
+
+def set_num_threads(num_threads):
+    """Limit torch intra-op threads.
+
+    This is process wide: every worker thread that runs ReID in this process
+    shares the pool, so set it to roughly cores / processes to avoid
+    oversubscribing the CPU.
+    """
+    if num_threads:
+        torch.set_num_threads(int(num_threads))
+
+
+def prepare_net(net, backend="eager", channels_last=False, calibration=None):
+    """Turn a loaded float `Net` into the module used for inference.
+
+    backend:
+        "eager"        float32 as trained
+        "int8-dynamic" dynamic int8 quantization of the nn.Linear layers;
+                       the reid path of `Net` is almost all convolutions, so
+                       expect little gain there
+        "int8-static"  post-training static int8 quantization of the whole
+                       network (FX graph mode, conv+bn fused); needs
+                       `calibration`, an iterable of (N,3,128,64) float
+                       batches preprocessed like at inference time
+    Quantized modules run on the CPU only.
+    """
+    if backend not in EAGER_BACKENDS:
+        raise ValueError("Unknown ReID backend {!r}, expected one of {}".format(
+            backend, ", ".join(EAGER_BACKENDS)))
+    net.eval()
+
+    if backend == "int8-dynamic":
+        net = torch.ao.quantization.quantize_dynamic(
+            net.cpu(), {nn.Linear}, dtype=torch.qint8)
+    elif backend == "int8-static":
+        net = _quantize_static(net.cpu(), calibration)
+
+    if channels_last:
+        net = net.to(memory_format=torch.channels_last)
+    return net
+
+
+def _quantize_static(net, calibration):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    if calibration is None:
+        raise ValueError("int8-static ReID backend needs calibration data")
+    example_inputs = (torch.zeros((1,) + INPUT_SHAPE),)
+    prepared = prepare_fx(
+        net, get_default_qconfig_mapping("x86"), example_inputs)
+    batches = 0
+    with torch.inference_mode():
+        for batch in calibration:
+            prepared(batch)
+            batches += 1
+    if not batches:
+        raise ValueError("int8-static ReID backend got no calibration batches")
+    logger.info("Calibrated int8 ReID model on {} batches".format(batches))
+    return convert_fx(prepared)
+
+
+def exported_path(model_path, backend):
+    """Where `export_net` writes the `backend` graph for a checkpoint"""
+    return os.path.splitext(model_path)[0] + EXPORT_SUFFIX[backend]
+
+
+def export_net(net, model_path, backends=EXPORTED_BACKENDS):
+    """Write traced TorchScript and/or ONNX graphs of a reid `Net` next to
+    its checkpoint; returns the written paths."""
+    net = net.cpu().eval()
+    example = torch.zeros((1,) + INPUT_SHAPE)
+    paths = []
+    for backend in backends:
+        path = exported_path(model_path, backend)
+        if backend == "torchscript":
+            with torch.no_grad():
+                traced = torch.jit.trace(net, example)
+            traced = torch.jit.freeze(traced)
+            traced.save(path)
+        elif backend == "onnx":
+            torch.onnx.export(
+                net, example, path, input_names=["input"],
+                output_names=["features"], opset_version=17,
+                dynamic_axes={"input": {0: "batch"}, "features": {0: "batch"}})
+        else:
+            raise ValueError("Cannot export ReID backend {!r}".format(backend))
+        paths.append(path)
+    return paths
+
+
+class OnnxNet(object):
+    """onnxruntime session with the call signature of `Net` (CPU only)"""
+
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self.session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x):
+        x = x.cpu().contiguous().numpy()
+        return torch.from_numpy(self.session.run(None, {self.input_name: x})[0])
+
+
+def load_exported(model_path, backend, num_threads=None):
+    """Load the exported graph for `backend`, or None to fall back to eager
+    (missing export or runtime)."""
+    path = exported_path(model_path, backend)
+    if not os.path.isfile(path):
+        logger.warning("No {} export at {}, using eager ReID".format(backend, path))
+        return None
+    try:
+        if backend == "onnx":
+            return OnnxNet(path, num_threads=num_threads)
+        return torch.jit.load(path, map_location="cpu").eval()
+    except Exception as e:  # e.g. onnxruntime not installed
+        logger.warning("Could not load {} ({}), using eager ReID".format(path, e))
+        return None
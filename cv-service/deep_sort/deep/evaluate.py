@@ -1,13 +1,32 @@
+import argparse
+
 import torch
 
-features = torch.load("features.pth")
-qf = features["qf"]
-ql = features["ql"]
-gf = features["gf"]
-gl = features["gl"]
+parser = argparse.ArgumentParser(description="Rank-1 accuracy of saved features")
+parser.add_argument("features", nargs="*", default=["features.pth"],
+                    help="feature files from test.py; the first is the baseline")
+args = parser.parse_args()
+
+
+def top1(path):
+    features = torch.load(path)
+    qf = features["qf"]
+    ql = features["ql"]
+    gf = features["gf"]
+    gl = features["gl"]
+
+    scores = qf.mm(gf.t())
+    res = scores.topk(5, dim=1)[1][:, 0]
+    top1correct = gl[res].eq(ql).sum().item()
+    return top1correct / ql.size(0)
 
-scores = qf.mm(gf.t())
-res = scores.topk(5, dim=1)[1][:, 0]
-top1correct = gl[res].eq(ql).sum().item()
 
-print("Acc top1:{:.3f}".format(top1correct / ql.size(0)))
+baseline = None
+for path in args.features:
+    acc = top1(path)
+    if baseline is None:
+        baseline = acc
+        print("Acc top1:{:.3f} ({})".format(acc, path))
+    else:
+        print("Acc top1:{:.3f} ({}, {:+.3f} vs baseline)".format(
+            acc, path, acc - baseline))
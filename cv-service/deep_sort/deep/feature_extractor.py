@@ -1,48 +1,105 @@
 import torch
-import torchvision.transforms as transforms
 import numpy as np
 import cv2
+import glob
 import logging
+import os
 
+from .backends import EXPORTED_BACKENDS, load_exported, prepare_net, set_num_threads
 from .model import Net
 
 
 class Extractor(object):
-    def __init__(self, model_path, use_cuda=True):
-        self.net = Net(reid=True)
+    """ReID feature extractor.
+
+    backend, num_threads and channels_last select how `Net` is run on the
+    CPU (see deep.backends.prepare_net). For the "int8-static" backend,
+    `calibration` is a directory of person crops, or a list of uint8 crops,
+    used to calibrate the quantized model. "torchscript" and "onnx" run the
+    graph written next to the checkpoint by export_models.py, falling back
+    to eager if it is missing.
+    """
+
+    def __init__(self, model_path, use_cuda=True, backend="eager",
+                 num_threads=None, channels_last=False, calibration=None):
         self.device = "cuda" if torch.cuda.is_available() and use_cuda else "cpu"
+        set_num_threads(num_threads)
+        self.net = None
+        if backend in EXPORTED_BACKENDS:
+            self.net = load_exported(model_path, backend, num_threads)
+            if self.net is None:
+                backend = "eager"
+        if backend != "eager":
+            self.device = "cpu"
+        self.backend = backend
+        self.channels_last = channels_last and backend != "onnx"
+        self.size = (64, 128)
+        # Normalization folded into one multiply-add on uint8 pixel values:
+        # (x / 255 - mean) / std == x * scale + offset
+        mean = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+        std = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+        self._scale = (1. / (255. * std)).reshape(1, 3, 1, 1)
+        self._offset = (-mean / std).reshape(1, 3, 1, 1)
+        self._resized = None  # (N, 128, 64, 3) uint8, reused across calls
+        self._batch = None    # (N, 3, 128, 64) float32, reused across calls
+
+        if self.net is None:
+            self.net = self._load_eager(model_path, backend, calibration)
+
+    def _load_eager(self, model_path, backend, calibration):
+        net = Net(reid=True)
         state_dict = torch.load(model_path, map_location=torch.device(self.device))[
             'net_dict']
-        self.net.load_state_dict(state_dict)
+        net.load_state_dict(state_dict)
         logger = logging.getLogger("root.tracker")
         logger.info("Loading weights from {}... Done!".format(model_path))
-        self.net.to(self.device)
-        self.size = (64, 128)
-        self.norm = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225]),
-        ])
+        if backend == "int8-static" and calibration is not None:
+            calibration = self._calibration_batches(calibration)
+        return prepare_net(net.to(self.device), backend,
+                           channels_last=self.channels_last,
+                           calibration=calibration)
+
+    def _reserve(self, n):
+        """Make sure the reusable buffers hold at least `n` crops"""
+        if self._batch is not None and len(self._batch) >= n:
+            return
+        capacity = max(n, 2 * len(self._batch) if self._batch is not None else 8)
+        w, h = self.size
+        self._resized = np.empty((capacity, h, w, 3), dtype=np.uint8)
+        self._batch = np.empty((capacity, 3, h, w), dtype=np.float32)
 
     def _preprocess(self, im_crops):
         """
-        TODO:
-            1. to float with scale from 0 to 1
-            2. resize to (64, 128) as Market1501 dataset did
-            3. concatenate to a numpy array
-            3. to torch Tensor
-            4. normalize
+        Resize uint8 HxWx3 crops to (64, 128) as Market1501 dataset did,
+        straight into a preallocated buffer, then scale to [0, 1] and
+        normalize the whole batch in one step. Returns an (N, 3, 128, 64)
+        float tensor that shares memory with the buffer, so it is only valid
+        until the next call.
         """
-        def _resize(im, size):
-            return cv2.resize(im.astype(np.float32)/255., size)
+        n = len(im_crops)
+        self._reserve(n)
+        resized, batch = self._resized[:n], self._batch[:n]
+        for im, out in zip(im_crops, resized):
+            cv2.resize(im, self.size, dst=out)
+        np.multiply(resized.transpose(0, 3, 1, 2), self._scale, out=batch)
+        batch += self._offset
+        return torch.from_numpy(batch)
 
-        im_batch = torch.cat([self.norm(_resize(im, self.size)).unsqueeze(
-            0) for im in im_crops], dim=0).float()
-        return im_batch
+    def _calibration_batches(self, calibration, batch_size=32, limit=512):
+        if isinstance(calibration, str):
+            paths = sorted(glob.glob(os.path.join(calibration, "**", "*.jpg"),
+                                     recursive=True))[:limit]
+            calibration = [cv2.imread(p) for p in paths]
+        crops = [im for im in calibration if im is not None][:limit]
+        for i in range(0, len(crops), batch_size):
+            yield self._preprocess(crops[i:i + batch_size])
 
     def __call__(self, im_crops):
         im_batch = self._preprocess(im_crops)
-        with torch.no_grad():
+        with torch.inference_mode():
             im_batch = im_batch.to(self.device)
+            if self.channels_last:
+                im_batch = im_batch.contiguous(memory_format=torch.channels_last)
             features = self.net(im_batch)
         return features.cpu().numpy()
 
@@ -3,21 +3,34 @@ import torch.backends.cudnn as cudnn
 import torchvision
 
 import argparse
+import itertools
 import os
+import time
 
+from backends import BACKENDS, EXPORTED_BACKENDS, load_exported, prepare_net, set_num_threads
 from model import Net
 
 parser = argparse.ArgumentParser(description="Train on market1501")
 parser.add_argument("--data-dir", default='data', type=str)
 parser.add_argument("--no-cuda", action="store_true")
 parser.add_argument("--gpu-id", default=0, type=int)
+parser.add_argument("--backend", default="eager", choices=BACKENDS)
+parser.add_argument("--threads", default=None, type=int)
+parser.add_argument("--channels-last", action="store_true")
+parser.add_argument("--calibration-dir", default=None, type=str,
+                    help="images for int8-static calibration (default: <data-dir>/train)")
+parser.add_argument("--calibration-batches", default=8, type=int)
+parser.add_argument("--output", default="features.pth", type=str)
 args = parser.parse_args()
 
 # device
 device = "cuda:{}".format(
     args.gpu_id) if torch.cuda.is_available() and not args.no_cuda else "cpu"
-if torch.cuda.is_available() and not args.no_cuda:
+if args.backend != "eager":
+    device = "cpu"  # quantized kernels are CPU only
+if device != "cpu":
     cudnn.benchmark = True
+set_num_threads(args.threads)
 
 # data loader
 root = args.data_dir
@@ -49,22 +62,52 @@ net.load_state_dict(net_dict, strict=False)
 net.eval()
 net.to(device)
 
+calibration = None
+if args.backend == "int8-static":
+    calibration_dir = args.calibration_dir or os.path.join(root, "train")
+    calibrationloader = torch.utils.data.DataLoader(
+        torchvision.datasets.ImageFolder(calibration_dir, transform=transform),
+        batch_size=64, shuffle=True
+    )
+    calibration = (inputs for inputs, _ in itertools.islice(
+        calibrationloader, args.calibration_batches))
+if args.backend in EXPORTED_BACKENDS:
+    # graph written by export_models.py next to the checkpoint
+    net = load_exported("./checkpoint/ckpt.t7", args.backend, args.threads)
+    assert net is not None, "Error: no usable {} export found!".format(args.backend)
+    args.channels_last = False
+else:
+    net = prepare_net(net, args.backend, channels_last=args.channels_last,
+                      calibration=calibration)
+
 # compute features
 query_features = torch.tensor([]).float()
 query_labels = torch.tensor([]).long()
 gallery_features = torch.tensor([]).float()
 gallery_labels = torch.tensor([]).long()
 
-with torch.no_grad():
+def run(inputs):
+    inputs = inputs.to(device)
+    if args.channels_last:
+        inputs = inputs.contiguous(memory_format=torch.channels_last)
+    return net(inputs).cpu()
+
+
+images, elapsed = 0, 0.
+with torch.inference_mode():
     for idx, (inputs, labels) in enumerate(queryloader):
-        inputs = inputs.to(device)
-        features = net(inputs).cpu()
+        start = time.perf_counter()
+        features = run(inputs)
+        elapsed += time.perf_counter() - start
+        images += len(inputs)
         query_features = torch.cat((query_features, features), dim=0)
         query_labels = torch.cat((query_labels, labels))
 
     for idx, (inputs, labels) in enumerate(galleryloader):
-        inputs = inputs.to(device)
-        features = net(inputs).cpu()
+        start = time.perf_counter()
+        features = run(inputs)
+        elapsed += time.perf_counter() - start
+        images += len(inputs)
         gallery_features = torch.cat((gallery_features, features), dim=0)
         gallery_labels = torch.cat((gallery_labels, labels))
 
@@ -77,4 +120,6 @@ features = {
     "gf": gallery_features,
     "gl": gallery_labels
 }
-torch.save(features, "features.pth")
+torch.save(features, args.output)
+print("{}: {:.2f} ms/image over {} images -> {}".format(
+    args.backend, 1000. * elapsed / max(images, 1), images, args.output))
@@ -2,8 +2,9 @@ import numpy as np
 import torch
 
 from .deep.feature_extractor import Extractor
+from .embedding_cache import EmbeddingCache
 from .sort.nn_matching import NearestNeighborDistanceMetric
-from .sort.detection import Detection
+from .sort.detection import DetectionBatch
 from .sort.tracker import Tracker
 
 
@@ -11,11 +12,15 @@ __all__ = ['DeepSort']
 
 
 class DeepSort(object):
-    def __init__(self, model_path, max_dist=0.2, min_confidence=0.3, nms_max_overlap=1.0, max_iou_distance=0.7, max_age=70, n_init=3, nn_budget=100, use_cuda=True):
+    def __init__(self, model_path, max_dist=0.2, min_confidence=0.3, nms_max_overlap=1.0, max_iou_distance=0.7, max_age=70, n_init=3, nn_budget=100, use_cuda=True, reuse_refresh=30, reuse_iou=0.9, reuse_pixel_delta=6.0, **extractor_options):
         self.min_confidence = min_confidence
         self.nms_max_overlap = nms_max_overlap
 
-        self.extractor = Extractor(model_path, use_cuda=use_cuda)
+        # extractor_options: backend, num_threads, channels_last, calibration
+        self.extractor = Extractor(model_path, use_cuda=use_cuda, **extractor_options)
+        # Reuse features of tracks whose crop barely changed; reuse_refresh=0 disables
+        self.embedding_cache = EmbeddingCache(
+            reuse_iou, reuse_pixel_delta, reuse_refresh) if reuse_refresh else None
 
         max_cosine_distance = max_dist
         metric = NearestNeighborDistanceMetric(
@@ -26,18 +31,22 @@ class DeepSort(object):
     def update(self, bbox_xywh, confidences, ori_img):
         self.height, self.width = ori_img.shape[:2]
         # generate detections
-        features = self._get_features(bbox_xywh, ori_img)
         bbox_tlwh = self._xywh_to_tlwh(bbox_xywh)
-        detections = [Detection(bbox_tlwh[i], conf, features[i]) for i, conf in enumerate(
-            confidences) if conf > self.min_confidence]
-
-        # run on non-maximum supression
-        boxes = np.array([d.tlwh for d in detections])
-        scores = np.array([d.confidence for d in detections])
+        features, reused = self._get_features(bbox_xywh, ori_img, bbox_tlwh)
+        confidences = np.asarray(confidences, dtype=float).reshape(-1)
+        keep = confidences > self.min_confidence
+        detections = DetectionBatch(
+            bbox_tlwh[keep], confidences[keep], features[keep], reused[keep])
 
         # update tracker
         self.tracker.predict()
         self.tracker.update(detections)
+        if self.embedding_cache:
+            kept = np.flatnonzero(keep)
+            self.embedding_cache.store(
+                [(track_id, kept[j]) for track_id, j in self.tracker.matches],
+                bbox_tlwh, features,
+                [t.track_id for t in self.tracker.tracks])
 
         # output bbox identities
         outputs = []
@@ -102,14 +111,23 @@ class DeepSort(object):
         h = int(y2 - y1)
         return t, l, w, h
 
-    def _get_features(self, bbox_xywh, ori_img):
+    def _get_features(self, bbox_xywh, ori_img, bbox_tlwh=None):
+        """Features of the detections and flags marking those reused from the cache"""
         im_crops = []
         for box in bbox_xywh:
             x1, y1, x2, y2 = self._xywh_to_xyxy(box)
             im = ori_img[y1:y2, x1:x2]
             im_crops.append(im)
-        if im_crops:
-            features = self.extractor(im_crops)
-        else:
-            features = np.array([])
-        return features
+        if not im_crops:
+            return np.array([]), np.zeros(0, dtype=bool)
+        if self.embedding_cache is None or bbox_tlwh is None:
+            return self.extractor(im_crops), np.zeros(len(im_crops), dtype=bool)
+
+        cached = self.embedding_cache.lookup(bbox_tlwh, im_crops)
+        reused = np.array([f is not None for f in cached])
+        missing = np.flatnonzero(~reused)
+        if len(missing):
+            computed = self.extractor([im_crops[i] for i in missing])
+            for i, feature in zip(missing, computed):
+                cached[i] = feature
+        return np.stack(cached), reused
@@ -0,0 +1,136 @@
+import cv2
+import numpy as np
+
+from .sort.iou_matching import iou_matrix
+
+
+class _Entry(object):
+    __slots__ = ('tlwh', 'thumb', 'feature', 'reused')
+
+    def __init__(self, tlwh, thumb, feature):
+        self.tlwh = tlwh
+        self.thumb = thumb
+        self.feature = feature
+        self.reused = 0
+
+
+class EmbeddingCache(object):
+    """Reuse ReID features of tracks whose crop has not changed.
+
+    For every track matched in a frame the cache keeps the box, a tiny
+    grayscale thumbnail of the crop and the feature from the last time the
+    extractor actually ran for it. A new detection reuses that feature when
+    its box overlaps the cached box by at least `iou_threshold` and its
+    thumbnail differs from the cached one by at most `pixel_threshold` (mean
+    absolute difference, 0-255). Comparing against the last embedded crop,
+    not the last seen one, keeps slow drift from accumulating, and after
+    `refresh_interval` reuses the feature is recomputed anyway.
+
+    Parameters
+    ----------
+    iou_threshold : float
+        Minimum IoU between detection and cached box.
+    pixel_threshold : float
+        Maximum mean absolute thumbnail difference.
+    refresh_interval : int
+        Number of consecutive reuses after which the feature is recomputed.
+    thumb_size : (int, int)
+        Thumbnail (width, height).
+
+    Attributes
+    ----------
+    hits : int
+        Features served from the cache.
+    misses : int
+        Features that had to be computed by the extractor.
+
+    """
+
+    def __init__(self, iou_threshold=0.9, pixel_threshold=6.0,
+                 refresh_interval=30, thumb_size=(8, 16)):
+        self.iou_threshold = iou_threshold
+        self.pixel_threshold = pixel_threshold
+        self.refresh_interval = refresh_interval
+        self.thumb_size = thumb_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # track_id -> _Entry
+        self._frame = []    # per detection of the current frame: (entry, owner, thumb)
+
+    def lookup(self, bbox_tlwh, im_crops):
+        """Cached features for the current frame's detections.
+
+        Returns a list with one feature (or None where the extractor has to
+        run) per crop. Call `store` after the tracker update.
+        """
+        thumbs = [self._thumb(im) for im in im_crops]
+        features = [None] * len(im_crops)
+        self._frame = [(None, None, thumb) for thumb in thumbs]
+        if not self._entries or not len(im_crops):
+            self.misses += len(im_crops)
+            return features
+
+        owners = list(self._entries)
+        entries = list(self._entries.values())
+        overlap = iou_matrix(bbox_tlwh, np.stack([e.tlwh for e in entries]))
+        claimed = set()
+        for i in np.argsort(-overlap.max(axis=1)):
+            j = int(np.argmax(overlap[i]))
+            entry = entries[j]
+            if (j in claimed or overlap[i, j] < self.iou_threshold
+                    or entry.reused >= self.refresh_interval
+                    or thumbs[i] is None or entry.thumb is None
+                    or np.abs(thumbs[i] - entry.thumb).mean() > self.pixel_threshold):
+                continue
+            claimed.add(j)
+            features[i] = entry.feature
+            self._frame[i] = (entry, owners[j], thumbs[i])
+
+        hits = len(claimed)
+        self.hits += hits
+        self.misses += len(im_crops) - hits
+        return features
+
+    def store(self, matches, bbox_tlwh, features, active_ids):
+        """Remember this frame's features for the tracks they were matched to.
+
+        A reused feature is only kept for the track it was cached for.
+
+        matches : List[(int, int)]
+            (track id, detection index) pairs of the tracker update.
+        active_ids : Iterable[int]
+            Tracks still alive; entries of other tracks are dropped.
+        """
+        entries = {}
+        for track_id, i in matches:
+            reused, owner, thumb = self._frame[i]
+            if reused is not None:
+                # A feature cached for another track says nothing about this
+                # one; leave it uncached so its next feature is computed
+                if owner == track_id:
+                    reused.reused += 1
+                    entries[track_id] = reused
+            else:
+                entries[track_id] = _Entry(
+                    np.array(bbox_tlwh[i], dtype=float), thumb, features[i])
+        for track_id in active_ids:
+            if track_id not in entries and track_id in self._entries:
+                entries[track_id] = self._entries[track_id]
+        self._entries = entries
+        self._frame = []
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "reid_cache_hits": self.hits,
+            "reid_cache_misses": self.misses,
+            "reid_cache_hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def _thumb(self, im):
+        if im.size == 0:
+            return None
+        if im.ndim == 3:
+            im = cv2.cvtColor(im, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(im, self.thumb_size,
+                          interpolation=cv2.INTER_AREA).astype(np.float32)
@@ -0,0 +1,101 @@
+# vim: expandtab:ts=4:sw=4
+from __future__ import absolute_import
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+def solve(cost_matrix, max_distance):
+    """Solve a gated linear assignment problem.
+
+    Pairs with cost larger than `max_distance` are never matched. The result
+    is the same as running `linear_sum_assignment` on the full matrix (with
+    gated entries clamped just above `max_distance`) and rejecting gated
+    pairs afterwards, but cheaper for the shapes seen in practice:
+
+    * A single row or column is solved directly with `argmin`.
+    * Otherwise the bipartite graph of feasible entries is split into
+      connected components and each component is solved on its own; rows
+      and columns without any feasible entry are left out entirely.
+
+    Parameters
+    ----------
+    cost_matrix : ndarray
+        The NxM dimensional cost matrix. It is not modified.
+    max_distance : float
+        Gating threshold.
+
+    Returns
+    -------
+    (ndarray, ndarray, ndarray, ndarray)
+        Returns a tuple with the following four entries:
+        * Row indices of matched pairs, in ascending order.
+        * Column indices of matched pairs, aligned with the rows.
+        * Boolean mask of length N that is True for unmatched rows.
+        * Boolean mask of length M that is True for unmatched columns.
+
+    """
+    num_rows, num_cols = cost_matrix.shape
+    feasible = cost_matrix <= max_distance
+
+    if num_rows == 0 or num_cols == 0 or not feasible.any():
+        rows = cols = np.zeros(0, dtype=int)
+    elif num_rows == 1 or num_cols == 1:
+        rows, cols = _solve_vector(cost_matrix, feasible)
+    else:
+        rows, cols = _solve_components(cost_matrix, feasible, max_distance)
+
+    unmatched_rows = np.ones(num_rows, dtype=bool)
+    unmatched_rows[rows] = False
+    unmatched_cols = np.ones(num_cols, dtype=bool)
+    unmatched_cols[cols] = False
+    return rows, cols, unmatched_rows, unmatched_cols
+
+
+def _solve_vector(cost_matrix, feasible):
+    """Assignment for a 1xM or Nx1 matrix: the single cheapest entry."""
+    row, col = np.unravel_index(np.argmin(cost_matrix), cost_matrix.shape)
+    if not feasible[row, col]:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    return np.array([row]), np.array([col])
+
+
+def _solve_dense(cost_matrix, max_distance):
+    """`linear_sum_assignment` with gated entries clamped and rejected."""
+    if cost_matrix.shape[0] == 1 or cost_matrix.shape[1] == 1:
+        return _solve_vector(cost_matrix, cost_matrix <= max_distance)
+    clamped = np.minimum(cost_matrix, max_distance + 1e-5)
+    rows, cols = linear_sum_assignment(clamped)
+    keep = cost_matrix[rows, cols] <= max_distance
+    return rows[keep], cols[keep]
+
+
+def _solve_components(cost_matrix, feasible, max_distance):
+    """Solve each connected component of the feasible bipartite graph."""
+    num_rows, num_cols = cost_matrix.shape
+    edge_rows, edge_cols = np.nonzero(feasible)
+    graph = csr_matrix(
+        (np.ones(len(edge_rows), dtype=bool), (edge_rows, edge_cols + num_rows)),
+        shape=(num_rows + num_cols, num_rows + num_cols))
+    num_components, labels = connected_components(graph, directed=False)
+    row_labels, col_labels = labels[:num_rows], labels[num_rows:]
+
+    # Isolated rows and columns have no feasible partner; skip them.
+    active_rows = feasible.any(axis=1)
+    active_labels = np.unique(row_labels[active_rows])
+    if len(active_labels) == 1 and active_rows.all() and feasible.any(axis=0).all():
+        return _solve_dense(cost_matrix, max_distance)
+
+    rows, cols = [], []
+    for label in active_labels:
+        component_rows = np.flatnonzero(row_labels == label)
+        component_cols = np.flatnonzero(col_labels == label)
+        sub_rows, sub_cols = _solve_dense(
+            cost_matrix[np.ix_(component_rows, component_cols)], max_distance)
+        rows.append(component_rows[sub_rows])
+        cols.append(component_cols[sub_cols])
+
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    order = np.argsort(rows)
+    return rows[order], cols[order]
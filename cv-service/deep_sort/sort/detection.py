@@ -25,12 +25,13 @@ class Detection(object):
         A feature vector that describes the object contained in this image.
 
     """
-    
+
+    __slots__ = ('tlwh', 'confidence', 'feature')
+
     def __init__(self, tlwh, confidence, feature):
         self.tlwh = np.asarray(tlwh, dtype=float)
         self.confidence = float(confidence)
-        self.feature = np.asarray(feature, dtype=np.float32)    
-    
+        self.feature = np.asarray(feature, dtype=np.float32)
 
     # def __init__(self, tlwh, confidence, feature):
         # self.tlwh = np.asarray(tlwh, dtype=np.float)
@@ -53,3 +54,89 @@ class Detection(object):
         ret[:2] += ret[2:] / 2
         ret[2] /= ret[3]
         return ret
+
+
+class DetectionBatch(object):
+    """
+    All detections of one image, stored as contiguous arrays.
+
+    Indexing a batch returns a `Detection` whose arrays are views into the
+    batch, so code written against a list of detections keeps working.
+
+    Parameters
+    ----------
+    tlwh : array_like
+        The Mx4 matrix of bounding boxes in format `(x, y, w, h)`.
+    confidence : array_like
+        The M detector confidence scores.
+    feature : array_like
+        The MxD matrix of feature vectors.
+    reused : Optional[array_like]
+        M flags marking features reused from an earlier frame (see
+        `EmbeddingCache`) rather than computed for this one. None if all
+        were computed.
+
+    Attributes
+    ----------
+    tlwh : ndarray
+        The Mx4 matrix of bounding boxes in format `(top left x, top left y,
+        width, height)`.
+    confidence : ndarray
+        The M detector confidence scores.
+    feature : ndarray
+        The MxD matrix of feature vectors.
+    reused : ndarray
+        The M reused-feature flags.
+
+    """
+
+    __slots__ = ('tlwh', 'confidence', 'feature', 'reused')
+
+    def __init__(self, tlwh, confidence, feature, reused=None):
+        self.tlwh = np.asarray(tlwh, dtype=float).reshape(-1, 4)
+        self.confidence = np.asarray(confidence, dtype=float).reshape(-1)
+        feature = np.asarray(feature, dtype=np.float32)
+        if feature.ndim != 2:
+            dim = -1 if len(self.tlwh) else 0
+            feature = feature.reshape(len(self.tlwh), dim)
+        self.feature = feature
+        self.reused = np.zeros(len(self.tlwh), dtype=bool) if reused is None \
+            else np.asarray(reused, dtype=bool).reshape(-1)
+
+    @classmethod
+    def from_detections(cls, detections):
+        """Stack a list of `Detection` into a batch."""
+        if not detections:
+            return cls(np.zeros((0, 4)), np.zeros(0), np.zeros((0, 0)))
+        return cls(np.stack([d.tlwh for d in detections]),
+                   [d.confidence for d in detections],
+                   np.stack([d.feature for d in detections]))
+
+    def __len__(self):
+        return len(self.tlwh)
+
+    def __getitem__(self, i):
+        detection = Detection.__new__(Detection)
+        detection.tlwh = self.tlwh[i]
+        detection.confidence = float(self.confidence[i])
+        detection.feature = self.feature[i]
+        return detection
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_tlbr(self):
+        """Convert all bounding boxes to format `(min x, min y, max x, max y)`.
+        """
+        ret = self.tlwh.copy()
+        ret[:, 2:] += ret[:, :2]
+        return ret
+
+    def to_xyah(self):
+        """Convert all bounding boxes to format `(center x, center y, aspect
+        ratio, height)`.
+        """
+        ret = self.tlwh.copy()
+        ret[:, :2] += ret[:, 2:] / 2
+        ret[:, 2] /= ret[:, 3]
+        return ret
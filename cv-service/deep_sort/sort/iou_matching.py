@@ -2,6 +2,47 @@
 from __future__ import absolute_import
 import numpy as np
 from . import linear_assignment
+from .detection import DetectionBatch
+
+
+def iou_matrix(bboxes, candidates):
+    """Compute pairwise intersection over union in one vectorized pass.
+
+    Only depends on NumPy, so it can be used on its own (e.g. to compare
+    detector boxes with tracked boxes outside the tracker).
+
+    Parameters
+    ----------
+    bboxes : array_like
+        An Nx4 matrix of bounding boxes in format `(top left x, top left y,
+        width, height)`.
+    candidates : array_like
+        An Mx4 matrix of bounding boxes in the same format.
+
+    Returns
+    -------
+    ndarray
+        The NxM matrix where element (i, j) is the intersection over union in
+        [0, 1] between `bboxes[i]` and `candidates[j]`.
+
+    """
+    bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    candidates = np.asarray(candidates, dtype=float).reshape(-1, 4)
+
+    bboxes_tl, bboxes_br = bboxes[:, :2], bboxes[:, :2] + bboxes[:, 2:]
+    candidates_tl = candidates[:, :2]
+    candidates_br = candidates[:, :2] + candidates[:, 2:]
+
+    tl = np.maximum(bboxes_tl[:, np.newaxis, :], candidates_tl[np.newaxis, :, :])
+    br = np.minimum(bboxes_br[:, np.newaxis, :], candidates_br[np.newaxis, :, :])
+    wh = np.maximum(0., br - tl)
+
+    area_intersection = wh[..., 0] * wh[..., 1]
+    area_bboxes = bboxes[:, 2] * bboxes[:, 3]
+    area_candidates = candidates[:, 2] * candidates[:, 3]
+    return area_intersection / (
+        area_bboxes[:, np.newaxis] + area_candidates[np.newaxis, :]
+        - area_intersection)
 
 
 def iou(bbox, candidates):
@@ -23,20 +64,7 @@ def iou(bbox, candidates):
         occluded by the candidate.
 
     """
-    bbox_tl, bbox_br = bbox[:2], bbox[:2] + bbox[2:]
-    candidates_tl = candidates[:, :2]
-    candidates_br = candidates[:, :2] + candidates[:, 2:]
-
-    tl = np.c_[np.maximum(bbox_tl[0], candidates_tl[:, 0])[:, np.newaxis],
-               np.maximum(bbox_tl[1], candidates_tl[:, 1])[:, np.newaxis]]
-    br = np.c_[np.minimum(bbox_br[0], candidates_br[:, 0])[:, np.newaxis],
-               np.minimum(bbox_br[1], candidates_br[:, 1])[:, np.newaxis]]
-    wh = np.maximum(0., br - tl)
-
-    area_intersection = wh.prod(axis=1)
-    area_bbox = bbox[2:].prod()
-    area_candidates = candidates[:, 2:].prod(axis=1)
-    return area_intersection / (area_bbox + area_candidates - area_intersection)
+    return iou_matrix(bbox, candidates)[0]
 
 
 def iou_cost(tracks, detections, track_indices=None,
@@ -62,6 +90,8 @@ def iou_cost(tracks, detections, track_indices=None,
         Returns a cost matrix of shape
         len(track_indices), len(detection_indices) where entry (i, j) is
         `1 - iou(tracks[track_indices[i]], detections[detection_indices[j]])`.
+        Rows of tracks that were not updated in the previous frame are set to
+        `linear_assignment.INFTY_COST`.
 
     """
     if track_indices is None:
@@ -69,14 +99,18 @@ def iou_cost(tracks, detections, track_indices=None,
     if detection_indices is None:
         detection_indices = np.arange(len(detections))
 
-    cost_matrix = np.zeros((len(track_indices), len(detection_indices)))
-    for row, track_idx in enumerate(track_indices):
-        if tracks[track_idx].time_since_update > 1:
-            cost_matrix[row, :] = linear_assignment.INFTY_COST
-            continue
+    if len(track_indices) == 0 or len(detection_indices) == 0:
+        return np.zeros((len(track_indices), len(detection_indices)))
 
-        bbox = tracks[track_idx].to_tlwh()
+    bboxes = np.asarray([tracks[i].to_tlwh() for i in track_indices])
+    if isinstance(detections, DetectionBatch):
+        candidates = detections.tlwh[np.asarray(detection_indices, dtype=int)]
+    else:
         candidates = np.asarray(
             [detections[i].tlwh for i in detection_indices])
-        cost_matrix[row, :] = 1. - iou(bbox, candidates)
+    stale = np.asarray(
+        [tracks[i].time_since_update > 1 for i in track_indices])
+
+    cost_matrix = 1. - iou_matrix(bboxes, candidates)
+    cost_matrix[stale, :] = linear_assignment.INFTY_COST
     return cost_matrix
@@ -227,3 +227,167 @@ class KalmanFilter(object):
             overwrite_b=True)
         squared_maha = np.sum(z * z, axis=0)
         return squared_maha
+
+    def _motion_std(self, height):
+        """Process noise standard deviations for N boxes of the given heights
+        as an Nx8 array (see `predict`)."""
+        pos = self._std_weight_position * height
+        vel = self._std_weight_velocity * height
+        return np.stack([
+            pos, pos, np.full_like(height, 1e-2), pos,
+            vel, vel, np.full_like(height, 1e-5), vel], axis=1)
+
+    def multi_predict(self, mean, covariance):
+        """Run Kalman filter prediction step for N tracks at once.
+
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional mean vectors of the object states at the
+            previous time step.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices of the object states at
+            the previous time step.
+
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the Nx8 mean vectors and Nx8x8 covariance matrices of the
+            predicted states.
+
+        """
+        motion_var = np.square(self._motion_std(mean[:, 3]))
+        motion_cov = np.zeros_like(covariance)
+        diag = np.arange(covariance.shape[1])
+        motion_cov[:, diag, diag] = motion_var
+
+        mean = np.dot(mean, self._motion_mat.T)
+        covariance = np.matmul(
+            np.matmul(self._motion_mat, covariance), self._motion_mat.T)
+        return mean, covariance + motion_cov
+
+    def multi_project(self, mean, covariance):
+        """Project N state distributions to measurement space.
+
+        Parameters
+        ----------
+        mean : ndarray
+            The states' mean vectors (Nx8 dimensional array).
+        covariance : ndarray
+            The states' covariance matrices (Nx8x8 dimensional).
+
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the Nx4 projected means and Nx4x4 covariance matrices of
+            the given state estimates.
+
+        """
+        height = mean[:, 3]
+        std = np.stack([
+            self._std_weight_position * height,
+            self._std_weight_position * height,
+            np.full_like(height, 1e-1),
+            self._std_weight_position * height], axis=1)
+
+        # The observation matrix selects (x, y, a, h), so projecting is slicing.
+        ndim = self._update_mat.shape[0]
+        mean = mean[:, :ndim]
+        covariance = covariance[:, :ndim, :ndim].copy()
+        diag = np.arange(ndim)
+        covariance[:, diag, diag] += np.square(std)
+        return mean, covariance
+
+    def multi_update(self, mean, covariance, measurement):
+        """Run Kalman filter correction step for N tracks at once.
+
+        Parameters
+        ----------
+        mean : ndarray
+            The predicted states' mean vectors (Nx8 dimensional).
+        covariance : ndarray
+            The states' covariance matrices (Nx8x8 dimensional).
+        measurement : ndarray
+            The Nx4 dimensional measurement vectors (x, y, a, h), one per
+            track.
+
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the measurement-corrected state distributions.
+
+        """
+        projected_mean, projected_cov = self.multi_project(mean, covariance)
+
+        # K = P H^T S^-1, solved as S K^T = H P^T (S is symmetric).
+        ndim = self._update_mat.shape[0]
+        kalman_gain = np.linalg.solve(
+            projected_cov, covariance[:, :, :ndim].transpose(0, 2, 1)
+        ).transpose(0, 2, 1)
+        innovation = measurement - projected_mean
+
+        new_mean = mean + np.einsum('nij,nj->ni', kalman_gain, innovation)
+        new_covariance = covariance - np.matmul(
+            np.matmul(kalman_gain, projected_cov), kalman_gain.transpose(0, 2, 1))
+        return new_mean, new_covariance
+
+    def multi_gating_distance(self, mean, covariance, measurements,
+                              only_position=False):
+        """Compute gating distances between N state distributions and M
+        measurements.
+
+        Parameters
+        ----------
+        mean : ndarray
+            Mean vectors over the state distributions (Nx8 dimensional).
+        covariance : ndarray
+            Covariances of the state distributions (Nx8x8 dimensional).
+        measurements : ndarray
+            An Mx4 dimensional matrix of M measurements in format (x, y, a, h).
+        only_position : Optional[bool]
+            If True, distance computation is done with respect to the bounding
+            box center position only.
+
+        Returns
+        -------
+        ndarray
+            Returns an NxM matrix where element (i, j) contains the squared
+            Mahalanobis distance between state i and `measurements[j]`.
+
+        """
+        mean, covariance = self.multi_project(mean, covariance)
+        return self.projected_gating_distance(
+            mean, np.linalg.cholesky(covariance), measurements, only_position)
+
+    @staticmethod
+    def projected_gating_distance(projected_mean, cholesky_factor,
+                                  measurements, only_position=False):
+        """Squared Mahalanobis distances from already projected states.
+
+        Parameters
+        ----------
+        projected_mean : ndarray
+            Nx4 projected means (see `multi_project`).
+        cholesky_factor : ndarray
+            Nx4x4 lower Cholesky factors of the projected covariances.
+        measurements : ndarray
+            An Mx4 dimensional matrix of M measurements in format (x, y, a, h).
+        only_position : Optional[bool]
+            If True, only the center position is used.
+
+        Returns
+        -------
+        ndarray
+            The NxM matrix of squared Mahalanobis distances.
+
+        """
+        if only_position:
+            # The leading 2x2 block of a Cholesky factor is the factor of the
+            # leading 2x2 block of the covariance.
+            projected_mean = projected_mean[:, :2]
+            cholesky_factor = cholesky_factor[:, :2, :2]
+            measurements = measurements[:, :2]
+
+        d = measurements[None, :, :] - projected_mean[:, None, :]
+        z = np.linalg.solve(cholesky_factor, d.transpose(0, 2, 1))
+        return np.sum(z * z, axis=1)
@@ -1,9 +1,9 @@
 # vim: expandtab:ts=4:sw=4
 from __future__ import absolute_import
 import numpy as np
-# from sklearn.utils.linear_assignment_ import linear_assignment
-from scipy.optimize import linear_sum_assignment as linear_assignment
+from . import assignment
 from . import kalman_filter
+from .detection import DetectionBatch
 
 
 INFTY_COST = 1e+5
@@ -55,31 +55,21 @@ def min_cost_matching(
 
     cost_matrix = distance_metric(
         tracks, detections, track_indices, detection_indices)
-    cost_matrix[cost_matrix > max_distance] = max_distance + 1e-5
-
-    row_indices, col_indices = linear_assignment(cost_matrix)
-
-    matches, unmatched_tracks, unmatched_detections = [], [], []
-    for col, detection_idx in enumerate(detection_indices):
-        if col not in col_indices:
-            unmatched_detections.append(detection_idx)
-    for row, track_idx in enumerate(track_indices):
-        if row not in row_indices:
-            unmatched_tracks.append(track_idx)
-    for row, col in zip(row_indices, col_indices):
-        track_idx = track_indices[row]
-        detection_idx = detection_indices[col]
-        if cost_matrix[row, col] > max_distance:
-            unmatched_tracks.append(track_idx)
-            unmatched_detections.append(detection_idx)
-        else:
-            matches.append((track_idx, detection_idx))
+    rows, cols, unmatched_rows, unmatched_cols = assignment.solve(
+        cost_matrix, max_distance)
+
+    track_indices = np.asarray(track_indices)
+    detection_indices = np.asarray(detection_indices)
+    matches = list(zip(track_indices[rows].tolist(),
+                       detection_indices[cols].tolist()))
+    unmatched_tracks = track_indices[unmatched_rows].tolist()
+    unmatched_detections = detection_indices[unmatched_cols].tolist()
     return matches, unmatched_tracks, unmatched_detections
 
 
 def matching_cascade(
         distance_metric, max_distance, cascade_depth, tracks, detections,
-        track_indices=None, detection_indices=None):
+        track_indices=None, detection_indices=None, precompute=False):
     """Run matching cascade.
 
     Parameters
@@ -106,6 +96,12 @@ def matching_cascade(
         List of detection indices that maps columns in `cost_matrix` to
         detections in `detections` (see description above). Defaults to all
         detections.
+    precompute : Optional[bool]
+        If True, `distance_metric` is evaluated once for all `track_indices`
+        against all `detection_indices` and every cascade level solves its
+        assignment on rows and columns of that matrix. This gives the same
+        result as long as each entry of the metric depends only on its own
+        (track, detection) pair, which holds for the gated appearance metric.
 
     Returns
     -------
@@ -121,16 +117,24 @@ def matching_cascade(
     if detection_indices is None:
         detection_indices = list(range(len(detections)))
 
+    if precompute and len(track_indices) > 0 and len(detection_indices) > 0:
+        distance_metric = _precomputed_metric(
+            distance_metric(tracks, detections, track_indices,
+                            detection_indices),
+            track_indices, detection_indices)
+
+    # Group tracks by age once instead of rescanning them at every level.
+    tracks_by_age = {}
+    for k in track_indices:
+        tracks_by_age.setdefault(tracks[k].time_since_update, []).append(k)
+
     unmatched_detections = detection_indices
     matches = []
     for level in range(cascade_depth):
         if len(unmatched_detections) == 0:  # No detections left
             break
 
-        track_indices_l = [
-            k for k in track_indices
-            if tracks[k].time_since_update == 1 + level
-        ]
+        track_indices_l = tracks_by_age.get(1 + level, [])
         if len(track_indices_l) == 0:  # Nothing to match at this level
             continue
 
@@ -143,9 +147,69 @@ def matching_cascade(
     return matches, unmatched_tracks, unmatched_detections
 
 
+class GatingCache(object):
+    """Per-frame cache of the quantities needed for Mahalanobis gating.
+
+    Projects every track's state to measurement space and factorizes the
+    projected covariance once, and converts every detection to (x, y, a, h)
+    once, so repeated `gate_cost_matrix` calls within a frame (e.g. one per
+    matching cascade level) only index into these arrays. Build it after
+    `Tracker.predict` and discard it at the end of the frame.
+
+    Parameters
+    ----------
+    kf : The Kalman filter.
+    tracks : List[track.Track]
+        A list of predicted tracks at the current time step.
+    detections : List[detection.Detection]
+        A list of detections at the current time step.
+
+    """
+
+    def __init__(self, kf, tracks, detections):
+        if len(tracks) > 0:
+            mean, covariance = kf.multi_project(
+                np.stack([t.mean for t in tracks]),
+                np.stack([t.covariance for t in tracks]))
+            self.projected_mean = mean
+            self.cholesky_factor = np.linalg.cholesky(covariance)
+        else:
+            self.projected_mean = np.zeros((0, 4))
+            self.cholesky_factor = np.zeros((0, 4, 4))
+        if isinstance(detections, DetectionBatch):
+            self.measurements = detections.to_xyah()
+        else:
+            self.measurements = np.asarray(
+                [d.to_xyah() for d in detections]).reshape(-1, 4)
+
+    def gating_distance(self, track_indices, detection_indices,
+                        only_position=False):
+        """Squared Mahalanobis distances for the given tracks (rows) and
+        detections (columns)."""
+        track_indices = np.asarray(track_indices, dtype=int)
+        detection_indices = np.asarray(detection_indices, dtype=int)
+        return kalman_filter.KalmanFilter.projected_gating_distance(
+            self.projected_mean[track_indices],
+            self.cholesky_factor[track_indices],
+            self.measurements[detection_indices], only_position)
+
+
+def _precomputed_metric(cost_matrix, track_indices, detection_indices):
+    """Wrap a full cost matrix as a distance metric over index subsets."""
+    row_of = {k: i for i, k in enumerate(track_indices)}
+    col_of = {k: j for j, k in enumerate(detection_indices)}
+
+    def metric(tracks, detections, track_indices_l, detection_indices_l):
+        rows = [row_of[k] for k in track_indices_l]
+        cols = [col_of[k] for k in detection_indices_l]
+        # Fancy indexing copies, so callers may modify the result.
+        return cost_matrix[np.ix_(rows, cols)]
+    return metric
+
+
 def gate_cost_matrix(
         kf, cost_matrix, tracks, detections, track_indices, detection_indices,
-        gated_cost=INFTY_COST, only_position=False):
+        gated_cost=INFTY_COST, only_position=False, cache=None):
     """Invalidate infeasible entries in cost matrix based on the state
     distributions obtained by Kalman filtering.
 
@@ -173,6 +237,10 @@ def gate_cost_matrix(
     only_position : Optional[bool]
         If True, only the x, y position of the state distribution is considered
         during gating. Defaults to False.
+    cache : Optional[GatingCache]
+        Projected states and Cholesky factors for `tracks` and measurements
+        for `detections` computed earlier in this frame. If None, they are
+        computed here for the given indices only.
 
     Returns
     -------
@@ -180,13 +248,19 @@ def gate_cost_matrix(
         Returns the modified cost matrix.
 
     """
+    if len(track_indices) == 0 or len(detection_indices) == 0:
+        return cost_matrix
     gating_dim = 2 if only_position else 4
     gating_threshold = kalman_filter.chi2inv95[gating_dim]
-    measurements = np.asarray(
-        [detections[i].to_xyah() for i in detection_indices])
-    for row, track_idx in enumerate(track_indices):
-        track = tracks[track_idx]
-        gating_distance = kf.gating_distance(
-            track.mean, track.covariance, measurements, only_position)
-        cost_matrix[row, gating_distance > gating_threshold] = gated_cost
+    if cache is not None:
+        gating_distance = cache.gating_distance(
+            track_indices, detection_indices, only_position)
+    else:
+        measurements = np.asarray(
+            [detections[i].to_xyah() for i in detection_indices])
+        gating_distance = kf.multi_gating_distance(
+            np.stack([tracks[i].mean for i in track_indices]),
+            np.stack([tracks[i].covariance for i in track_indices]),
+            measurements, only_position)
+    cost_matrix[gating_distance > gating_threshold] = gated_cost
     return cost_matrix
@@ -96,6 +96,123 @@ def _nn_cosine_distance(x, y):
     return distances.min(axis=0)
 
 
+class FeatureGallery(object):
+    """
+    Fixed-budget feature store for many targets backed by one float32 array.
+
+    Each target owns a slot of `capacity` rows in a (slots, capacity, dim)
+    array that is used as a ring buffer, so adding a sample never copies the
+    target's history. With `normalize` set, samples are stored as unit
+    vectors so cosine distances need no per-query re-normalization. Slots of
+    targets that leave the scene are recycled; the array only grows when more
+    targets are alive at once than it has slots (or, without a budget, when a
+    target outgrows its slot).
+
+    Parameters
+    ----------
+    budget : Optional[int]
+        Maximum number of samples kept per target (oldest are overwritten).
+        If None, all samples are kept.
+    normalize : bool
+        If True, store samples normalized to unit length.
+
+    """
+
+    def __init__(self, budget=None, normalize=False, slots=16, capacity=16):
+        self.budget = budget
+        self.normalize = normalize
+        self._slots = max(1, int(slots))
+        self._capacity = int(budget) if budget else max(1, int(capacity))
+        self._data = None
+        self._count = np.zeros(self._slots, dtype=int)
+        self._head = np.zeros(self._slots, dtype=int)
+        self._slot_of = {}
+        self._free = list(range(self._slots - 1, -1, -1))
+
+    def __contains__(self, target):
+        return target in self._slot_of
+
+    def targets(self):
+        return list(self._slot_of)
+
+    def samples(self, target):
+        """The stored samples of `target` (oldest first is not guaranteed)."""
+        slot = self._slot_of[target]
+        return self._data[slot, :self._count[slot]]
+
+    def add(self, features, targets):
+        """Append an NxM matrix of features to the given N targets."""
+        features = np.asarray(features, dtype=np.float32)
+        if len(features) == 0:
+            return
+        if self.normalize:
+            features = features / np.linalg.norm(features, axis=1, keepdims=True)
+        if self._data is None:
+            self._data = np.zeros(
+                (self._slots, self._capacity, features.shape[1]), dtype=np.float32)
+
+        for feature, target in zip(features, targets):
+            slot = self._slot_of.get(target)
+            if slot is None:
+                slot = self._allocate(target)
+            head = self._head[slot]
+            if head == self._capacity:
+                if self.budget:
+                    head = 0
+                else:
+                    self._grow_capacity()
+            self._data[slot, head] = feature
+            self._head[slot] = head + 1
+            self._count[slot] = min(self._count[slot] + 1, self._capacity)
+
+    def retain(self, targets):
+        """Drop every target not in `targets` and recycle its slot."""
+        keep = set(targets)
+        for target in [t for t in self._slot_of if t not in keep]:
+            slot = self._slot_of.pop(target)
+            self._count[slot] = 0
+            self._head[slot] = 0
+            self._free.append(slot)
+
+    def gather(self, targets):
+        """Stack the samples of `targets` into one matrix.
+
+        Returns
+        -------
+        (ndarray, ndarray, ndarray)
+            The KxM matrix of all samples, the start row of each target's
+            segment, and each target's number of samples.
+
+        """
+        slots = np.array([self._slot_of.get(t, -1) for t in targets], dtype=int)
+        counts = np.where(slots >= 0, self._count[slots], 0)
+        starts = np.cumsum(counts) - counts
+        total = int(counts.sum())
+        if total == 0:
+            dim = self._data.shape[2] if self._data is not None else 0
+            return np.zeros((0, dim), dtype=np.float32), starts, counts
+        rows = np.repeat(slots * self._capacity - starts, counts) + np.arange(total)
+        flat = self._data.reshape(-1, self._data.shape[2])
+        return flat[rows], starts, counts
+
+    def _allocate(self, target):
+        if not self._free:
+            grown = np.zeros((self._slots,) + self._data.shape[1:], dtype=np.float32)
+            self._data = np.concatenate([self._data, grown])
+            self._count = np.r_[self._count, np.zeros(self._slots, dtype=int)]
+            self._head = np.r_[self._head, np.zeros(self._slots, dtype=int)]
+            self._free = list(range(2 * self._slots - 1, self._slots - 1, -1))
+            self._slots *= 2
+        slot = self._free.pop()
+        self._slot_of[target] = slot
+        return slot
+
+    def _grow_capacity(self):
+        grown = np.zeros_like(self._data)
+        self._data = np.concatenate([self._data, grown], axis=1)
+        self._capacity *= 2
+
+
 class NearestNeighborDistanceMetric(object):
     """
     A nearest neighbor distance metric that, for each target, returns
@@ -114,24 +231,26 @@ class NearestNeighborDistanceMetric(object):
 
     Attributes
     ----------
-    samples : Dict[int -> List[ndarray]]
-        A dictionary that maps from target identities to the list of samples
-        that have been observed so far.
+    gallery : FeatureGallery
+        The samples that have been observed so far for every target,
+        normalized to unit length for the cosine metric.
 
     """
 
     def __init__(self, metric, matching_threshold, budget=None):
 
-        if metric == "euclidean":
-            self._metric = _nn_euclidean_distance
-        elif metric == "cosine":
-            self._metric = _nn_cosine_distance
-        else:
+        if metric not in ("euclidean", "cosine"):
             raise ValueError(
                 "Invalid metric; must be either 'euclidean' or 'cosine'")
+        self.metric = metric
         self.matching_threshold = matching_threshold
         self.budget = budget
-        self.samples = {}
+        self.gallery = FeatureGallery(budget, normalize=(metric == "cosine"))
+
+    @property
+    def samples(self):
+        """Dict[int -> ndarray] view of the gallery (for inspection)."""
+        return {t: self.gallery.samples(t) for t in self.gallery.targets()}
 
     def partial_fit(self, features, targets, active_targets):
         """Update the distance metric with new data.
@@ -146,15 +265,15 @@ class NearestNeighborDistanceMetric(object):
             A list of targets that are currently present in the scene.
 
         """
-        for feature, target in zip(features, targets):
-            self.samples.setdefault(target, []).append(feature)
-            if self.budget is not None:
-                self.samples[target] = self.samples[target][-self.budget:]
-        self.samples = {k: self.samples[k] for k in active_targets}
+        self.gallery.add(features, targets)
+        self.gallery.retain(active_targets)
 
     def distance(self, features, targets):
         """Compute distance between features and targets.
 
+        All targets are scored with a single matrix product against the
+        gallery followed by a per-target (segmented) minimum.
+
         Parameters
         ----------
         features : ndarray
@@ -170,7 +289,23 @@ class NearestNeighborDistanceMetric(object):
             `targets[i]` and `features[j]`.
 
         """
-        cost_matrix = np.zeros((len(targets), len(features)))
-        for i, target in enumerate(targets):
-            cost_matrix[i, :] = self._metric(self.samples[target], features)
+        features = np.asarray(features, dtype=np.float32)
+        cost_matrix = np.full((len(targets), len(features)), np.inf)
+        if len(targets) == 0 or len(features) == 0:
+            return cost_matrix
+
+        samples, starts, counts = self.gallery.gather(targets)
+        if len(samples) == 0:
+            return cost_matrix
+        if self.metric == "cosine":
+            features = features / np.linalg.norm(features, axis=1, keepdims=True)
+            distances = 1. - np.dot(samples, features.T)
+        else:
+            distances = _pdist(samples, features)
+
+        present = counts > 0
+        cost_matrix[present] = np.minimum.reduceat(
+            distances, starts[present], axis=0)
+        if self.metric == "euclidean":
+            cost_matrix = np.maximum(0.0, cost_matrix)
         return cost_matrix
@@ -1,4 +1,5 @@
 # vim: expandtab:ts=4:sw=4
+import numpy as np
 
 
 class TrackState:
@@ -16,12 +17,106 @@ class TrackState:
     Deleted = 3
 
 
+class TrackStore:
+    """
+    Structure-of-arrays storage for the state of many tracks.
+
+    Every track owns one slot (row) in each column. Slots of deleted tracks
+    are recycled and the columns grow by doubling, so a frame with the usual
+    handful of tracks does not allocate per-track arrays.
+
+    Parameters
+    ----------
+    capacity : int
+        Initial number of slots.
+    ndim : int
+        Dimension of the Kalman filter state space.
+
+    Attributes
+    ----------
+    mean : ndarray
+        The Cx8 matrix of state means.
+    covariance : ndarray
+        The Cx8x8 array of state covariances.
+    track_id : ndarray
+        Track identifiers per slot.
+    hits : ndarray
+        Total number of measurement updates per slot.
+    age : ndarray
+        Total number of frames since first occurance per slot.
+    time_since_update : ndarray
+        Total number of frames since last measurement update per slot.
+    state : ndarray
+        `TrackState` value per slot.
+
+    """
+
+    __slots__ = ('mean', 'covariance', 'track_id', 'hits', 'age',
+                 'time_since_update', 'state', '_free')
+
+    def __init__(self, capacity=32, ndim=8):
+        capacity = max(1, int(capacity))
+        self.mean = np.zeros((capacity, ndim))
+        self.covariance = np.zeros((capacity, ndim, ndim))
+        self.track_id = np.zeros(capacity, dtype=int)
+        self.hits = np.zeros(capacity, dtype=int)
+        self.age = np.zeros(capacity, dtype=int)
+        self.time_since_update = np.zeros(capacity, dtype=int)
+        self.state = np.zeros(capacity, dtype=int)
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self):
+        return len(self.track_id) - len(self._free)
+
+    def allocate(self, mean, covariance, track_id):
+        """Claim a slot for a new tentative track and return its index."""
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self.mean[slot] = mean
+        self.covariance[slot] = covariance
+        self.track_id[slot] = track_id
+        self.hits[slot] = 1
+        self.age[slot] = 1
+        self.time_since_update[slot] = 0
+        self.state[slot] = TrackState.Tentative
+        return slot
+
+    def release(self, slot):
+        """Return a slot to the pool; its contents may be reused at once."""
+        self._free.append(slot)
+
+    def _grow(self):
+        capacity = len(self.track_id)
+        for name in ('mean', 'covariance', 'track_id', 'hits', 'age',
+                     'time_since_update', 'state'):
+            column = getattr(self, name)
+            grown = np.zeros((2 * capacity,) + column.shape[1:], column.dtype)
+            grown[:capacity] = column
+            setattr(self, name, grown)
+        self._free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+
+def _column(name, doc):
+    def fget(self):
+        value = getattr(self._store, name)[self._slot]
+        return value.item() if value.ndim == 0 else value
+
+    def fset(self, value):
+        getattr(self._store, name)[self._slot] = value
+    return property(fget, fset, doc=doc)
+
+
 class Track:
     """
     A single target track with state space `(x, y, a, h)` and associated
     velocities, where `(x, y)` is the center of the bounding box, `a` is the
     aspect ratio and `h` is the height.
 
+    The track is a lightweight handle onto one slot of a `TrackStore`; the
+    attributes below read and write that slot. A handle must not be used
+    after its slot has been released.
+
     Parameters
     ----------
     mean : ndarray
@@ -40,6 +135,9 @@ class Track:
     feature : Optional[ndarray]
         Feature vector of the detection this track originates from. If not None,
         this feature is added to the `features` cache.
+    store : Optional[TrackStore]
+        The store that holds the track state. If None, the track gets a
+        private store of its own.
 
     Attributes
     ----------
@@ -63,16 +161,23 @@ class Track:
 
     """
 
+    __slots__ = ('_store', '_slot', 'features', '_n_init', '_max_age')
+
+    mean = _column('mean', "Mean vector of the state distribution.")
+    covariance = _column(
+        'covariance', "Covariance matrix of the state distribution.")
+    hits = _column('hits', "Total number of measurement updates.")
+    age = _column('age', "Total number of frames since first occurance.")
+    time_since_update = _column(
+        'time_since_update',
+        "Total number of frames since last measurement update.")
+    state = _column('state', "The current track state.")
+
     def __init__(self, mean, covariance, track_id, n_init, max_age,
-                 feature=None):
-        self.mean = mean
-        self.covariance = covariance
-        self.track_id = track_id
-        self.hits = 1
-        self.age = 1
-        self.time_since_update = 0
+                 feature=None, store=None):
+        self._store = store if store is not None else TrackStore(capacity=1)
+        self._slot = self._store.allocate(mean, covariance, track_id)
 
-        self.state = TrackState.Tentative
         self.features = []
         if feature is not None:
             self.features.append(feature)
@@ -80,6 +185,16 @@ class Track:
         self._n_init = n_init
         self._max_age = max_age
 
+    @property
+    def track_id(self):
+        """A unique track identifier."""
+        return int(self._store.track_id[self._slot])
+
+    @property
+    def slot(self):
+        """Index of this track's row in its `TrackStore`."""
+        return self._slot
+
     def to_tlwh(self):
         """Get current position in bounding box format `(top left x, top left y,
         width, height)`.
@@ -126,7 +241,7 @@ class Track:
         self.mean, self.covariance = kf.predict(self.mean, self.covariance)
         self.increment_age()
 
-    def update(self, kf, detection):
+    def update(self, kf, detection, state=None):
         """Perform Kalman filter measurement update step and update the feature
         cache.
 
@@ -136,10 +251,15 @@ class Track:
             The Kalman filter.
         detection : Detection
             The associated detection.
+        state : Optional[(ndarray, ndarray)]
+            The already corrected mean and covariance, e.g. from a batched
+            `KalmanFilter.multi_update`. If None, `kf.update` is run for this
+            track alone.
 
         """
-        self.mean, self.covariance = kf.update(
-            self.mean, self.covariance, detection.to_xyah())
+        if state is None:
+            state = kf.update(self.mean, self.covariance, detection.to_xyah())
+        self.mean, self.covariance = state
         self.features.append(detection.feature)
 
         self.hits += 1
@@ -4,7 +4,8 @@ import numpy as np
 from . import kalman_filter
 from . import linear_assignment
 from . import iou_matching
-from .track import Track
+from .detection import DetectionBatch
+from .track import Track, TrackState, TrackStore
 
 
 class Tracker:
@@ -34,6 +35,11 @@ class Tracker:
         A Kalman filter to filter target trajectories in image space.
     tracks : List[Track]
         The list of active tracks at the current time step.
+    store : TrackStore
+        Column storage behind `tracks`; per-frame bookkeeping is done on its
+        arrays rather than track by track.
+    matches : List[(int, int)]
+        (track id, detection index) pairs associated in the last `update`.
 
     """
 
@@ -45,15 +51,23 @@ class Tracker:
 
         self.kf = kalman_filter.KalmanFilter()
         self.tracks = []
+        self.store = TrackStore()
+        self.matches = []
         self._next_id = 1
 
     def predict(self):
         """Propagate track state distributions one time step forward.
 
         This function should be called once every time step, before `update`.
+        All tracks are propagated in one batched Kalman filter step.
         """
-        for track in self.tracks:
-            track.predict(self.kf)
+        if not self.tracks:
+            return
+        store, slots = self.store, self._slots(self.tracks)
+        store.mean[slots], store.covariance[slots] = self.kf.multi_predict(
+            store.mean[slots], store.covariance[slots])
+        store.age[slots] += 1
+        store.time_since_update[slots] += 1
 
     def increment_ages(self):
         for track in self.tracks:
@@ -65,23 +79,56 @@ class Tracker:
 
         Parameters
         ----------
-        detections : List[deep_sort.detection.Detection]
-            A list of detections at the current time step.
+        detections : DetectionBatch | List[deep_sort.detection.Detection]
+            The detections at the current time step.
 
         """
+        if not isinstance(detections, DetectionBatch):
+            detections = DetectionBatch.from_detections(detections)
+        store = self.store
+
         # Run matching cascade.
         matches, unmatched_tracks, unmatched_detections = \
             self._match(detections)
 
-        # Update track set.
-        for track_idx, detection_idx in matches:
-            self.tracks[track_idx].update(
-                self.kf, detections[detection_idx])
-        for track_idx in unmatched_tracks:
-            self.tracks[track_idx].mark_missed()
+        self.matches = [
+            (self.tracks[track_idx].track_id, detection_idx)
+            for track_idx, detection_idx in matches]
+
+        # Update track set. Matched tracks are corrected in one batched
+        # Kalman step and their counters updated column-wise (see
+        # Track.update and Track.mark_missed for the per-track rules).
+        if matches:
+            matched_tracks = [self.tracks[i] for i, _ in matches]
+            detection_indices = np.array([j for _, j in matches])
+            slots = self._slots(matched_tracks)
+            store.mean[slots], store.covariance[slots] = self.kf.multi_update(
+                store.mean[slots], store.covariance[slots],
+                detections.to_xyah()[detection_indices])
+            store.hits[slots] += 1
+            store.time_since_update[slots] = 0
+            confirm = ((store.state[slots] == TrackState.Tentative) &
+                       (store.hits[slots] >= self.n_init))
+            store.state[slots[confirm]] = TrackState.Confirmed
+            # A reused feature (see EmbeddingCache) is already in the gallery
+            for track, detection_idx in zip(matched_tracks, detection_indices):
+                if not detections.reused[detection_idx]:
+                    track.features.append(detections.feature[detection_idx])
+        if unmatched_tracks:
+            slots = self._slots([self.tracks[i] for i in unmatched_tracks])
+            missed = ((store.state[slots] == TrackState.Tentative) |
+                      (store.time_since_update[slots] > self.max_age))
+            store.state[slots[missed]] = TrackState.Deleted
         for detection_idx in unmatched_detections:
-            self._initiate_track(detections[detection_idx])
-        self.tracks = [t for t in self.tracks if not t.is_deleted()]
+            self._initiate_track(detections[detection_idx],
+                                 detections.reused[detection_idx])
+        alive = []
+        for track in self.tracks:
+            if track.is_deleted():
+                store.release(track.slot)
+            else:
+                alive.append(track)
+        self.tracks = alive
 
         # Update distance metric.
         active_targets = [t.track_id for t in self.tracks if t.is_confirmed()]
@@ -96,28 +143,33 @@ class Tracker:
             np.asarray(features), np.asarray(targets), active_targets)
 
     def _match(self, detections):
+        # Projected track covariances and their Cholesky factors are shared
+        # by every cascade level in this frame.
+        gating_cache = linear_assignment.GatingCache(
+            self.kf, self.tracks, detections)
 
         def gated_metric(tracks, dets, track_indices, detection_indices):
-            features = np.array([dets[i].feature for i in detection_indices])
+            features = dets.feature[np.asarray(detection_indices, dtype=int)]
             targets = np.array([tracks[i].track_id for i in track_indices])
             cost_matrix = self.metric.distance(features, targets)
             cost_matrix = linear_assignment.gate_cost_matrix(
                 self.kf, cost_matrix, tracks, dets, track_indices,
-                detection_indices)
+                detection_indices, cache=gating_cache)
 
             return cost_matrix
 
         # Split track set into confirmed and unconfirmed tracks.
-        confirmed_tracks = [
-            i for i, t in enumerate(self.tracks) if t.is_confirmed()]
-        unconfirmed_tracks = [
-            i for i, t in enumerate(self.tracks) if not t.is_confirmed()]
+        confirmed = self.store.state[self._slots(self.tracks)] == \
+            TrackState.Confirmed
+        confirmed_tracks = np.flatnonzero(confirmed).tolist()
+        unconfirmed_tracks = np.flatnonzero(~confirmed).tolist()
 
-        # Associate confirmed tracks using appearance features.
+        # Associate confirmed tracks using appearance features. The gated
+        # cost matrix is computed once and sliced per cascade level.
         matches_a, unmatched_tracks_a, unmatched_detections = \
             linear_assignment.matching_cascade(
                 gated_metric, self.metric.matching_threshold, self.max_age,
-                self.tracks, detections, confirmed_tracks)
+                self.tracks, detections, confirmed_tracks, precompute=True)
 
         # Associate remaining tracks together with unconfirmed tracks using IOU.
         iou_track_candidates = unconfirmed_tracks + [
@@ -135,9 +187,16 @@ class Tracker:
         unmatched_tracks = list(set(unmatched_tracks_a + unmatched_tracks_b))
         return matches, unmatched_tracks, unmatched_detections
 
-    def _initiate_track(self, detection):
+    def _initiate_track(self, detection, reused=False):
+        # A reused feature belongs to the track it was cached for; the new
+        # track starts with an empty gallery and gets a computed one instead
         mean, covariance = self.kf.initiate(detection.to_xyah())
         self.tracks.append(Track(
             mean, covariance, self._next_id, self.n_init, self.max_age,
-            detection.feature))
+            None if reused else detection.feature, store=self.store))
         self._next_id += 1
+
+    @staticmethod
+    def _slots(tracks):
+        return np.fromiter((t.slot for t in tracks), dtype=int,
+                           count=len(tracks))
@@ -0,0 +1,138 @@
+"""Export the person detector and the DeepSort ReID net for the CPU runtimes
+
+    python export_models.py                      # ONNX + TorchScript for both
+    python export_models.py --formats onnx --check
+
+Exported files are written next to the weights (yolov8n.onnx,
+deep_sort/deep/checkpoint/ckpt.onnx, ...) where the registry and the ReID
+extractor look for them when CV_DETECTOR_BACKEND / DEEPSORT_REID_BACKEND
+ask for that backend. --check compares each export against eager PyTorch.
+"""
+import argparse
+import os
+
+import numpy as np
+
+CV_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CKPT = os.path.join(CV_DIR, 'deep_sort', 'deep', 'checkpoint', 'ckpt.t7')
+FORMATS = ("onnx", "torchscript")
+
+
+def load_reid(ckpt):
+    import torch
+    from deep_sort.deep.model import Net
+
+    net = Net(reid=True)
+    net.load_state_dict(torch.load(ckpt, map_location="cpu")['net_dict'])
+    return net.eval()
+
+
+def export_reid(ckpt, formats):
+    from deep_sort.deep.backends import export_net
+
+    for path in export_net(load_reid(ckpt), ckpt, formats):
+        print(f"[export] ReID -> {path}")
+
+
+def export_detector(name, imgsz, formats):
+    from ultralytics import YOLO
+
+    for fmt in formats:
+        # ONNX gets a dynamic batch so the inference scheduler can batch cameras.
+        # TorchScript is traced at batch 1 and this imgsz: the scheduler runs it
+        # one frame per pass and the registry only loads it for the same imgsz
+        path = YOLO(name).export(format=fmt, imgsz=imgsz, dynamic=fmt == "onnx")
+        print(f"[export] Detector -> {path}")
+
+
+def check_reid(ckpt, formats, batch=8):
+    """Max abs difference and min cosine similarity of ReID features vs eager"""
+    import torch
+    from deep_sort.deep.backends import INPUT_SHAPE, load_exported
+
+    net = load_reid(ckpt)
+    x = torch.randn((batch,) + INPUT_SHAPE)
+    with torch.inference_mode():
+        expected = net(x).numpy()
+    ok = True
+    for fmt in formats:
+        exported = load_exported(ckpt, fmt)
+        if exported is None:
+            print(f"[check] ReID {fmt}: not loadable")
+            ok = False
+            continue
+        with torch.inference_mode():
+            got = exported(x).numpy()
+        diff = float(np.abs(got - expected).max())
+        cos = float((got * expected).sum(axis=1).min())  # features are L2-normalised
+        passed = diff < 1e-3 and cos > 0.9999
+        ok &= passed
+        print(f"[check] ReID {fmt}: max abs diff {diff:.2e}, min cosine {cos:.6f} {'OK' if passed else 'FAIL'}")
+    return ok
+
+
+def check_detector(name, imgsz, formats, image=None):
+    """Compare detections of each export with eager on one frame"""
+    import cv2
+    from tracking.inference import to_detections
+    from tracking.models import ModelRegistry
+    from ultralytics import YOLO
+
+    frame = cv2.imread(image) if image else np.random.default_rng(0).integers(
+        0, 256, (imgsz, imgsz, 3), dtype=np.uint8)
+
+    def detect(model_name):
+        result = YOLO(model_name, task="detect").predict(
+            source=frame, imgsz=imgsz, conf=0.25, classes=[0], verbose=False)[0]
+        return to_detections(result)
+
+    expected_boxes, expected_conf = detect(name)
+    ok = True
+    for fmt in formats:
+        path = ModelRegistry.resolve(name, fmt, imgsz)
+        if path == name:
+            print(f"[check] Detector {fmt}: not loadable")
+            ok = False
+            continue
+        boxes, conf = detect(path)
+        if len(boxes) != len(expected_boxes):
+            print(f"[check] Detector {fmt}: {len(boxes)} boxes vs {len(expected_boxes)} eager FAIL")
+            ok = False
+            continue
+        box_diff = float(np.abs(boxes - expected_boxes).max()) if len(boxes) else 0.0
+        conf_diff = float(np.abs(conf - expected_conf).max()) if len(conf) else 0.0
+        passed = box_diff < 1.0 and conf_diff < 0.01
+        ok &= passed
+        print(f"[check] Detector {fmt}: {len(boxes)} boxes, max box diff {box_diff:.3f}px, "
+              f"max conf diff {conf_diff:.4f} {'OK' if passed else 'FAIL'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export detector and ReID models")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--detector", default="yolov8n.pt")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--reid-ckpt", default=os.getenv("DEEPSORT_REID_CKPT", DEFAULT_CKPT))
+    parser.add_argument("--skip-detector", action="store_true")
+    parser.add_argument("--skip-reid", action="store_true")
+    parser.add_argument("--check", action="store_true", help="compare exports with eager PyTorch")
+    parser.add_argument("--image", default=None, help="frame used by the detector check")
+    args = parser.parse_args()
+
+    if not args.skip_reid:
+        export_reid(args.reid_ckpt, args.formats)
+    if not args.skip_detector:
+        export_detector(args.detector, args.imgsz, args.formats)
+
+    if args.check:
+        ok = True
+        if not args.skip_reid:
+            ok &= check_reid(args.reid_ckpt, args.formats)
+        if not args.skip_detector:
+            ok &= check_detector(args.detector, args.imgsz, args.formats, args.image)
+        raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from scipy.optimize import linear_sum_assignment
+
+pytest.importorskip("torch")  # deep_sort/__init__ imports the ReID extractor
+
+from deep_sort.sort.assignment import solve  # noqa: E402
+
+MAX_DISTANCE = 0.5
+
+
+def reference(cost, max_distance):
+    """Full linear_sum_assignment with gated entries clamped, gated pairs rejected"""
+    rows, cols = linear_sum_assignment(np.minimum(cost, max_distance + 1e-5))
+    keep = cost[rows, cols] <= max_distance
+    return rows[keep], cols[keep]
+
+
+def total(cost, rows, cols):
+    return cost[rows, cols].sum()
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (1, 6), (6, 1), (5, 5), (8, 12), (12, 8), (30, 30)])
+@pytest.mark.parametrize("density", [0.05, 0.3, 1.0])
+def test_matches_full_linear_sum_assignment(shape, density):
+    rng = np.random.default_rng(shape[0] * 100 + shape[1])
+    cost = rng.uniform(0, 1, shape)
+    cost[rng.uniform(size=shape) > density] = 1e5  # gated out
+    rows, cols, unmatched_rows, unmatched_cols = solve(cost, MAX_DISTANCE)
+    want_rows, want_cols = reference(cost, MAX_DISTANCE)
+    assert len(rows) == len(want_rows)
+    assert total(cost, rows, cols) == pytest.approx(total(cost, want_rows, want_cols))
+    assert (cost[rows, cols] <= MAX_DISTANCE).all()
+    assert list(rows) == sorted(rows) and len(set(cols)) == len(cols)
+    assert not unmatched_rows[rows].any() and unmatched_rows.sum() == shape[0] - len(rows)
+    assert not unmatched_cols[cols].any() and unmatched_cols.sum() == shape[1] - len(cols)
+
+
+def test_input_is_not_modified():
+    cost = np.array([[0.1, 0.9], [0.8, 0.2]])
+    before = cost.copy()
+    solve(cost, MAX_DISTANCE)
+    np.testing.assert_array_equal(cost, before)
+
+
+def test_empty_and_fully_gated():
+    rows, cols, unmatched_rows, unmatched_cols = solve(np.zeros((0, 3)), MAX_DISTANCE)
+    assert len(rows) == 0 and unmatched_cols.all()
+    rows, cols, unmatched_rows, unmatched_cols = solve(np.ones((3, 3)), MAX_DISTANCE)
+    assert len(rows) == 0 and unmatched_rows.all() and unmatched_cols.all()
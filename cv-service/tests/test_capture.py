@@ -0,0 +1,115 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from tracking.capture import FrameGrabber, FrameSampler
+
+FRAMES = 100
+
+
+@pytest.fixture
+def video(tmp_path):
+    """25 fps clip whose frame n (1-based) is filled with grey level 2n"""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for n in range(1, FRAMES + 1):
+        writer.write(np.full((48, 64, 3), 2 * n, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def sample(path, mode, stride, **kwargs):
+    cap = cv2.VideoCapture(path)
+    sampler = FrameSampler(cap, mode=mode, stride=stride, fps=25.0, **kwargs)
+    frames = []
+    while (item := sampler.read()) is not None:
+        frames.append(item)
+    cap.release()
+    return sampler, frames
+
+
+@pytest.mark.parametrize("mode", FrameSampler.MODES)
+def test_indices_match_the_frames_read(video, mode):
+    sampler, frames = sample(video, mode, 12, seek_min_gap_s=0.2)
+    indices = [index for _, index, _ in frames]
+    expected = list(range(1, FRAMES + 1)) if mode == "decode" else list(range(1, FRAMES + 1, 12))
+    assert indices == expected
+    for frame, index, pts_ms in frames:
+        assert abs(int(frame.mean()) - 2 * index) <= 3
+        assert pts_ms == pytest.approx((index - 1) * 40.0, abs=1.0)
+
+
+def test_grab_retrieves_only_sampled_frames(video):
+    sampler, frames = sample(video, "grab", 10)
+    stats = sampler.stats()
+    assert sampler.frames_retrieved == len(frames) == 10
+    assert stats["decode_savings"] == pytest.approx(0.9)
+    assert stats["seek_savings"] == 0.0
+
+
+def test_seek_jumps_long_gaps(video):
+    sampler, frames = sample(video, "seek", 25, seek_min_gap_s=0.5)
+    assert [index for _, index, _ in frames] == [1, 26, 51, 76]
+    assert sampler.frames_seeked > 0
+
+
+def test_stride_can_change_while_reading(video):
+    stride = iter([1, 1, 5, 5, 5] + [20] * 20)
+    sampler, frames = sample(video, "grab", lambda: next(stride))
+    assert [index for _, index, _ in frames][:6] == [1, 2, 3, 8, 13, 18]
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        FrameSampler(None, mode="skip")
+
+
+def drain(grabber, delay=0.0):
+    items = []
+    grabber.start()
+    try:
+        while True:
+            item = grabber.read(timeout=1.0)
+            if item is None:
+                if grabber.finished:
+                    break
+                continue
+            items.append(item)
+            time.sleep(delay)
+    finally:
+        grabber.stop()
+    return items
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("decode", list(range(1, FRAMES + 1))),
+    ("grab", list(range(1, FRAMES + 1, 7))),
+    ("seek", list(range(1, FRAMES + 1, 7))),
+])
+def test_file_grabber_delivers_every_sampled_frame_in_order(video, mode, expected):
+    cap = cv2.VideoCapture(video)
+    grabber = FrameGrabber(cap, "test", capacity=2, live=False,
+                           sampler=FrameSampler(cap, mode, stride=7, fps=25.0, seek_min_gap_s=0.2))
+    items = drain(grabber, delay=0.001)
+    assert [index for _, index, _, _ in items] == expected
+    for frame, index, _, _ in items:
+        assert abs(int(frame.mean()) - 2 * index) <= 3
+    assert grabber.frames_dropped == 0 and grabber.finished
+
+
+@pytest.mark.parametrize("mode", ["decode", "grab"])
+def test_live_grabber_hands_out_the_newest_frame(video, mode):
+    cap = cv2.VideoCapture(video)
+    grabber = FrameGrabber(cap, "test", capacity=2, live=True,
+                           sampler=FrameSampler(cap, mode, stride=3, fps=25.0))
+    items = drain(grabber, delay=0.02)  # slower than the source: frames get dropped
+    indices = [index for _, index, _, _ in items]
+    assert indices == sorted(set(indices))
+    assert grabber.frames_dropped > 0
+    assert grabber.frames_read == len(items) + grabber.frames_dropped
+    if mode == "grab":
+        assert all((index - 1) % 3 == 0 for index in indices)
+    for frame, index, _, _ in items:
+        assert abs(int(frame.mean()) - 2 * index) <= 3
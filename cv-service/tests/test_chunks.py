@@ -0,0 +1,110 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from tracking.chunks import ChunkedVideoJob, _keyframes_from_packets, _SegmentTracker, plan_segments, stitch
+from tracking.worker import SimpleHumanTracker
+
+
+def test_keyframes_are_relative_to_the_stream_start():
+    # start_time 1.4 s, B-frames: the first packet in decode order is not the earliest pts
+    out = "1.480000,K__\n1.400000,___\n1.440000,___\n3.480000,K__\n3.400000,___\nN/A,K__\n"
+    assert _keyframes_from_packets(out) == pytest.approx([0.08, 2.08])
+
+
+def test_no_packets_no_keyframes():
+    assert _keyframes_from_packets("") == []
+
+
+def test_plan_segments_covers_the_file_once():
+    segments = plan_segments(9000, 25.0, 4)
+    assert len(segments) == 4
+    counted = [(count_from, last) for _, last, count_from in segments]
+    assert counted[0][0] == 1 and counted[-1][1] == 9000
+    for (_, last), (first, _) in zip(counted, counted[1:]):
+        assert first == last + 1
+
+
+def test_plan_segments_overlap_and_keyframes():
+    keyframes = [i * 2.0 for i in range(0, 180)]  # keyframe every 2 s -> frames 1, 51, 101, ...
+    segments = plan_segments(9000, 25.0, 2, keyframes, overlap_s=2.0)
+    (start0, last0, from0), (start1, last1, from1) = segments
+    assert (start0, from0) == (1, 1)
+    assert from1 == last0 + 1 and (from1 - 1) % 50 == 0  # cut on a keyframe
+    assert start1 < from1 and (start1 - 1) % 50 == 0  # warm-up starts on a keyframe
+    assert last1 == 9000
+
+
+def test_plan_segments_respects_min_segment_length():
+    assert plan_segments(25 * 40, 25.0, 8, min_segment_s=30.0) == [(1, 1000, 1)]
+
+
+def test_stitch_maps_head_ids_to_tail_ids():
+    tail = {f: [(7, 10 + f, 10, 50 + f, 90), (8, 200, 10, 240, 90)] for f in range(100, 110)}
+    head = {f: [(1, 200, 10, 240, 90), (2, 10 + f, 10, 50 + f, 90), (3, 400, 10, 440, 90)]
+            for f in range(100, 110)}
+    assert stitch(tail, head) == {1: 8, 2: 7}
+
+
+def test_stitch_ignores_distant_frames():
+    assert stitch({1: [(1, 0, 0, 10, 10)]}, {100: [(2, 0, 0, 10, 10)]}, max_gap=12) == {}
+
+
+def test_processes_from_environment(monkeypatch):
+    monkeypatch.setenv("CV_MP4_PROCESSES", "3")
+    assert ChunkedVideoJob("cam", "x.mp4").processes == 3
+    assert ChunkedVideoJob("cam", "x.mp4", processes=2).processes == 2
+    monkeypatch.setenv("CV_MP4_PROCESSES", "0")
+    assert ChunkedVideoJob("cam", "x.mp4").processes == (os.cpu_count() or 1)
+    monkeypatch.delenv("CV_MP4_PROCESSES")
+    assert ChunkedVideoJob("cam", "x.mp4").processes == (os.cpu_count() or 1)
+
+
+class Registry:
+    def acquire(self, name, imgsz=640, device=None, backend="eager"):
+        return object()
+
+    def release(self, entry):
+        pass
+
+
+class Scheduler:
+    """Finds one person on every frame, in-process"""
+    running = True
+
+    def register(self, camera_id):
+        pass
+
+    def unregister(self, camera_id):
+        pass
+
+    def infer(self, *args, **kwargs):
+        return np.array([[10, 10, 50, 100]], dtype=np.float32), np.array([0.9], dtype=np.float32)
+
+
+def analyse(tracker):
+    tracker.start()
+    tracker.processing_thread.join(timeout=60)
+    return tracker
+
+
+def test_segments_count_each_frame_once(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for i in range(250):
+        writer.write(np.full((48, 64, 3), i % 256, dtype=np.uint8))
+    writer.release()
+    options = dict(file_path=path, registry=Registry(), scheduler=Scheduler(), batched=True, record="off")
+
+    single = analyse(SimpleHumanTracker("cam", **options))
+    segments = plan_segments(250, 25.0, 3, overlap_s=2.0, min_segment_s=1.0)
+    assert len(segments) == 3 and segments[1][0] < segments[1][2]  # with warm-up overlap
+    total = 0
+    for i, segment in enumerate(segments):
+        tail_from = segments[i + 1][0] if i + 1 < len(segments) else None
+        result = analyse(_SegmentTracker(i, tail_from, camera_id=f"cam/{i}", segment=segment, **options)).result()
+        total += result["total_frames_processed"]
+    assert single.total_frames_processed == 246  # frames 1-4 are startup frames
+    assert total == single.total_frames_processed
@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from tracking.clock import VideoClock
+
+
+def test_file_time_follows_the_presentation_timestamp():
+    clock = VideoClock(fps=25.0, live=False, origin_ms=1_000_000)
+    clock.advance(51, pts_ms=2040.0)
+    assert clock.now() == pytest.approx(2.04)
+    assert clock.ts_ms() == 1_002_040
+    assert clock.ts_ms(video_s=10.0) == 1_010_000
+    assert clock.stats() == {"video_s": 2.04}
+
+
+@pytest.mark.parametrize("pts_ms", [None, float("nan"), 0.0])
+def test_missing_timestamps_fall_back_to_the_frame_index(pts_ms):
+    clock = VideoClock(fps=25.0, live=False, origin_ms=0)
+    clock.advance(26, pts_ms)
+    assert clock.now() == pytest.approx(1.0)
+
+
+def test_first_frame_may_have_a_zero_timestamp():
+    clock = VideoClock(fps=25.0, live=False, origin_ms=0)
+    clock.advance(1, 0.0)
+    assert clock.now() == 0.0
+
+
+@pytest.mark.parametrize("fps", [0, None, float("nan"), -5])
+def test_invalid_fps_defaults_to_25(fps):
+    assert VideoClock(fps=fps).fps == 25.0
+
+
+def test_live_sources_run_on_wall_clock_time():
+    clock = VideoClock(fps=25.0, live=True)
+    clock.advance(1000, pts_ms=40_000.0)
+    assert clock.now() == pytest.approx(time.time(), abs=1.0)
+    assert clock.ts_ms() == pytest.approx(time.time() * 1000, abs=1000)
+    assert clock.stats() == {}
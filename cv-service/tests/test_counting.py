@@ -0,0 +1,62 @@
+import pytest
+
+from tracking.counting import LineCounter, ZoneCounter, foot_point
+
+# Horizontal line from x=100 to x=300 at y=200; walking down the image crosses it left to right
+LINE = ((100, 200), (300, 200))
+
+
+def walk(counter, track_id, ys, x=200.0, count=True):
+    return [counter.update(track_id, (x, y), count=count) for y in ys]
+
+
+def test_crossing_in_and_out():
+    counter = LineCounter(LINE)
+    assert walk(counter, 1, [150, 180, 220, 250]) == [None, None, "enter", None]
+    assert walk(counter, 1, [210, 190, 150]) == [None, "exit", None]
+    assert (counter.count_in, counter.count_out) == (1, 1)
+
+
+def test_jitter_on_the_line_is_not_counted():
+    counter = LineCounter(LINE, margin=5.0)
+    events = walk(counter, 1, [180, 198, 203, 197, 202, 199, 204, 180])
+    assert events == [None] * 8
+    assert (counter.count_in, counter.count_out) == (0, 0)
+
+
+def test_stepping_through_the_band_counts_once():
+    counter = LineCounter(LINE, margin=5.0)
+    assert walk(counter, 1, [180, 200, 199, 201, 230]) == [None, None, None, None, "enter"]
+
+
+def test_crossing_beside_the_segment_is_not_counted():
+    counter = LineCounter(LINE)
+    assert walk(counter, 1, [150, 250], x=400.0) == [None, None]
+
+
+def test_warm_up_positions_are_recorded_but_not_counted():
+    counter = LineCounter(LINE)
+    walk(counter, 1, [150, 250], count=False)
+    assert walk(counter, 1, [260]) == [None]
+    assert walk(counter, 1, [150]) == ["exit"]
+
+
+def test_tracks_are_counted_independently_and_forgotten():
+    counter = LineCounter(LINE)
+    walk(counter, 1, [150])
+    walk(counter, 2, [250])
+    counter.forget({2})
+    assert walk(counter, 1, [250]) == [None]  # track 1 starts over
+    assert walk(counter, 2, [150]) == ["exit"]
+
+
+@pytest.mark.parametrize("point, inside", [((50, 50), True), ((0, 0), True), ((150, 50), False)])
+def test_zone_contains(point, inside):
+    assert ZoneCounter([(0, 0), (100, 0), (100, 100), (0, 100)]).contains(point) is inside
+
+
+def test_zone_occupancy_counts_foot_points():
+    zone = ZoneCounter([(0, 0), (100, 0), (100, 100), (0, 100)])
+    boxes = [(10, 10, 30, 90), (40, 50, 60, 150), (120, 10, 140, 90)]  # the second stands below the zone
+    assert zone.count([foot_point(*box) for box in boxes]) == 1
+    assert foot_point(10, 10, 30, 90) == (20.0, 90.0)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")  # deep_sort imports torch for its ReID extractor
+
+from deep_sort.deep_sort import DeepSort  # noqa: E402
+from deep_sort.embedding_cache import EmbeddingCache  # noqa: E402
+from deep_sort.sort.nn_matching import NearestNeighborDistanceMetric  # noqa: E402
+from deep_sort.sort.tracker import Tracker  # noqa: E402
+
+
+class Extractor:
+    """Random unit features; counts the crops it embeds"""
+
+    def __init__(self):
+        self.rng = np.random.default_rng(0)
+        self.crops = 0
+
+    def __call__(self, crops):
+        self.crops += len(crops)
+        features = self.rng.normal(size=(len(crops), 16)).astype(np.float32)
+        return features / np.linalg.norm(features, axis=1, keepdims=True)
+
+
+def deep_sort(reuse=True):
+    ds = DeepSort.__new__(DeepSort)
+    ds.min_confidence = 0.3
+    ds.extractor = Extractor()
+    ds.embedding_cache = EmbeddingCache() if reuse else None
+    ds.tracker = Tracker(NearestNeighborDistanceMetric("cosine", 0.2, 100), n_init=1)
+    return ds
+
+
+def test_reused_embeddings_are_not_added_to_the_gallery():
+    ds = deep_sort()
+    frame = np.random.default_rng(1).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    boxes = np.array([[100.0, 120.0, 40.0, 100.0]])  # xc, yc, w, h
+    for _ in range(5):
+        ds.update(boxes, [0.9], frame)
+    (track,) = ds.tracker.tracks
+    # frame 1 starts the track, frame 2 fills the cache, frames 3-5 reuse it
+    assert ds.extractor.crops == 2 and ds.embedding_cache.hits == 3
+    assert len(ds.tracker.metric.samples[track.track_id]) == 2
+
+
+def test_computed_embeddings_are_added_to_the_gallery():
+    ds = deep_sort(reuse=False)
+    frame = np.random.default_rng(1).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    boxes = np.array([[100.0, 120.0, 40.0, 100.0]])
+    for _ in range(5):
+        ds.update(boxes, [0.9], frame)
+    (track,) = ds.tracker.tracks
+    assert len(ds.tracker.metric.samples[track.track_id]) == 5
+
+
+def test_new_tracks_never_start_from_a_reused_embedding():
+    from deep_sort.sort.detection import DetectionBatch
+
+    tracker = Tracker(NearestNeighborDistanceMetric("cosine", 0.2, 100), n_init=1)
+    feature = np.ones((2, 16), dtype=np.float32)
+    tracker.predict()
+    tracker.update(DetectionBatch([[0, 0, 40, 100], [300, 0, 40, 100]], [0.9, 0.9], feature,
+                                  reused=[True, False]))
+    first, second = tracker.tracks
+    assert first.features == [] and len(second.features) == 1
+
+
+def test_cached_feature_is_not_handed_to_another_track():
+    cache = EmbeddingCache(iou_threshold=0.5)
+    crop = np.full((100, 40, 3), 120, dtype=np.uint8)
+    box = np.array([[0.0, 0.0, 40.0, 100.0]])
+    feature = np.ones((1, 16), dtype=np.float32)
+
+    cache.lookup(box, [crop])
+    cache.store([(1, 0)], box, feature, active_ids=[1])
+    assert cache.lookup(box, [crop])[0] is not None
+    # the matcher gave the detection to track 2: track 1's feature must not be cached for it
+    cache.store([(2, 0)], box, feature, active_ids=[2])
+    assert cache.lookup(box, [crop]) == [None]
@@ -0,0 +1,165 @@
+import json
+import shutil
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+import pytest
+
+from tracking.emitter import WebhookEmitter
+from tracking.signing import canonical_bytes, sign_bytes
+
+CV_INGEST = Path(__file__).resolve().parents[2] / "utils" / "cvIngest.js"
+
+
+@pytest.fixture
+def webhook():
+    """Local webhook that records the bodies it receives"""
+    bodies = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            bodies.append(self.rfile.read(int(self.headers["Content-Length"])))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/", bodies
+    server.shutdown()
+
+
+def test_events_are_batched_and_signed(webhook):
+    url, bodies = webhook
+    emitter = WebhookEmitter(flush_interval_ms=100)
+    events = [{"cameraId": "cam", "type": "enter", "data": {"n": i}} for i in range(3)]
+    for event in events:
+        emitter.emit(url, event, "s")
+    emitter.stop()
+    assert len(bodies) == 1 and emitter.stats()["events_sent"] == 3
+    body = json.loads(bodies[0])
+    sig = body.pop("sig")
+    assert body == {"events": events}
+    assert sig == sign_bytes("s", canonical_bytes(body))
+
+
+def test_emit_after_stop_does_not_restart_the_sender(webhook):
+    url, bodies = webhook
+    emitter = WebhookEmitter(flush_interval_ms=0)
+    emitter.start()
+    emitter.stop()
+    emitter.emit(url, {"type": "late"}, "s")
+    assert not emitter.running and emitter._thread is None
+    assert emitter.stats()["events_dropped"] == 1 and emitter.stats()["queued"] == 0
+
+    emitter.start()
+    emitter.emit(url, {"type": "again"}, "s")
+    emitter.stop()
+    assert [json.loads(b)["type"] for b in bodies] == ["again"]
+
+
+def test_full_queue_drops_the_oldest_event():
+    emitter = WebhookEmitter(max_queue=2)
+    emitter.running = True  # queue only, no sender thread
+    for i in range(3):
+        emitter.emit("http://unused/", {"n": i})
+    assert [event["n"] for _, _, event, _ in emitter._queue] == [1, 2]
+    assert emitter.events_dropped == 1
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def partial_webhook():
+    """Webhook that stores events and fails each event marked "flaky" (5xx) or "unknown" (4xx) once"""
+    stored, failed_once = [], set()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            events = body.get("events", [body])
+            results = []
+            for event in events:
+                kind = event["data"].get("kind")
+                if kind == "unknown":
+                    results.append({"ok": False, "status": 400})
+                elif kind == "flaky" and event["data"]["n"] not in failed_once:
+                    failed_once.add(event["data"]["n"])
+                    results.append({"ok": False, "status": 500})
+                else:
+                    stored.append(event["data"]["n"])
+                    results.append({"ok": True})
+            stored_any = any(r["ok"] for r in results)
+            status = 200 if all(r["ok"] for r in results) else 207 if stored_any else results[0]["status"]
+            payload = json.dumps({"results": results}).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/", stored
+    server.shutdown()
+
+
+def test_partly_stored_batch_is_not_resent(partial_webhook):
+    url, stored = partial_webhook
+    emitter = WebhookEmitter(flush_interval_ms=100, backoff_s=0.01)
+    kinds = [None, "flaky", None, "unknown", "flaky"]
+    for n, kind in enumerate(kinds):
+        emitter.emit(url, {"type": "enter", "data": {"n": n, "kind": kind}}, "s")
+    wait_for(lambda: emitter.events_sent + emitter.events_failed == len(kinds))
+    emitter.stop()
+    assert sorted(stored) == [0, 1, 2, 4]  # every stored event exactly once
+    stats = emitter.stats()
+    assert stats["events_sent"] == 4 and stats["events_failed"] == 1 and stats["retries"] == 1
+
+
+def test_unreadable_partial_answer_is_not_resent(partial_webhook, monkeypatch):
+    url, stored = partial_webhook
+    emitter = WebhookEmitter(flush_interval_ms=100, backoff_s=0.01)
+    monkeypatch.setattr("requests.Response.json", lambda self: {})
+    for n in range(3):
+        emitter.emit(url, {"type": "enter", "data": {"n": n, "kind": "flaky" if n == 1 else None}}, "s")
+    emitter.stop()
+    assert sorted(stored) == [0, 2] and emitter.stats()["events_failed"] == 3
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+@pytest.mark.parametrize("kinds, status", [
+    ([None, None], 200), ([None, "flaky", "unknown"], 207), (["flaky", "unknown"], 500), (["unknown"], 400),
+])
+def test_node_batch_results(kinds, status):
+    # utils/cvIngest.js as used by the cv-events and mp4-events routes
+    script = (
+        "const { ingestAll, batchStatus } = require(process.argv[1]);"
+        "const kinds = JSON.parse(process.argv[2]);"
+        "const ingest = async (kind) => {"
+        "  if (kind === 'unknown') { const e = new Error('MP4 file not found'); e.status = 400; throw e; }"
+        "  if (kind === 'flaky') throw new Error('connection reset');"
+        "  return { id: 'x' };"
+        "};"
+        "ingestAll(kinds, ingest).then(results => process.stdout.write("
+        "  JSON.stringify({ status: batchStatus(results), results })));"
+    )
+    out = subprocess.run(["node", "-e", script, str(CV_INGEST), json.dumps(kinds)],
+                         capture_output=True, check=True, text=True)
+    result = json.loads(out.stdout)
+    assert result["status"] == status
+    assert [r["ok"] for r in result["results"]] == [k is None for k in kinds]
+    assert [r.get("status") for r in result["results"]] == [
+        None if k is None else 400 if k == "unknown" else 500 for k in kinds]
@@ -0,0 +1,62 @@
+"""Parity of exported detectors with eager PyTorch, through the batching scheduler
+
+Needs ultralytics (and downloads yolov8n.pt); skipped otherwise.
+"""
+import importlib.util
+import shutil
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from export_models import check_detector, export_detector  # noqa: E402
+from tracking.inference import InferenceScheduler  # noqa: E402
+from tracking.models import ModelRegistry  # noqa: E402
+
+IMGSZ = 320
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    from ultralytics import YOLO
+
+    workdir = tmp_path_factory.mktemp("export")
+    weights = workdir / "yolov8n.pt"
+    shutil.copy(YOLO("yolov8n.pt").ckpt_path, weights)
+    formats = ["torchscript"] + (["onnx"] if importlib.util.find_spec("onnxruntime") else [])
+    export_detector(str(weights), IMGSZ, formats)
+    return str(weights), formats
+
+
+def test_exports_match_eager(exported):
+    weights, formats = exported
+    assert check_detector(weights, IMGSZ, formats)
+
+
+def test_batched_exports_match_eager(exported):
+    weights, formats = exported
+    registry = ModelRegistry(warmup=False)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (IMGSZ, IMGSZ, 3), dtype=np.uint8) for _ in range(3)]
+    eager = registry.acquire(weights, imgsz=IMGSZ)
+    expected = [eager.predict(source=f, conf=0.25, classes=[0], verbose=False)[0] for f in frames]
+
+    for fmt in formats:
+        model = registry.acquire(weights, imgsz=IMGSZ, backend=fmt)
+        assert model.name != weights
+        scheduler = InferenceScheduler(max_batch_size=8, max_wait_ms=500)
+        scheduler.start()
+        try:
+            cameras = [f"cam{i}" for i in range(len(frames))]
+            for camera_id in cameras:
+                scheduler.register(camera_id)
+            futures = [scheduler.submit(c, f, model, conf=0.25) for c, f in zip(cameras, frames)]
+            results = [future.result(timeout=60) for future in futures]
+        finally:
+            scheduler.stop()
+        for (boxes, conf), want in zip(results, expected):
+            want_boxes = want.boxes.xyxy.cpu().numpy()
+            assert len(boxes) == len(want_boxes)
+            if len(boxes):
+                assert np.abs(boxes - want_boxes).max() < 1.0
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")  # deep_sort/__init__ imports the ReID extractor
+transforms = pytest.importorskip("torchvision.transforms")
+
+from deep_sort.deep.feature_extractor import Extractor  # noqa: E402
+
+# One uint8 intensity level after normalization (the largest 1 / (255 * std))
+ONE_LEVEL = 1. / (255. * 0.225)
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setattr(Extractor, "_load_eager", lambda self, *args: None)
+    return Extractor("unused.t7", use_cuda=False)
+
+
+def per_crop(im_crops, size=(64, 128)):
+    """The preprocessing as it was: float resize, ToTensor and Normalize per crop, then cat"""
+    norm = transforms.Compose([
+        transforms.ToTensor(),
+        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225]),
+    ])
+    return torch.cat([norm(cv2.resize(im.astype(np.float32) / 255., size)).unsqueeze(0)
+                      for im in im_crops], dim=0).float()
+
+
+def crops(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # smaller and larger than 64x128, and one exactly that size
+    shapes = [(int(rng.integers(20, 400)), int(rng.integers(10, 200))) for _ in range(n - 1)]
+    return [rng.integers(0, 256, shape + (3,), dtype=np.uint8) for shape in shapes + [(128, 64)]]
+
+
+def test_matches_the_per_crop_path(extractor):
+    im_crops = crops(9)
+    got = extractor._preprocess(im_crops).numpy()
+    expected = per_crop(im_crops).numpy()
+    assert got.shape == expected.shape == (9, 3, 128, 64) and got.dtype == np.float32
+    # uint8 resizing rounds to whole intensity levels
+    np.testing.assert_allclose(got, expected, atol=ONE_LEVEL + 1e-5)
+    assert np.abs(got - expected).mean() < ONE_LEVEL / 2
+    # a crop that needs no resizing comes out exactly as before
+    np.testing.assert_allclose(got[-1], expected[-1], atol=1e-5)
+
+
+def test_buffers_are_reused_and_grow(extractor):
+    extractor._preprocess(crops(9))
+    buffer = extractor._batch
+    for n in (1, 5, 9):
+        im_crops = crops(n, seed=n)
+        got = extractor._preprocess(im_crops).numpy()
+        assert extractor._batch is buffer and np.shares_memory(got, buffer)
+        np.testing.assert_allclose(got, per_crop(im_crops).numpy(), atol=ONE_LEVEL + 1e-5)
+    im_crops = crops(20)
+    got = extractor._preprocess(im_crops).numpy()
+    assert len(extractor._batch) >= 20 and got.shape[0] == 20
+    np.testing.assert_allclose(got, per_crop(im_crops).numpy(), atol=ONE_LEVEL + 1e-5)
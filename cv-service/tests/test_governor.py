@@ -0,0 +1,38 @@
+import pytest
+
+from tracking.governor import FrameRateGovernor
+
+
+def test_fixed_stride():
+    g = FrameRateGovernor(frame_skip=3)
+    assert [i for i in range(1, 11) if g.should_process(i)] == [1, 4, 7, 10]
+
+
+def test_sample_fps_raises_the_stride():
+    g = FrameRateGovernor(frame_skip=1, source_fps=25.0, sample_fps=2)
+    assert g.skip == 12 and g.analysis_fps() == pytest.approx(25 / 12)
+
+
+def test_cpu_budget_raises_the_stride():
+    # 80 ms per detection at 25 fps is 2 cores at stride 1; half a core needs stride 4
+    g = FrameRateGovernor(source_fps=25.0, cpu_budget=0.5, adjust_every=10)
+    for _ in range(10):
+        g.record(80.0)
+    assert g.skip == 4
+
+
+def test_latency_target_steps_the_stride_up_and_down():
+    g = FrameRateGovernor(latency_target_ms=200, adjust_every=1, smoothing=1.0)
+    for _ in range(3):
+        g.record(10.0, lag_ms=500.0)
+    assert g.skip == 4
+    for _ in range(5):
+        g.record(10.0, lag_ms=10.0)
+    assert g.skip == 1
+
+
+def test_not_adaptive_without_targets():
+    g = FrameRateGovernor(frame_skip=2, adjust_every=1)
+    for _ in range(20):
+        g.record(1000.0, lag_ms=10000.0)
+    assert g.skip == 2 and not g.adaptive
@@ -0,0 +1,88 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from tracking.inference import InferenceScheduler
+from tracking.models import SharedModel
+
+
+class CountingModel:
+    """Records the batch size of every forward pass; detects nothing"""
+
+    def __init__(self):
+        self.passes = []
+
+    def predict(self, source, **kwargs):
+        self.passes.append(len(source))
+        return [SimpleNamespace(boxes=None) for _ in source]
+
+
+def shared(max_batch=None):
+    return SharedModel(("yolov8n.pt", 640, None), CountingModel(), max_batch)
+
+
+@pytest.fixture
+def scheduler():
+    s = InferenceScheduler(max_batch_size=8, max_wait_ms=200)
+    s.start()
+    yield s
+    s.stop()
+
+
+def infer_all(scheduler, model, cameras):
+    for camera_id in cameras:
+        scheduler.register(camera_id)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    results = {}
+
+    def run(camera_id):
+        results[camera_id] = scheduler.infer(camera_id, frame, model, timeout=5.0)
+
+    threads = [threading.Thread(target=run, args=(c,)) for c in cameras]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_frames_of_all_cameras_share_one_pass(scheduler):
+    model = shared()
+    results = infer_all(scheduler, model, ["a", "b", "c"])
+    assert model.model.passes == [3]
+    assert all(len(boxes) == 0 for boxes, _ in results.values())
+
+
+def test_fixed_batch_models_run_one_frame_per_pass(scheduler):
+    model = shared(max_batch=1)
+    results = infer_all(scheduler, model, ["a", "b", "c"])
+    assert model.model.passes == [1, 1, 1]
+    assert len(results) == 3
+
+
+def test_newer_frame_replaces_a_pending_one():
+    s = InferenceScheduler(max_batch_size=8, max_wait_ms=1000)
+    s.start()
+    try:
+        s.register("a")
+        s.register("b")  # "b" never submits, so "a" waits for the deadline
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        model = shared()
+        first = s.submit("a", frame, model)
+        second = s.submit("a", frame, model)
+        assert first.cancelled()
+        second.result(timeout=5.0)
+        assert s.frames_replaced == 1 and model.model.passes == [1]
+    finally:
+        s.stop()
+
+
+def test_submit_after_stop_raises():
+    s = InferenceScheduler()
+    s.start()
+    s.stop()
+    with pytest.raises(RuntimeError):
+        s.submit("a", np.zeros((4, 4, 3), dtype=np.uint8), shared())
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")  # deep_sort/__init__ imports the ReID extractor
+
+from deep_sort.sort.iou_matching import iou, iou_matrix  # noqa: E402
+
+
+def reference_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    return inter / (a[2] * a[3] + b[2] * b[3] - inter)
+
+
+def test_matches_the_pairwise_definition():
+    rng = np.random.default_rng(0)
+    boxes = np.column_stack([rng.uniform(0, 100, (7, 2)), rng.uniform(5, 50, (7, 2))])
+    candidates = np.column_stack([rng.uniform(0, 100, (5, 2)), rng.uniform(5, 50, (5, 2))])
+    expected = [[reference_iou(a, b) for b in candidates] for a in boxes]
+    np.testing.assert_allclose(iou_matrix(boxes, candidates), expected)
+
+
+def test_known_values():
+    box = [0, 0, 10, 10]
+    got = iou_matrix([box], [[0, 0, 10, 10], [5, 0, 10, 10], [20, 20, 5, 5], [10, 0, 10, 10]])
+    np.testing.assert_allclose(got, [[1.0, 50 / 150, 0.0, 0.0]])
+    np.testing.assert_allclose(iou(np.array(box), np.array([[5, 0, 10, 10]])), [50 / 150])
+
+
+def test_empty_inputs():
+    assert iou_matrix(np.zeros((0, 4)), [[0, 0, 1, 1]]).shape == (0, 1)
+    assert iou_matrix([[0, 0, 1, 1]], np.zeros((0, 4))).shape == (1, 0)
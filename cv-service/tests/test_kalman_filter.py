@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")  # deep_sort/__init__ imports the ReID extractor
+
+from deep_sort.sort.kalman_filter import KalmanFilter  # noqa: E402
+
+
+@pytest.fixture
+def states():
+    """Five tracks, each initiated and then predicted a few steps"""
+    kf = KalmanFilter()
+    rng = np.random.default_rng(0)
+    means, covariances = [], []
+    for k in range(5):
+        mean, cov = kf.initiate(np.array([rng.uniform(0, 600), rng.uniform(0, 400), 0.5, rng.uniform(40, 200)]))
+        for _ in range(k + 1):
+            mean, cov = kf.predict(mean, cov)
+        means.append(mean)
+        covariances.append(cov)
+    return kf, np.stack(means), np.stack(covariances), rng
+
+
+def test_multi_predict_matches_predict(states):
+    kf, mean, cov, _ = states
+    got_mean, got_cov = kf.multi_predict(mean, cov)
+    for i in range(len(mean)):
+        want_mean, want_cov = kf.predict(mean[i], cov[i])
+        np.testing.assert_allclose(got_mean[i], want_mean)
+        np.testing.assert_allclose(got_cov[i], want_cov)
+
+
+def test_multi_project_matches_project(states):
+    kf, mean, cov, _ = states
+    got_mean, got_cov = kf.multi_project(mean, cov)
+    for i in range(len(mean)):
+        want_mean, want_cov = kf.project(mean[i], cov[i])
+        np.testing.assert_allclose(got_mean[i], want_mean)
+        np.testing.assert_allclose(got_cov[i], want_cov)
+
+
+def test_multi_update_matches_update(states):
+    kf, mean, cov, rng = states
+    measurements = mean[:, :4] + rng.normal(0, 2, (len(mean), 4))
+    got_mean, got_cov = kf.multi_update(mean, cov, measurements)
+    for i in range(len(mean)):
+        want_mean, want_cov = kf.update(mean[i], cov[i], measurements[i])
+        np.testing.assert_allclose(got_mean[i], want_mean, rtol=1e-6, atol=1e-8)
+        np.testing.assert_allclose(got_cov[i], want_cov, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize("only_position", [False, True])
+def test_multi_gating_distance_matches_gating_distance(states, only_position):
+    kf, mean, cov, rng = states
+    measurements = np.column_stack([rng.uniform(0, 600, 7), rng.uniform(0, 400, 7),
+                                    rng.uniform(0.3, 0.7, 7), rng.uniform(40, 200, 7)])
+    got = kf.multi_gating_distance(mean, cov, measurements, only_position)
+    assert got.shape == (len(mean), len(measurements))
+    for i in range(len(mean)):
+        np.testing.assert_allclose(got[i], kf.gating_distance(mean[i], cov[i], measurements, only_position),
+                                   rtol=1e-6)
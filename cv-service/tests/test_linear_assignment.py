@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")  # deep_sort/__init__ imports the ReID extractor
+
+from deep_sort.sort import linear_assignment  # noqa: E402
+from deep_sort.sort.detection import DetectionBatch  # noqa: E402
+from deep_sort.sort.kalman_filter import chi2inv95  # noqa: E402
+from deep_sort.sort.nn_matching import NearestNeighborDistanceMetric  # noqa: E402
+from deep_sort.sort.tracker import Tracker  # noqa: E402
+
+
+def reference_gate(kf, cost_matrix, tracks, detections, track_indices, detection_indices):
+    """Gating as it was: one Kalman gating_distance call per track"""
+    measurements = np.asarray([detections[i].to_xyah() for i in detection_indices])
+    for row, track_idx in enumerate(track_indices):
+        track = tracks[track_idx]
+        distance = kf.gating_distance(track.mean, track.covariance, measurements)
+        cost_matrix[row, distance > chi2inv95[4]] = linear_assignment.INFTY_COST
+    return cost_matrix
+
+
+def reference_cascade(distance_metric, max_distance, cascade_depth, tracks, detections, track_indices):
+    """The cascade as it was: the metric evaluated per level on that level's tracks"""
+    unmatched_detections = list(range(len(detections)))
+    matches = []
+    for level in range(cascade_depth):
+        if len(unmatched_detections) == 0:
+            break
+        track_indices_l = [k for k in track_indices if tracks[k].time_since_update == 1 + level]
+        if len(track_indices_l) == 0:
+            continue
+        matches_l, _, unmatched_detections = linear_assignment.min_cost_matching(
+            distance_metric, max_distance, tracks, detections, track_indices_l, unmatched_detections)
+        matches += matches_l
+    unmatched_tracks = list(set(track_indices) - set(k for k, _ in matches))
+    return matches, unmatched_tracks, unmatched_detections
+
+
+def scene(frames=60, targets=12, seed=0):
+    """Detections of targets walking across the image, some missed for a while, plus clutter"""
+    rng = np.random.default_rng(seed)
+    position = rng.uniform(0, 600, (targets, 2))
+    velocity = rng.normal(0, 4, (targets, 2))
+    size = np.column_stack([rng.uniform(30, 60, targets), rng.uniform(80, 160, targets)])
+    appearance = rng.normal(size=(targets, 32))
+    hidden_until = np.zeros(targets, dtype=int)
+    for frame in range(frames):
+        position += velocity
+        hide = rng.random(targets) < 0.08
+        hidden_until[hide] = frame + rng.integers(2, 8, hide.sum())
+        visible = np.flatnonzero(hidden_until <= frame)
+        tlwh = np.column_stack([position[visible] + rng.normal(0, 2, (len(visible), 2)), size[visible]])
+        feature = appearance[visible] + rng.normal(0, 0.6, (len(visible), 32))
+        clutter = rng.integers(0, 3)
+        tlwh = np.vstack([tlwh, np.column_stack([rng.uniform(0, 600, (clutter, 2)),
+                                                 rng.uniform(30, 150, (clutter, 2))])])
+        feature = np.vstack([feature, rng.normal(size=(clutter, 32))])
+        order = rng.permutation(len(tlwh))
+        yield DetectionBatch(tlwh[order], np.ones(len(order)), feature[order])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_cascade_matches_the_per_level_path(seed):
+    tracker = Tracker(NearestNeighborDistanceMetric("cosine", 0.3, 100), max_age=10)
+    levels_used = set()
+    for detections in scene(seed=seed):
+        tracker.predict()
+        tracks = tracker.tracks
+        confirmed = [i for i, t in enumerate(tracks) if t.is_confirmed()]
+        levels_used.update(tracks[i].time_since_update for i in confirmed)
+        cache = linear_assignment.GatingCache(tracker.kf, tracks, detections)
+
+        def metric(tracks, dets, track_indices, detection_indices, gate):
+            features = dets.feature[np.asarray(detection_indices, dtype=int)]
+            cost = tracker.metric.distance(features, [tracks[i].track_id for i in track_indices])
+            return gate(cost, tracks, dets, track_indices, detection_indices)
+
+        def cached(*args):
+            return metric(*args, lambda cost, *rest: linear_assignment.gate_cost_matrix(
+                tracker.kf, cost, *rest, cache=cache))
+
+        def per_track(*args):
+            return metric(*args, lambda cost, *rest: reference_gate(tracker.kf, cost, *rest))
+
+        matches, unmatched_tracks, unmatched_detections = linear_assignment.matching_cascade(
+            cached, tracker.metric.matching_threshold, tracker.max_age, tracks, detections,
+            confirmed, precompute=True)
+        expected = reference_cascade(per_track, tracker.metric.matching_threshold, tracker.max_age,
+                                     tracks, detections, confirmed)
+        assert sorted(matches) == sorted(expected[0])
+        assert sorted(unmatched_tracks) == sorted(expected[1])
+        assert sorted(unmatched_detections) == sorted(expected[2])
+
+        tracker.update(detections)
+    # the scene exercised more than the first cascade level
+    assert len(levels_used) > 2
+
+
+def test_gating_cache_matches_per_track_gating():
+    tracker = Tracker(NearestNeighborDistanceMetric("cosine", 0.3))
+    for detections in scene(frames=8, seed=3):
+        tracker.predict()
+        tracker.update(detections)
+    tracker.predict()
+    tracks = tracker.tracks
+    cache = linear_assignment.GatingCache(tracker.kf, tracks, detections)
+    for only_position in (False, True):
+        got = cache.gating_distance(range(len(tracks)), range(len(detections)), only_position)
+        expected = [tracker.kf.gating_distance(t.mean, t.covariance, detections.to_xyah(), only_position)
+                    for t in tracks]
+        np.testing.assert_allclose(got, expected, rtol=1e-6)
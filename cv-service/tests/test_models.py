@@ -0,0 +1,31 @@
+import json
+import zipfile
+
+from tracking.models import ModelRegistry, export_metadata
+
+
+def fake_torchscript(path, **metadata):
+    # TorchScript archives keep ultralytics' metadata as the extra file config.txt
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(f"{path.stem}/extra/config.txt", json.dumps(metadata))
+        archive.writestr(f"{path.stem}/data.pkl", b"")
+
+
+def test_export_metadata(tmp_path):
+    fake_torchscript(tmp_path / "yolov8n.torchscript", imgsz=[640, 640], batch=1)
+    assert export_metadata(tmp_path / "yolov8n.torchscript") == {"imgsz": [640, 640], "batch": 1}
+    (tmp_path / "broken.torchscript").write_bytes(b"not a zip")
+    assert export_metadata(tmp_path / "broken.torchscript") == {}
+
+
+def test_resolve_checks_the_torchscript_imgsz(tmp_path):
+    weights = str(tmp_path / "yolov8n.pt")
+    fake_torchscript(tmp_path / "yolov8n.torchscript", imgsz=[640, 640], batch=1)
+    assert ModelRegistry.resolve(weights, "torchscript", 640) == str(tmp_path / "yolov8n.torchscript")
+    assert ModelRegistry.resolve(weights, "torchscript", 320) == weights
+
+
+def test_resolve_without_export_uses_the_weights(tmp_path):
+    weights = str(tmp_path / "yolov8n.pt")
+    assert ModelRegistry.resolve(weights, "torchscript", 640) == weights
+    assert ModelRegistry.resolve(weights, "eager", 640) == weights
@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+import pytest
+
+from tracking.motion import MotionGate
+from tracking.worker import SimpleHumanTracker
+
+STATIC = np.full((120, 160, 3), 90, dtype=np.uint8)
+
+
+def moved():
+    frame = STATIC.copy()
+    frame[30:90, 40:100] = 250
+    return frame
+
+
+def run(gate, frames, detected=lambda index: True):
+    """Indices the gate sends to the detector; `detected` says whether the detector then ran"""
+    calls = []
+    for index, frame in enumerate(frames, start=1):
+        if gate.should_detect(frame, index):
+            calls.append(index)
+            if detected(index):
+                gate.commit(frame, index)
+    return calls
+
+
+def test_static_scene_is_detected_once():
+    gate = MotionGate(redetect_s=0)
+    assert run(gate, [STATIC] * 50) == [1]
+    assert gate.stats()["motion_skipped"] == 49
+
+
+def test_motion_triggers_a_detection():
+    gate = MotionGate(redetect_s=0)
+    frames = [STATIC] * 10 + [moved()] * 10
+    assert run(gate, frames) == [1, 11]
+
+
+def test_redetect_timer():
+    gate = MotionGate(redetect_s=1.0, source_fps=25.0)
+    assert run(gate, [STATIC] * 80) == [1, 26, 51, 76]
+
+
+def test_frames_the_detector_skipped_do_not_become_the_reference():
+    # warm-up: the worker skips detection on its first frames
+    gate = MotionGate(redetect_s=0)
+    assert run(gate, [STATIC] * 20, detected=lambda index: index >= 5) == [1, 2, 3, 4, 5]
+
+
+def test_a_dropped_frame_keeps_the_redetect_due():
+    gate = MotionGate(redetect_s=1.0, source_fps=25.0)
+    calls = run(gate, [STATIC] * 40, detected=lambda index: index != 26)
+    assert calls == [1, 26, 27]
+
+
+def test_zone_is_more_sensitive_than_the_frame():
+    frame = STATIC.copy()
+    frame[10:14, 10:14] = 250  # 16 of 19200 pixels: below the frame threshold
+    zone = [(0, 0), (30, 0), (30, 30), (0, 30)]
+    assert run(MotionGate(threshold=0.01, redetect_s=0), [STATIC, frame]) == [1]
+    assert run(MotionGate(threshold=0.01, zones=[(zone, 0.005)], redetect_s=0), [STATIC, frame]) == [1, 2]
+
+
+class Registry:
+    def acquire(self, name, imgsz=640, device=None, backend="eager"):
+        return object()
+
+    def release(self, entry):
+        pass
+
+
+class Scheduler:
+    """Counts detector calls; finds one person"""
+    running = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def register(self, camera_id):
+        pass
+
+    def unregister(self, camera_id):
+        pass
+
+    def infer(self, *args, **kwargs):
+        self.calls += 1
+        return np.array([[10, 10, 50, 100]], dtype=np.float32), np.array([0.9], dtype=np.float32)
+
+
+@pytest.mark.parametrize("redetect_s, calls", [(0, 1), (5.0, 2)])
+def test_worker_detects_a_static_clip(tmp_path, redetect_s, calls):
+    path = str(tmp_path / "static.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (160, 120))
+    for _ in range(250):
+        writer.write(STATIC)
+    writer.release()
+
+    scheduler = Scheduler()
+    w = SimpleHumanTracker("cam", file_path=path, registry=Registry(), scheduler=scheduler, batched=True,
+                           record="off", motion_gate=True, redetect_s=redetect_s)
+    w.start()
+    w.processing_thread.join(timeout=30)
+    # frames 1-4 are warm-up; the first detection is frame 5, then every 125 frames
+    assert scheduler.calls == calls
+    assert w.current_people_count == 1
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")  # deep_sort/__init__ imports the ReID extractor
+
+from deep_sort.sort.nn_matching import (  # noqa: E402
+    FeatureGallery, NearestNeighborDistanceMetric, _nn_cosine_distance, _nn_euclidean_distance)
+
+
+class ReferenceMetric:
+    """The per-track implementation: a list of samples per target, one _metric call per target"""
+
+    def __init__(self, metric, budget=None):
+        self._metric = _nn_cosine_distance if metric == "cosine" else _nn_euclidean_distance
+        self.budget = budget
+        self.samples = {}
+
+    def partial_fit(self, features, targets, active_targets):
+        for feature, target in zip(features, targets):
+            self.samples.setdefault(target, []).append(feature)
+            if self.budget is not None:
+                self.samples[target] = self.samples[target][-self.budget:]
+        self.samples = {k: self.samples[k] for k in active_targets if k in self.samples}
+
+    def distance(self, features, targets):
+        cost_matrix = np.zeros((len(targets), len(features)))
+        for i, target in enumerate(targets):
+            cost_matrix[i, :] = self._metric(self.samples[target], features)
+        return cost_matrix
+
+
+def run(metric, budget, frames=40, dim=16, seed=0):
+    """Feed both implementations the same tracks coming and going; yield both cost matrices"""
+    rng = np.random.default_rng(seed)
+    gallery = NearestNeighborDistanceMetric(metric, 0.2, budget)
+    reference = ReferenceMetric(metric, budget)
+    active = list(range(5))
+    next_id = 5
+    for _ in range(frames):
+        # some tracks end, new ones start, more than the gallery's initial 16 slots over time
+        active = [t for t in active if rng.random() > 0.1]
+        while len(active) < 20 and rng.random() < 0.5:
+            active.append(next_id)
+            next_id += 1
+        targets = list(rng.choice(active, size=rng.integers(1, len(active) + 1)))
+        features = rng.normal(size=(len(targets), dim))
+        gallery.partial_fit(features, np.array(targets), active)
+        reference.partial_fit(features, targets, active)
+
+        query = rng.normal(size=(6, dim))
+        known = [t for t in active if t in reference.samples]
+        yield gallery.distance(query, known), reference.distance(query, known)
+
+
+@pytest.mark.parametrize("metric", ["cosine", "euclidean"])
+@pytest.mark.parametrize("budget", [None, 3, 100])
+def test_distances_match_the_per_track_path(metric, budget):
+    for got, expected in run(metric, budget):
+        np.testing.assert_allclose(got, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_budget_keeps_the_newest_samples():
+    gallery = FeatureGallery(budget=3)
+    for value in range(1, 8):
+        gallery.add([[value, 0.0]], [1])
+    assert sorted(gallery.samples(1)[:, 0]) == [5, 6, 7]
+
+
+def test_unbounded_gallery_keeps_every_sample():
+    gallery = FeatureGallery(capacity=2)
+    for value in range(1, 6):
+        gallery.add([[value, 0.0]], [1])
+    assert sorted(gallery.samples(1)[:, 0]) == [1, 2, 3, 4, 5]
+
+
+def test_retain_recycles_slots():
+    gallery = FeatureGallery(budget=2, slots=2)
+    gallery.add([[1.0, 0.0], [2.0, 0.0]], [1, 2])
+    gallery.retain([2])
+    assert 1 not in gallery and gallery.targets() == [2]
+    gallery.add([[3.0, 0.0]], [3])
+    # target 3 took over target 1's slot and none of its samples
+    assert gallery.samples(3).tolist() == [[3.0, 0.0]]
+    assert len(gallery._data) == 2
+    gallery.add([[4.0, 0.0]], [4])
+    assert len(gallery._data) == 4 and gallery.samples(2).tolist() == [[2.0, 0.0]]
+
+
+def test_targets_without_samples_cost_infinity():
+    metric = NearestNeighborDistanceMetric("cosine", 0.2)
+    metric.partial_fit(np.ones((1, 4)), np.array([1]), [1])
+    cost = metric.distance(np.ones((2, 4)), [1, 2])
+    np.testing.assert_allclose(cost[0], [0.0, 0.0], atol=1e-6)
+    assert np.isinf(cost[1]).all()
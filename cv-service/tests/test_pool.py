@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from tracking.pool import PoolError, WorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(1, batch_options=None, monitor_interval=0.2, min_uptime_s=0.0)
+    pool.start()
+    # First request waits for the spawned process to import and come up
+    assert pool._request(pool._slots[0], "health", timeout=60.0)["cameras"] == []
+    yield pool
+    pool.stop()
+
+
+def test_late_reply_is_discarded(pool):
+    slot = pool._slots[0]
+    with pytest.raises(TimeoutError):
+        pool._request(slot, "health", timeout=0.0)
+    # The health reply arrives late and must not be taken as this one's
+    assert pool._request(slot, "status", "missing") is None
+
+
+def test_failed_start_leaves_no_state(pool):
+    with pytest.raises(PoolError):
+        pool.start_camera("cam", {"no_such_option": 1})
+    assert pool.cameras() == []
+    assert pool._slots[0].cameras == {}
+
+
+def test_stop_unknown_camera(pool):
+    assert pool.stop_camera("missing") is False
+
+
+def test_crash_drops_file_jobs(pool):
+    slot = pool._slots[0]
+    with pool._lock:
+        slot.cameras["upload"] = {"file_path": "/tmp/upload.mp4"}
+        pool._assignments["upload"] = slot
+    old_pid = slot.process.pid
+    slot.process.kill()
+
+    deadline = time.monotonic() + 60.0
+    while (slot.process.pid == old_pid or not slot.process.is_alive()) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert slot.restarts == 1
+    assert "upload" not in pool.cameras()
+    assert slot.cameras == {}
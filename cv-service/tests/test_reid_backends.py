@@ -0,0 +1,92 @@
+import importlib.util
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")  # deep_sort/__init__ imports the ReID extractor
+
+from deep_sort.deep.backends import (  # noqa: E402
+    INPUT_SHAPE, export_net, exported_path, load_exported, prepare_net)
+from deep_sort.deep.feature_extractor import Extractor  # noqa: E402
+from deep_sort.deep.model import Net  # noqa: E402
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    torch.manual_seed(0)
+    path = str(tmp_path / "ckpt.t7")
+    torch.save({"net_dict": Net(reid=True).state_dict()}, path)
+    return path
+
+
+def crops(n=6, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (int(rng.integers(60, 300)), int(rng.integers(30, 150)), 3), dtype=np.uint8)
+            for _ in range(n)]
+
+
+@pytest.fixture
+def eager_features(checkpoint):
+    return Extractor(checkpoint, use_cuda=False)(crops())
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        prepare_net(Net(reid=True), "fp16")
+
+
+def test_prepared_net_is_in_eval_mode():
+    net = Net(reid=True).train()
+    assert not prepare_net(net).training
+
+
+def test_channels_last_gives_the_same_features(checkpoint, eager_features):
+    features = Extractor(checkpoint, use_cuda=False, channels_last=True)(crops())
+    np.testing.assert_allclose(features, eager_features, atol=1e-4)
+
+
+def test_int8_dynamic_stays_close_to_eager(checkpoint, eager_features):
+    extractor = Extractor(checkpoint, use_cuda=False, backend="int8-dynamic")
+    assert extractor.device == "cpu"
+    features = extractor(crops())
+    # unit-length features: cosine similarity per crop
+    assert (np.sum(features * eager_features, axis=1) > 0.99).all()
+
+
+def test_int8_static_needs_calibration(checkpoint):
+    with pytest.raises(ValueError):
+        Extractor(checkpoint, use_cuda=False, backend="int8-static")
+    with pytest.raises(ValueError):
+        Extractor(checkpoint, use_cuda=False, backend="int8-static", calibration=[])
+
+
+def test_int8_static_calibrates_on_crops(checkpoint, eager_features):
+    if not {"x86", "fbgemm"} & set(torch.backends.quantized.supported_engines):
+        pytest.skip("no x86 quantized engine")
+    extractor = Extractor(checkpoint, use_cuda=False, backend="int8-static",
+                          calibration=crops(40, seed=1))
+    features = extractor(crops())
+    assert features.shape == eager_features.shape and np.isfinite(features).all()
+    np.testing.assert_allclose(np.linalg.norm(features, axis=1), 1.0, atol=1e-3)
+
+
+def test_missing_export_falls_back_to_eager(checkpoint, eager_features):
+    assert load_exported(checkpoint, "torchscript") is None
+    extractor = Extractor(checkpoint, use_cuda=False, backend="torchscript")
+    assert extractor.backend == "eager"
+    np.testing.assert_allclose(extractor(crops()), eager_features, atol=1e-6)
+
+
+@pytest.mark.parametrize("backend", ["torchscript", "onnx"])
+def test_exported_graphs_match_eager(checkpoint, eager_features, backend):
+    if backend == "onnx" and not (importlib.util.find_spec("onnx") and importlib.util.find_spec("onnxruntime")):
+        pytest.skip("onnx export needs onnx and onnxruntime")
+    net = Net(reid=True)
+    net.load_state_dict(torch.load(checkpoint, map_location="cpu")["net_dict"])
+    assert export_net(net, checkpoint, [backend]) == [exported_path(checkpoint, backend)]
+
+    extractor = Extractor(checkpoint, use_cuda=False, backend=backend)
+    assert extractor.backend == backend
+    # exported with batch 1; the extractor runs the whole batch through it
+    np.testing.assert_allclose(extractor(crops()), eager_features, atol=1e-4)
+    assert extractor.net(torch.zeros((2,) + INPUT_SHAPE)).shape[0] == 2
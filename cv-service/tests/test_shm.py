@@ -0,0 +1,88 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from tracking.shm import _READ_SEQ, SharedFrameGrabber, SharedFrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing((4, 6, 3), slots=3, create=True)
+    yield ring
+    ring.close()
+
+
+def frame(value):
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+
+def test_write_and_view(ring):
+    seq = ring.write(frame(7), captured_at=1.5, frame_index=12, pts_ms=480.0)
+    view, index, captured_at, pts_ms = ring.view(seq)
+    assert seq == 1
+    assert (view == 7).all() and index == 12 and captured_at == 1.5 and pts_ms == 480.0
+
+
+def test_overwritten_frames_are_gone(ring):
+    for value in range(1, 6):
+        ring.write(frame(value), 0.0, value, 0.0)
+    assert ring.view(1) is None and ring.slot_of(2) is None
+    assert ring.slot_of(5) is not None
+
+
+def test_claimed_frame_is_never_overwritten(ring):
+    ring.write(frame(1), 0.0, 1, 0.0)
+    ring.control[_READ_SEQ] = 1
+    view = ring.view(1)[0]
+    for value in range(2, 20):
+        ring.write(frame(value), 0.0, value, 0.0)
+    assert ring.slot_of(1) is not None
+    assert (view == 1).all()
+    # The other slots keep cycling through the newest frames
+    assert ring.slot_of(19) is not None and ring.slot_of(18) is not None
+
+
+def test_attach_by_name(ring):
+    other = SharedFrameRing(ring.shape, ring.slots, names=ring.names)
+    try:
+        seq = ring.write(frame(3), 0.0, 1, 0.0)
+        assert (other.view(seq)[0] == 3).all()
+    finally:
+        other.close()
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for i in range(60):
+        writer.write(np.full((48, 64, 3), i * 4, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.mark.parametrize("live", [False, True])
+def test_grabber_frames_stay_intact_while_in_use(video, live):
+    grabber = SharedFrameGrabber(video, "test", (48, 64, 3), capacity=1, live=live)
+    grabber.start()
+    indices = []
+    try:
+        deadline = time.monotonic() + 60.0
+        while time.monotonic() < deadline:
+            item = grabber.read(timeout=1.0)
+            if item is None:
+                if grabber.finished:
+                    break
+                continue
+            view, index, _, _ = item
+            snapshot = view.copy()
+            time.sleep(0.02)  # "inference" while the capture process keeps decoding
+            assert np.array_equal(view, snapshot)
+            indices.append(index)
+    finally:
+        grabber.stop()
+    assert indices == sorted(indices)
+    if not live:
+        assert indices == list(range(1, 61))
@@ -0,0 +1,72 @@
+import json
+import math
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from tracking.signing import _js_number, canonical_bytes, sign_bytes, signed_batch, signed_event
+
+CV_SIGNATURE = Path(__file__).resolve().parents[2] / "utils" / "cvSignature.js"
+
+FLOATS = [0.0, -0.0, 3.0, -2.0, 0.35, 0.1 + 0.2, 1e-7, 1.5e-7, 1e-6, 1e-5, 0.00012, 123.456,
+          1e16, 1.2345678901234567e20, 1e21, 1.5e300, -4.2e-300, 5e-324, 2 ** 53 + 2.0]
+
+PAYLOAD = {
+    "cameraId": "cam-ü",
+    "ts": 1760000000000,
+    "type": "people-stats",
+    "data": {"floats": FLOATS, "fps": np.float32(12.5), "count": np.int64(3), "ok": True, "none": None,
+             "nested": [{"b": 1, "a": (2, 3.0)}], "text": "line\nbreak \"quoted\"   \U0001F600"},
+}
+
+
+@pytest.mark.parametrize("value, text", [
+    (3.0, "3"), (-0.0, "0"), (0.5, "0.5"), (1e-7, "1e-7"), (1e-5, "0.00001"), (1.5e-7, "1.5e-7"),
+    (1e21, "1e+21"), (1.2345678901234567e20, "123456789012345670000"), (1e16, "10000000000000000"),
+    (-4.2e-300, "-4.2e-300"),
+])
+def test_js_number(value, text):
+    assert _js_number(value) == text
+
+
+def test_non_finite_floats_are_rejected():
+    with pytest.raises(ValueError):
+        canonical_bytes({"x": math.nan})
+
+
+def test_canonical_bytes_is_compact_and_sorted():
+    assert canonical_bytes({"b": [1, 2.0], "a": {"d": None, "c": "é"}}) == '{"a":{"c":"é","d":null},"b":[1,2]}'.encode()
+
+
+def test_canonical_bytes_round_trips():
+    body = canonical_bytes(PAYLOAD)
+    assert [float(x) for x in json.loads(body)["data"]["floats"]] == FLOATS
+
+
+def test_signed_batch_is_the_canonical_batch():
+    events = [PAYLOAD, {"type": "enter", "data": {"x": 1e-7}}]
+    body = signed_batch(events, "s")
+    unsigned = canonical_bytes({"events": events})
+    assert body == unsigned[:-1] + b',"sig":"' + sign_bytes("s", unsigned).encode() + b'"}'
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_matches_the_node_verifier():
+    script = (
+        "const s = require(process.argv[1]);"
+        "let input = ''; process.stdin.on('data', d => input += d);"
+        "process.stdin.on('end', () => {"
+        "  const body = JSON.parse(input);"
+        "  const { sig, ...unsigned } = body;"
+        "  process.stdout.write(JSON.stringify({ text: s.canonicalStringify(unsigned), ok: s.verifySig(unsigned, sig) }));"
+        "});"
+    )
+    wire = signed_event(PAYLOAD, "dev-secret")
+    out = subprocess.run(["node", "-e", script, str(CV_SIGNATURE)], input=wire, capture_output=True, check=True,
+                         env={"CV_SHARED_SECRET": "dev-secret", "PATH": "/usr/bin:/bin:/usr/local/bin"})
+    result = json.loads(out.stdout)
+    assert result["text"].encode("utf-8") == canonical_bytes(PAYLOAD)
+    assert result["ok"] is True
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")  # deep_sort/__init__ imports the ReID extractor
+
+from deep_sort.sort.detection import Detection, DetectionBatch  # noqa: E402
+from deep_sort.sort.kalman_filter import KalmanFilter  # noqa: E402
+from deep_sort.sort.nn_matching import NearestNeighborDistanceMetric  # noqa: E402
+from deep_sort.sort.track import Track, TrackState, TrackStore  # noqa: E402
+from deep_sort.sort.tracker import Tracker  # noqa: E402
+
+
+def new_track(kf, store, track_id, box):
+    mean, covariance = kf.initiate(np.asarray(box, dtype=float))
+    return Track(mean, covariance, track_id, n_init=3, max_age=5, store=store)
+
+
+def test_tracks_keep_their_state_when_the_store_grows():
+    kf, store = KalmanFilter(), TrackStore(capacity=2)
+    tracks = [new_track(kf, store, i, [10 * i, 20, 0.5, 100 + i]) for i in range(1, 10)]
+    assert len(store) == 9 and len(store.track_id) == 16
+    for track in tracks:
+        track.hits = 10 + track.track_id
+    for i, track in enumerate(tracks, 1):
+        assert track.track_id == i and track.hits == 10 + i
+        assert track.mean[0] == 10 * i and track.mean[3] == 100 + i
+        assert track.is_tentative() and track.age == 1 and track.time_since_update == 0
+
+
+def test_released_slots_are_reused_without_touching_other_tracks():
+    kf, store = KalmanFilter(), TrackStore(capacity=2)
+    first, second = new_track(kf, store, 1, [0, 0, 0.5, 100]), new_track(kf, store, 2, [50, 0, 0.5, 80])
+    first.state = TrackState.Confirmed
+    first.hits = 7
+    store.release(first.slot)
+    third = new_track(kf, store, 3, [90, 0, 0.5, 60])
+    assert third.slot == first.slot and len(store.track_id) == 2
+    assert third.track_id == 3 and third.hits == 1 and third.is_tentative()
+    assert second.track_id == 2 and second.mean[0] == 50
+
+
+def test_track_methods_match_the_kalman_filter():
+    kf = KalmanFilter()
+    track = new_track(kf, TrackStore(), 1, [100, 50, 0.4, 120])
+    mean, covariance = track.mean.copy(), track.covariance.copy()
+    detection = Detection([75, 0, 50, 125], 0.9, np.ones(4))
+    for _ in range(3):
+        track.predict(kf)
+        mean, covariance = kf.predict(mean, covariance)
+        track.update(kf, detection)
+        mean, covariance = kf.update(mean, covariance, detection.to_xyah())
+    np.testing.assert_allclose(track.mean, mean)
+    np.testing.assert_allclose(track.covariance, covariance)
+    assert track.hits == 4 and track.age == 4 and track.is_confirmed()
+    assert len(track.features) == 3
+    for _ in range(6):
+        track.increment_age()
+        track.mark_missed()
+    assert track.is_deleted()
+
+
+def test_batched_tracker_update_matches_per_track_updates():
+    rng = np.random.default_rng(0)
+    tracker = Tracker(NearestNeighborDistanceMetric("cosine", 0.3))
+    position = rng.uniform(0, 600, (8, 2))
+    velocity = rng.normal(0, 3, (8, 2))
+    appearance = rng.normal(size=(8, 16))
+    for _ in range(20):
+        position += velocity
+        tlwh = np.column_stack([position + rng.normal(0, 1, (8, 2)), np.full((8, 2), [40, 100])])
+        detections = DetectionBatch(tlwh, np.ones(8), appearance + rng.normal(0, 0.2, (8, 16)))
+        tracker.predict()
+        before = {t.track_id: (t.mean.copy(), t.covariance.copy(), t.hits, t.state)
+                  for t in tracker.tracks}
+        tracker.update(detections)
+        after = {t.track_id: t for t in tracker.tracks}
+        for track_id, detection_idx in tracker.matches:
+            mean, covariance, hits, state = before[track_id]
+            mean, covariance = tracker.kf.update(mean, covariance, detections[detection_idx].to_xyah())
+            track = after[track_id]
+            np.testing.assert_allclose(track.mean, mean)
+            np.testing.assert_allclose(track.covariance, covariance)
+            assert track.hits == hits + 1 and track.time_since_update == 0
+            expected_state = TrackState.Confirmed if hits + 1 >= tracker.n_init else state
+            assert track.state == expected_state
+    assert len(tracker.tracks) == 8 and all(t.is_confirmed() for t in tracker.tracks)
+
+
+def test_detection_batch_matches_single_detections():
+    rng = np.random.default_rng(1)
+    detections = [Detection(rng.uniform(1, 100, 4), rng.random(), rng.normal(size=8)) for _ in range(5)]
+    batch = DetectionBatch.from_detections(detections)
+    assert len(batch) == 5 and not batch.reused.any()
+    np.testing.assert_allclose(batch.to_xyah(), [d.to_xyah() for d in detections])
+    np.testing.assert_allclose(batch.to_tlbr(), [d.to_tlbr() for d in detections])
+    for got, expected in zip(batch, detections):
+        np.testing.assert_allclose(got.tlwh, expected.tlwh)
+        np.testing.assert_allclose(got.feature, expected.feature)
+        assert got.confidence == pytest.approx(expected.confidence)
+        np.testing.assert_allclose(got.to_xyah(), expected.to_xyah())
+    # indexing returns views into the batch
+    assert np.shares_memory(batch[2].feature, batch.feature)
+
+
+def test_empty_detection_batch():
+    batch = DetectionBatch.from_detections([])
+    assert len(batch) == 0 and list(batch) == []
+    assert batch.to_xyah().shape == (0, 4)
+    tracker = Tracker(NearestNeighborDistanceMetric("cosine", 0.3))
+    tracker.predict()
+    tracker.update(batch)
+    assert tracker.tracks == [] and tracker.matches == []
@@ -0,0 +1,95 @@
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+import pytest
+
+from tracking.inference import InferenceScheduler
+from tracking.shm import SharedFrameGrabber
+from tracking.worker import SimpleHumanTracker
+
+
+class Registry:
+    """Registry that hands out a placeholder model; these tests never run the detector"""
+
+    def acquire(self, name, imgsz=640, device=None, backend="eager"):
+        return object()
+
+    def release(self, entry):
+        pass
+
+
+def tracker(**options):
+    options.setdefault("rtsp_url", "rtsp://camera")
+    return SimpleHumanTracker("cam", registry=Registry(), **options)
+
+
+def test_detect_after_the_scheduler_stopped_ends_processing():
+    scheduler = InferenceScheduler()
+    scheduler.start()
+    w = tracker(scheduler=scheduler)
+    w.running = True
+    scheduler.stop()
+    assert w.detect(np.zeros((48, 64, 3), dtype=np.uint8), 0.35, 640) == (None, None)
+    assert not w.running
+
+
+@pytest.mark.parametrize("file_path, batched, expected", [
+    (None, None, True), ("clip.mp4", None, False), ("clip.mp4", True, True), (None, False, False),
+])
+def test_batched_option(file_path, batched, expected):
+    scheduler = InferenceScheduler()
+    options = {"file_path": file_path, "rtsp_url": None} if file_path else {}
+    w = tracker(scheduler=scheduler, batched=batched, **options)
+    assert (w.scheduler is scheduler) is expected
+
+
+def test_only_frames_that_ran_detection_are_reported():
+    class Scheduler:
+        running = True
+
+        def __init__(self, result):
+            self.result = result
+
+        def infer(self, *args, **kwargs):
+            return self.result
+
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    w = tracker(scheduler=Scheduler((np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32))))
+    w.frame_count = 1  # startup frames are skipped
+    assert w.process_frame_simple(frame) is False
+    w.frame_count = 10
+    assert w.process_frame_simple(frame) is True
+    w.scheduler.result = (None, None)  # frame dropped by the scheduler
+    assert w.process_frame_simple(frame) is False
+
+
+def test_failed_start_stops_the_capture_process(tmp_path, monkeypatch):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for _ in range(10):
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+
+    grabbers = []
+    original = SharedFrameGrabber.start
+
+    def start(self):
+        grabbers.append(self)
+        original(self)
+
+    class Threading:
+        @staticmethod
+        def Thread(*args, **kwargs):
+            raise RuntimeError("no threads left")
+
+    monkeypatch.setattr(SharedFrameGrabber, "start", start)
+    monkeypatch.setattr("tracking.worker.threading", Threading)
+    w = tracker(file_path=path, rtsp_url=None, capture_process=True, record="off")
+    w.start()
+
+    (grabber,) = grabbers
+    assert w.grabber is None and not w.running
+    assert grabber._process is None and grabber.ring.control is None
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=grabber.ring.names[0])
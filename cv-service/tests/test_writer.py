@@ -0,0 +1,75 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from tracking.writer import AnnotatedWriter
+
+BOXES = np.zeros((0, 4), dtype=np.float32)
+CONFS = np.zeros((0,), dtype=np.float32)
+
+
+def blank():
+    return np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def writer(tmp_path):
+    return AnnotatedWriter("test", str(tmp_path / "out.mp4"), 25.0, (64, 48), queue_size=4)
+
+
+def test_close_flushes_queued_frames(writer):
+    writer.start()
+    for i in range(1, 4):
+        writer.submit(blank(), i, BOXES, CONFS, 0)
+    writer.close()
+    assert writer.frames_written == 3
+
+
+def test_close_does_not_block_after_the_writer_thread_died(writer):
+    writer.start()
+    writer._draw = None  # makes the writer thread fail on the first frame
+    writer.submit(blank(), 1, BOXES, CONFS, 0)
+    writer._thread.join(timeout=2.0)
+    assert not writer._thread.is_alive()
+
+    # Nothing drains the queue any more: it fills up and further frames are dropped
+    for i in range(2, 12):
+        writer.submit(blank(), i, BOXES, CONFS, 0)
+    assert writer.frames_dropped == 6
+
+    started = time.monotonic()
+    writer.close(timeout=0)
+    assert time.monotonic() - started < 0.5
+    assert writer.submit(blank(), 12, BOXES, CONFS, 0) is False
+
+
+def test_sampled_mode_counts_offered_frames(tmp_path):
+    # sample_fps=2 of a 25 fps file: the writer is only offered every 12th source frame
+    writer = AnnotatedWriter("test", str(tmp_path / "out.mp4"), 25.0, (64, 48),
+                             mode="sampled", every=2, offered_fps=25.0 / 12)
+    kept = [i for i in range(1, 200, 12) if writer.wants(i)]
+    assert kept == list(range(13, 200, 24))
+
+
+def test_sampled_mode_without_source_sampling(writer):
+    writer.mode, writer.every = "sampled", 3
+    assert [i for i in range(1, 10) if writer.wants(i)] == [3, 6, 9]
+
+
+@pytest.mark.parametrize("mode, every, offered_fps, expected", [
+    ("full", 1, None, 25.0),
+    ("sampled", 5, None, 5.0),
+    ("full", 1, 2.0, 2.0),
+    ("sampled", 2, 2.0, 1.0),
+])
+def test_encoding_rate_follows_the_offered_rate(tmp_path, mode, every, offered_fps, expected):
+    path = str(tmp_path / "out.mp4")
+    writer = AnnotatedWriter("test", path, 25.0, (64, 48), mode=mode, every=every, offered_fps=offered_fps)
+    writer.start()
+    for i in range(1, 11):
+        if writer.wants(i):
+            writer.submit(blank(), i, BOXES, CONFS, 0)
+    writer.close()
+    assert cv2.VideoCapture(path).get(cv2.CAP_PROP_FPS) == pytest.approx(expected, rel=0.01)
@@ -0,0 +1,195 @@
+import math
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+def sampling_stats(mode, fps, covered, retrieved, seeked, read_s):
+    """Decode savings of a FrameSampler, also rebuilt from the counters of a capture process"""
+    return {
+        "sampling": mode,
+        "frames_retrieved": retrieved,
+        # share of source frames never turned into an image
+        "decode_savings": round(1 - retrieved / covered, 3) if covered else 0.0,
+        # share jumped over by seeking (FFmpeg still decodes from the keyframe before a target)
+        "seek_savings": round(seeked / covered, 3) if covered else 0.0,
+        # seconds of video read per second spent reading
+        "read_speed_x": round(covered / fps / read_s, 1) if read_s else 0.0,
+    }
+
+
+class FrameSampler:
+    """Reads only the source frames the analysis will use from a cv2.VideoCapture
+
+    Modes:
+    "decode" reads every frame (grab + retrieve), as before.
+    "grab" grabs every frame but only retrieves (converts to BGR and copies
+    out) frames at least `stride` source frames after the last one kept.
+    "seek" is for files and jumps to the next sample with CAP_PROP_POS_MSEC.
+    A seek lands on the previous keyframe and decodes forward from there, so
+    gaps shorter than `seek_min_gap_s` are bridged with grab() instead, which
+    is cheaper over that distance.
+
+    `stride` is an int or a callable returning the current stride, so the
+    FrameRateGovernor can steer it. Frame indices are 1-based source frame
+    numbers in every mode; `start` is the number of frames already
+    consumed when the capture was positioned mid-file. Each frame comes
+    with its presentation timestamp (CAP_PROP_POS_MSEC) as reported by
+    the backend.
+    """
+
+    MODES = ("decode", "grab", "seek")
+
+    def __init__(self, cap, mode="decode", stride=1, fps=25.0, seek_min_gap_s=1.0, start=0):
+        if mode not in self.MODES:
+            raise ValueError(f"unknown sampling mode {mode!r}")
+        self.cap = cap
+        self.mode = mode
+        self._stride = stride if callable(stride) else (lambda: stride)
+        self.fps = fps if fps and math.isfinite(fps) and fps > 0 else 25.0
+        self.seek_min_gap = max(1, int(round(seek_min_gap_s * self.fps)))
+        self.start = start
+        self.position = start  # source frames consumed so far
+        self._last_kept = None
+
+        # Statistics
+        self.frames_retrieved = 0
+        self.frames_seeked = 0  # jumped over by a seek rather than grabbed one by one
+        self.read_s = 0.0
+
+    def read(self):
+        """(frame, frame_index, pts_ms) of the next sampled frame, or None at the end of the source"""
+        started = time.perf_counter()
+        try:
+            return self._read()
+        finally:
+            self.read_s += time.perf_counter() - started
+
+    def stats(self):
+        return sampling_stats(self.mode, self.fps, self.position - self.start, self.frames_retrieved,
+                              self.frames_seeked, self.read_s)
+
+    def _read(self):
+        if self.mode == "decode":
+            ret, frame = self.cap.read()
+            if not ret:
+                return None
+            self.position += 1
+            self.frames_retrieved += 1
+            return frame, self.position, self.cap.get(cv2.CAP_PROP_POS_MSEC)
+
+        target = self.position + 1
+        if self._last_kept is not None:
+            target = max(target, self._last_kept + max(1, int(self._stride())))
+        if self.mode == "seek" and target - self.position > self.seek_min_gap:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, (target - 1) * 1000.0 / self.fps)
+            landed = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))  # frames before the next one read
+            self.frames_seeked += max(0, landed - self.position)
+            self.position = landed
+        while True:
+            if not self.cap.grab():
+                return None
+            self.position += 1
+            if self.position >= target:
+                break
+        ret, frame = self.cap.retrieve()
+        if not ret:
+            return None
+        self.frames_retrieved += 1
+        self._last_kept = self.position
+        return frame, self.position, self.cap.get(cv2.CAP_PROP_POS_MSEC)
+
+
+class FrameGrabber:
+    """Drains a cv2.VideoCapture on its own thread into a small ring buffer
+
+    Live sources (RTSP/HLS) are read at source rate and the buffer keeps only
+    the newest `capacity` frames, so a slow consumer never lets the FFmpeg
+    buffer back up; `read()` always returns the newest frame and counts
+    everything it skips as dropped. File sources are read in order with
+    backpressure instead, so no frames are lost. Frames are read through a
+    FrameSampler, so skipped frames need not be decoded at all.
+    """
+
+    def __init__(self, cap, camera_id, capacity=2, live=True, sampler=None):
+        self.cap = cap
+        self.sampler = sampler or FrameSampler(cap)
+        self.camera_id = camera_id
+        self.live = live
+        self.buffer = deque(maxlen=max(1, int(capacity)))
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+        self.finished = False
+
+        # Statistics
+        self.frames_read = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def read(self, timeout=1.0):
+        """Next frame to analyse as (frame, frame_index, captured_at, pts_ms), or None
+
+        None means nothing arrived within `timeout`; check `finished` to tell
+        a stalled source from the end of the stream.
+        """
+        with self._cond:
+            if not self.buffer and not self.finished:
+                self._cond.wait(timeout)
+            if not self.buffer:
+                return None
+            if self.live:
+                item = self.buffer.pop()
+                self.frames_dropped += len(self.buffer)
+                self.buffer.clear()
+            else:
+                item = self.buffer.popleft()
+            self._cond.notify_all()
+            return item
+
+    def stats(self):
+        return {
+            "frames_read": self.frames_read,
+            "frames_dropped": self.frames_dropped,
+            "buffered": len(self.buffer),
+            **self.sampler.stats(),
+        }
+
+    def _loop(self):
+        try:
+            while self.running and self.cap.isOpened():
+                item = self.sampler.read()
+                if item is None:
+                    print(f"[{self.camera_id}] End of video or failed to read frame")
+                    break
+                frame, frame_index, pts_ms = item
+                captured_at = time.monotonic()
+                with self._cond:
+                    self.frames_read += 1
+                    if not self.live:
+                        while self.running and len(self.buffer) >= self.buffer.maxlen:
+                            self._cond.wait(0.5)
+                    elif len(self.buffer) >= self.buffer.maxlen:
+                        self.frames_dropped += 1
+                    self.buffer.append((frame, frame_index, captured_at, pts_ms))
+                    self._cond.notify_all()
+        except Exception as e:
+            print(f"[{self.camera_id}] Error grabbing frames: {e}")
+        finally:
+            self.cap.release()
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
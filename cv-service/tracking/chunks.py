@@ -0,0 +1,427 @@
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from .clock import VideoClock
+from .emitter import emitter as default_emitter
+from .worker import SimpleHumanTracker
+
+
+def keyframe_times(path, timeout=120.0):
+    """Keyframe times (s from the first frame) of the first video stream; [] without ffprobe
+
+    Packet timestamps start at the stream's start_time, which is often not
+    zero (e.g. MP4 edit lists, cut recordings), while frame numbers count
+    from the first frame, so times are taken relative to the earliest pts.
+    """
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    return _keyframes_from_packets(out)
+
+
+def _keyframes_from_packets(out):
+    """Keyframe times relative to the earliest packet pts, from ffprobe `pts_time,flags` lines"""
+    start, keys = None, []
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if pts in ("", "N/A"):
+            continue
+        t = float(pts)
+        start = t if start is None else min(start, t)
+        if "K" in flags:
+            keys.append(t)
+    return sorted(t - start for t in keys)
+
+
+def plan_segments(total_frames, fps, parts, keyframes=(), overlap_s=2.0, min_segment_s=30.0):
+    """Split frames 1..total_frames into `parts` (first_frame, last_frame, count_from) segments
+
+    Cuts are moved to the nearest keyframe. Every segment but the first
+    starts about `overlap_s` before its cut (on a keyframe if there is one
+    close by), so its tracker is warmed up and its identities can be
+    stitched to those of the previous segment; frames before `count_from`
+    are tracked but not counted. Segments are at least `min_segment_s` long.
+    """
+    parts = max(1, min(int(parts), int(total_frames / fps // min_segment_s)))
+    keys = sorted({int(round(t * fps)) + 1 for t in keyframes})  # 1-based frame numbers
+    overlap = int(round(overlap_s * fps))
+
+    cuts = []
+    for i in range(1, parts):
+        cut = int(round(i * total_frames / parts)) + 1
+        if keys:
+            cut = min(keys, key=lambda k: abs(k - cut))
+        if 1 < cut <= total_frames and (not cuts or cut > cuts[-1]):
+            cuts.append(cut)
+
+    bounds = [1] + cuts + [total_frames + 1]
+    segments = []
+    for first, following in zip(bounds, bounds[1:]):
+        start = first
+        if first > 1:
+            start = max(1, first - overlap)
+            i = bisect_right(keys, start)
+            if i and keys[i - 1] >= first - 2 * overlap:
+                start = keys[i - 1]
+        segments.append((start, following - 1, first))
+    return segments
+
+
+def _iou(a, b):
+    """Pairwise IoU of (N, 4) and (M, 4) x1y1x2y2 boxes"""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def stitch(tail, head, max_gap=12, iou_threshold=0.3):
+    """Map track ids of a segment's warm-up to the previous segment's ids
+
+    `tail` (end of the previous segment) and `head` (warm-up of the next)
+    are {frame: [(track_id, x1, y1, x2, y2), ...]} over the same stretch of
+    video. Each head frame is matched greedily by IoU against the nearest
+    tail frame (at most `max_gap` frames away) and every head id maps to the
+    tail id it matched most often.
+    """
+    if not tail or not head:
+        return {}
+    tail_frames = np.array(sorted(tail))
+    votes = Counter()
+    for frame, tracks in head.items():
+        near = int(tail_frames[np.abs(tail_frames - frame).argmin()])
+        if abs(near - frame) > max_gap or not tracks or not tail[near]:
+            continue
+        previous = tail[near]
+        iou = _iou(np.array([t[1:] for t in tracks], dtype=np.float64),
+                   np.array([t[1:] for t in previous], dtype=np.float64))
+        while iou.size:
+            i, j = np.unravel_index(iou.argmax(), iou.shape)
+            if iou[i, j] < iou_threshold:
+                break
+            votes[(tracks[i][0], previous[j][0])] += 1
+            iou[i, :] = -1
+            iou[:, j] = -1
+
+    mapping, taken = {}, set()
+    for (head_id, tail_id), _ in votes.most_common():
+        if head_id not in mapping and tail_id not in taken:
+            mapping[head_id] = tail_id
+            taken.add(tail_id)
+    return mapping
+
+
+# Set in each segment process by _init_process
+_progress = None  # shared array: last frame reached per segment
+_cancel = None
+
+
+def _init_process(progress, cancel, threads):
+    global _progress, _cancel
+    _progress, _cancel = progress, cancel
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+class _SegmentTracker(SimpleHumanTracker):
+    """SimpleHumanTracker over one segment that collects results instead of sending events"""
+
+    def __init__(self, index, tail_from, **kwargs):
+        super().__init__(**kwargs)
+        self.index = index
+        self.tail_from = tail_from
+        self.crossings = []  # (frame, video_s, track_id, "enter" | "exit")
+        self.head = {}  # warm-up tracks, stitched to the previous segment
+        self.tail = {}  # tracks the next segment's warm-up is stitched to
+        self.warmup_frames_processed = 0  # also analysed by the previous segment
+
+    def emit(self, evt_type, data):
+        if evt_type in ("enter", "exit"):
+            self.crossings.append((self.frame_count, self.clock.video_s, data["trackId"], evt_type))
+
+    def send_stats(self):
+        if _progress is not None:
+            _progress[self.index] = self.frame_count
+
+    def process_frame_simple(self, frame):
+        detected = super().process_frame_simple(frame)
+        if detected and self.frame_count < self.count_from:
+            self.warmup_frames_processed += 1
+        return detected
+
+    def update_tracks(self, frame, boxes, confs):
+        outputs = super().update_tracks(frame, boxes, confs)
+        tracks = [(int(t), float(x1), float(y1), float(x2), float(y2)) for x1, y1, x2, y2, t in outputs]
+        if self.frame_count < self.count_from:
+            self.head[self.frame_count] = tracks
+        if self.tail_from is not None and self.frame_count >= self.tail_from:
+            self.tail[self.frame_count] = tracks
+        return outputs
+
+    def result(self):
+        return {
+            "frame_count": self.frame_count,
+            "video_s": self.clock.video_s,
+            "total_frames_processed": self.total_frames_processed - self.warmup_frames_processed,
+            "people": self.current_people_count,
+            "occupancy": self.occupancy,
+            "ids": sorted(self.track_ids_seen),
+            "crossings": self.crossings,
+            "head": self.head,
+            "tail": self.tail,
+        }
+
+
+def _run_segment(index, segment, tail_from, options):
+    """Segment process: analyse one segment to the end and return its results"""
+    w = _SegmentTracker(index, tail_from, segment=segment, **options)
+    w.start()
+    thread = getattr(w, "processing_thread", None)
+    if thread is None:
+        raise RuntimeError(f"segment {index} could not be started")
+    while thread.is_alive():
+        thread.join(0.5)
+        if _cancel.is_set():
+            w.stop()
+    w.send_stats()
+    return w.result()
+
+
+_EMPTY_RESULT = {"frame_count": 0, "video_s": None, "total_frames_processed": 0, "people": 0, "occupancy": 0,
+                 "ids": [], "crossings": [], "head": {}, "tail": {}}
+
+
+class ChunkedVideoJob:
+    """Analyses an MP4 file as time segments in a process pool and merges the results
+
+    The file is cut into one segment per process at keyframes (see
+    plan_segments). Each segment runs a SimpleHumanTracker in its own
+    process; results are merged in file order as segments complete:
+    line crossings are summed and re-emitted as enter/exit events, and
+    track identities are stitched across cuts from the overlap both
+    neighbours analysed, so `total_detected` counts people rather than
+    per-segment tracks. People-stats events report merged counts plus
+    `progress` while the job runs, and once more with `final` set. Events
+    are stamped on the video timeline (see VideoClock) at the point the
+    merge has reached.
+
+    Annotated recording is not supported here (segments record nothing).
+    """
+
+    def __init__(self, camera_id, file_path, webhook=None, secret=None, processes=None,
+                 emitter=None, overlap_s=2.0, min_segment_s=30.0, stats_interval=5.0, **options):
+        self.camera_id = camera_id
+        self.file_path = file_path
+        self.webhook = webhook
+        self.secret = secret
+        self.emitter = emitter or default_emitter
+        self.processes = max(1, processes or int(os.getenv("CV_MP4_PROCESSES", "0")) or os.cpu_count() or 1)
+        self.overlap_s = overlap_s
+        self.min_segment_s = min_segment_s
+        self.stats_interval = stats_interval
+        self.tracking = options.get("tracking", False)
+        self.clock = VideoClock(live=False, origin_ms=options.get("video_start_ts"))
+        self.options = dict(options, file_path=file_path, record="off", capture_process=False)
+        self.running = False
+        self._thread = None
+        self._cancel = None
+        self._progress = None
+
+        self.segments = []
+        self.fps = 25.0
+        self._results = {}  # segment index -> result
+        self._failed = 0
+        self._merged = 0  # segments merged so far, in file order
+        self._global_ids = {}  # (segment, track_id) -> identity across the file
+        self.identities = 0
+        self.count_in = 0
+        self.count_out = 0
+        self.occupancy = 0
+        self.current_people_count = 0
+        self.total_frames_processed = 0
+        self.started_at = None
+
+    def start(self):
+        cap = cv2.VideoCapture(self.file_path)
+        if not cap.isOpened():
+            print(f"[{self.camera_id}] Failed to open {self.file_path}")
+            return
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        self.fps = fps if fps and fps > 0 else 25.0
+        self.clock = VideoClock(self.fps, live=False, origin_ms=self.clock.origin_ms)
+
+        if total_frames > 0:
+            self.segments = plan_segments(total_frames, self.fps, self.processes,
+                                          keyframe_times(self.file_path), self.overlap_s, self.min_segment_s)
+        else:
+            self.segments = [(1, sys.maxsize, 1)]  # length unknown - one segment to the end
+        print(f"[{self.camera_id}] Chunked MP4 analytics: {len(self.segments)} segment(s) "
+              f"in up to {self.processes} processes")
+
+        self.running = True
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._cancel is not None:
+            self._cancel.set()
+
+    def _run(self):
+        ctx = mp.get_context("spawn")
+        self._progress = ctx.Array("q", len(self.segments), lock=False)
+        self._cancel = ctx.Event()
+        workers = min(self.processes, len(self.segments))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_process,
+                                     initargs=(self._progress, self._cancel, threads)) as pool:
+                futures = {}
+                for i, segment in enumerate(self.segments):
+                    tail_from = self.segments[i + 1][0] if i + 1 < len(self.segments) else None
+                    options = dict(self.options, camera_id=f"{self.camera_id}/{i}")
+                    futures[pool.submit(_run_segment, i, segment, tail_from, options)] = i
+                pending = set(futures)
+                while pending and self.running:
+                    done, pending = wait(pending, timeout=self.stats_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        i = futures[future]
+                        try:
+                            self._results[i] = future.result()
+                        except Exception as e:
+                            print(f"[{self.camera_id}] Segment {i} failed: {e}")
+                            self._results[i] = _EMPTY_RESULT
+                            self._failed += 1
+                    self._merge_ready()
+                    self.send_stats()
+                if pending:
+                    self._cancel.set()
+                    for future in pending:
+                        future.cancel()
+        except Exception as e:
+            print(f"[{self.camera_id}] Error in chunked processing: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.send_stats(final=True)
+            self.running = False
+            print(f"[{self.camera_id}] Chunked MP4 analytics completed in {time.time() - self.started_at:.1f}s")
+
+    def _merge_ready(self):
+        """Merge completed segments that directly follow the merged prefix of the file"""
+        while self._merged in self._results:
+            k = self._merged
+            result = self._results[k]
+            mapping = {}
+            if k:
+                max_gap = max(2, int(round(self.fps)))
+                mapping = stitch(self._results[k - 1]["tail"], result["head"], max_gap=max_gap)
+            for track_id in result["ids"]:
+                previous = (k - 1, mapping[track_id]) if track_id in mapping else None
+                identity = self._global_ids.get(previous)
+                if identity is None:
+                    self.identities += 1
+                    identity = self.identities
+                self._global_ids[(k, track_id)] = identity
+
+            for frame, video_s, track_id, event in result["crossings"]:
+                if event == "enter":
+                    self.count_in += 1
+                else:
+                    self.count_out += 1
+                self.clock.video_s = video_s
+                self.emit(event, {
+                    "trackId": self._global_ids.get((k, track_id), track_id),
+                    "count_in": self.count_in,
+                    "count_out": self.count_out,
+                    "frame_count": frame
+                })
+            self.occupancy = result["occupancy"]
+            self.current_people_count = result["people"]
+            self.total_frames_processed += result["total_frames_processed"]
+            video_s = result["video_s"]  # None if the segment failed
+            self.clock.advance(self.segments[k][1], video_s * 1000.0 if video_s is not None else None)
+            self._merged += 1
+
+    def progress(self):
+        """Share of the file's counted frames analysed so far"""
+        done = total = 0
+        for i, (_, last, count_from) in enumerate(self.segments):
+            length = last - count_from + 1
+            total += length
+            if i in self._results:
+                done += length
+            elif self._progress is not None:
+                done += min(length, max(0, self._progress[i] - count_from + 1))
+        return done / total if total else 0.0
+
+    def send_stats(self, final=False):
+        """Merged counts and progress as a people-stats event"""
+        stats = {
+            "count_in": self.count_in,
+            "count_out": self.count_out,
+            "occupancy": self.occupancy if self.tracking else self.current_people_count,
+            "total_detected": self.identities if self.tracking else self.current_people_count,
+            "total_frames_processed": self.total_frames_processed,
+            "progress": round(self.progress(), 3),
+            "segments": len(self.segments),
+            "segments_done": len(self._results),
+            "segments_failed": self._failed,
+            "final": final,
+            **self.clock.stats()
+        }
+        print(f"[{self.camera_id}] Chunked Stats: {stats}")
+        self.emit("people-stats", stats)
+
+    def emit(self, evt_type, data):
+        """Queue event for the shared webhook emitter (never blocks on the network)"""
+        if not self.webhook:
+            return
+        payload = {
+            "cameraId": self.camera_id,
+            "ts": self.clock.ts_ms(),
+            "type": evt_type,
+            "data": data
+        }
+        self.emitter.emit(self.webhook, payload, self.secret)
+
+    def pipeline_stats(self):
+        return {
+            "progress": round(self.progress(), 3),
+            "segments": len(self.segments),
+            "segments_done": len(self._results),
+            "segments_merged": self._merged,
+            "segments_failed": self._failed,
+            "processes": self.processes,
+            "elapsed_s": round(time.time() - self.started_at, 1) if self.started_at else 0.0,
+        }
+
+
+def create_worker(camera_id, scheduler=None, chunked=False, chunk_processes=None, **options):
+    """SimpleHumanTracker for a camera, or a ChunkedVideoJob for chunked MP4 analytics"""
+    if chunked and options.get("file_path"):
+        for key in ("rtsp_url", "hls_url"):
+            options.pop(key, None)
+        return ChunkedVideoJob(camera_id, processes=chunk_processes, **options)
+    return SimpleHumanTracker(camera_id=camera_id, scheduler=scheduler, **options)
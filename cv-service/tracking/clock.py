@@ -0,0 +1,40 @@
+import math
+import time
+
+
+class VideoClock:
+    """Timeline that stats windows and event timestamps of a camera run on
+
+    Files run on video time. A frame's time is its presentation timestamp,
+    or (frame_index - 1) / fps where the backend reports none. Stats windows
+    and event `ts` therefore follow the video, however fast it is analysed.
+    Event `ts` is `origin_ms` (wall-clock time of the first frame, the job
+    start by default) plus video time. Live sources run on wall-clock time.
+    """
+
+    def __init__(self, fps=25.0, live=True, origin_ms=None):
+        self.fps = fps if fps and math.isfinite(fps) and fps > 0 else 25.0
+        self.live = live
+        self.origin_ms = origin_ms if origin_ms is not None else time.time() * 1000.0
+        self.video_s = 0.0  # video time of the current frame
+
+    def advance(self, frame_index, pts_ms=None):
+        """Move to a source frame (files only; live sources keep wall-clock time)"""
+        if self.live:
+            return
+        if pts_ms is None or not math.isfinite(pts_ms) or (pts_ms <= 0 and frame_index > 1):
+            pts_ms = (frame_index - 1) * 1000.0 / self.fps
+        self.video_s = pts_ms / 1000.0
+
+    def now(self):
+        """Current time in seconds: video time for files, epoch time for live sources"""
+        return time.time() if self.live else self.video_s
+
+    def ts_ms(self, video_s=None):
+        """Event timestamp (epoch ms) of the current frame, or of `video_s` into a file"""
+        if self.live:
+            return int(time.time() * 1000)
+        return int(self.origin_ms + (self.video_s if video_s is None else video_s) * 1000.0)
+
+    def stats(self):
+        return {} if self.live else {"video_s": round(self.video_s, 2)}
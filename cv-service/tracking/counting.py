@@ -0,0 +1,81 @@
+import cv2
+import numpy as np
+
+
+def foot_point(x1, y1, x2, y2):
+    """Bottom-centre of a box - where a person stands relative to lines and zones"""
+    return ((x1 + x2) / 2.0, float(y2))
+
+
+def _side(a, b, p):
+    """Sign of the cross product: which side of line a->b point p is on"""
+    return np.sign((b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0]))
+
+
+class LineCounter:
+    """Counts tracked identities crossing a line segment
+
+    Moving from the left of `line[0] -> line[1]` to its right (in image
+    coordinates, y pointing down) is an "enter", the opposite direction an
+    "exit". Foot points within `margin` pixels of the line are in a
+    hysteresis band: they keep the side the track was last clearly on, so
+    a person standing on the line does not count in and out with every
+    jitter of the detector box.
+    """
+
+    def __init__(self, line, margin=3.0):
+        self.a = tuple(map(float, line[0]))
+        self.b = tuple(map(float, line[1]))
+        self.margin = float(margin)
+        self._length = max(float(np.hypot(self.b[0] - self.a[0], self.b[1] - self.a[1])), 1e-9)
+        self.count_in = 0
+        self.count_out = 0
+        self._last = {}  # track_id -> (side, foot point) where it was last clearly off the line
+
+    def side(self, point):
+        """-1 left of the line, 1 right of it, 0 within the hysteresis band"""
+        a, b = self.a, self.b
+        distance = ((b[0] - a[0]) * (point[1] - a[1]) - (b[1] - a[1]) * (point[0] - a[0])) / self._length
+        if abs(distance) <= self.margin:
+            return 0
+        return 1 if distance > 0 else -1
+
+    def update(self, track_id, point, count=True):
+        """Record a track's new position; returns "enter", "exit" or None
+
+        With `count=False` the position is only recorded (e.g. while a
+        tracker warms up), so nothing is counted.
+        """
+        side = self.side(point)
+        if side == 0:
+            return None
+        prev = self._last.get(track_id)
+        self._last[track_id] = (side, point)
+        if prev is None or not count or prev[0] == side:
+            return None
+        # The track's step since it left the other side must straddle the line's extent
+        if _side(prev[1], point, self.a) == _side(prev[1], point, self.b):
+            return None
+
+        if side > 0:
+            self.count_in += 1
+            return "enter"
+        self.count_out += 1
+        return "exit"
+
+    def forget(self, active_ids):
+        """Drop positions of tracks the tracker no longer reports"""
+        self._last = {k: v for k, v in self._last.items() if k in active_ids}
+
+
+class ZoneCounter:
+    """Occupancy of a polygon, counted by foot point"""
+
+    def __init__(self, polygon):
+        self.polygon = np.asarray(polygon, dtype=np.float32).reshape(-1, 1, 2)
+
+    def contains(self, point):
+        return cv2.pointPolygonTest(self.polygon, (float(point[0]), float(point[1])), False) >= 0
+
+    def count(self, points):
+        return sum(1 for p in points if self.contains(p))
@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .signing import signed_batch, signed_event
+
+
+class WebhookEmitter:
+    """Delivers worker events to the Node webhooks off the processing threads
+
+    Events from every camera go into one bounded queue (oldest dropped on
+    overflow). A background thread drains it, groups events per webhook URL
+    into batches of up to `max_batch_size`, and POSTs them over a pooled
+    keep-alive session with retries and exponential backoff. A batch of one
+    is sent as a plain event body; larger batches as {"events": [...]}. A
+    batch the webhook stored only in part (207 with per-event results) is
+    never resent whole; only its events that failed server-side are retried.
+
+    Serialization and HMAC signing also happen on the sender thread: each
+    body is canonical JSON bytes signed once (per event or per batch, see
+    tracking.signing) and those exact bytes are what goes on the wire.
+    """
+
+    def __init__(self, max_queue=1000, max_batch_size=50, flush_interval_ms=200,
+                 max_retries=3, backoff_s=0.5, timeout=5.0, pool_size=10):
+        self.max_queue = max(1, int(max_queue))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.flush_interval = max(0.0, float(flush_interval_ms) / 1000.0)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_s = backoff_s
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+        self._stopped = False  # stop() was called; late events are dropped, not a restart
+
+        # Statistics
+        self.events_sent = 0
+        self.events_failed = 0
+        self.events_dropped = 0
+        self.batches_sent = 0
+        self.retries = 0
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+            self._stopped = False
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Flush what is queued (best effort) and stop the sender thread"""
+        with self._cond:
+            self.running = False
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def emit(self, webhook, event, secret=None):
+        """Queue one unsigned event; never blocks on the network
+
+        The sender thread starts on the first event. After stop() events are
+        dropped (and counted) until start() is called again.
+        """
+        if not self.running and not self._stopped:
+            self.start()
+        with self._cond:
+            if self._stopped:
+                self.events_dropped += 1
+                return
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.events_dropped += 1
+            self._queue.append((webhook, secret, event, time.monotonic()))
+            self._cond.notify_all()
+
+    def stats(self):
+        return {
+            "queued": len(self._queue),
+            "events_sent": self.events_sent,
+            "events_failed": self.events_failed,
+            "events_dropped": self.events_dropped,
+            "batches_sent": self.batches_sent,
+            "retries": self.retries,
+        }
+
+    def _take_batch(self):
+        with self._cond:
+            while self.running and not self._queue:
+                self._cond.wait()
+            if self._queue:
+                deadline = self._queue[0][3] + self.flush_interval
+                while self.running and len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            batch = []
+            while self._queue and len(batch) < self.max_batch_size:
+                batch.append(self._queue.popleft())
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if not self.running:
+                    return
+                continue
+            # Keep per-webhook order; one request per target URL and secret
+            groups = {}
+            for webhook, secret, event, _ in batch:
+                groups.setdefault((webhook, secret), []).append(event)
+            for (webhook, secret), events in groups.items():
+                self._post(webhook, secret, events)
+
+    def _post(self, webhook, secret, events):
+        headers = {"Content-Type": "application/json"}
+        for attempt in range(self.max_retries + 1):
+            try:
+                body = signed_event(events[0], secret) if len(events) == 1 else signed_batch(events, secret)
+            except (TypeError, ValueError) as e:
+                print(f"[emitter] Dropping unserializable events for {webhook}: {e}")
+                self.events_failed += len(events)
+                return
+            try:
+                response = self.session.post(webhook, data=body, headers=headers, timeout=self.timeout)
+                if response.status_code == 207:
+                    # Part of the batch was stored: resending it whole would store those
+                    # events twice, so only events that failed server-side are retried
+                    events = self._partial(webhook, events, response)
+                    if not events:
+                        return
+                elif response.status_code < 500:
+                    if response.status_code != 200:
+                        print(f"[emitter] Webhook error: {response.status_code} from {webhook}")
+                        self.events_failed += len(events)
+                    else:
+                        self.events_sent += len(events)
+                        self.batches_sent += 1
+                    return
+                else:
+                    print(f"[emitter] Webhook error: {response.status_code} from {webhook}")
+            except requests.RequestException as e:
+                print(f"[emitter] Error sending webhook: {e}")
+            if attempt < self.max_retries and self.running:
+                self.retries += 1
+                time.sleep(self.backoff_s * (2 ** attempt))
+            else:
+                break
+        self.events_failed += len(events)
+
+    def _partial(self, webhook, events, response):
+        """Count a 207 batch answer per event; returns the events worth retrying
+
+        The body carries one {"ok", "status"} result per event, in order.
+        """
+        try:
+            results = response.json()["results"]
+            if len(results) != len(events):
+                raise ValueError("result count does not match the batch")
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[emitter] Unreadable partial result from {webhook}: {e}")
+            self.events_failed += len(events)  # unknown which were stored - never resend
+            return []
+        retry, stored = [], 0
+        for event, result in zip(events, results):
+            if result.get("ok"):
+                stored += 1
+                self.events_sent += 1
+            elif result.get("status", 500) >= 500:
+                retry.append(event)
+            else:
+                self.events_failed += 1
+        self.batches_sent += 1
+        print(f"[emitter] Partial write at {webhook}: {stored} of {len(events)} events stored, "
+              f"{len(retry)} to retry")
+        return retry
+
+emitter = WebhookEmitter()
@@ -0,0 +1,82 @@
+import math
+
+
+class FrameRateGovernor:
+    """Adapts how many source frames a camera skips between detections
+
+    The stride starts at the requested `frame_skip` and is raised or lowered
+    from measured inference time so the camera stays inside `cpu_budget`
+    (fraction of one core spent on detection) and/or keeps its end-to-end
+    lag under `latency_target_ms`. With neither target set the stride is
+    simply `frame_skip`, raised to match `sample_fps` if that is given.
+    """
+
+    def __init__(self, frame_skip=1, source_fps=25.0, cpu_budget=None,
+                 latency_target_ms=None, max_skip=30, smoothing=0.2, adjust_every=10,
+                 sample_fps=None):
+        self.source_fps = source_fps if source_fps and math.isfinite(source_fps) and source_fps > 0 else 25.0
+        self.base_skip = max(1, int(frame_skip))
+        if sample_fps:
+            # e.g. 2 fps of a 25 fps file -> every 12th frame
+            self.base_skip = max(self.base_skip, int(round(self.source_fps / sample_fps)))
+        self.max_skip = max(self.base_skip, int(max_skip))
+        self.cpu_budget = cpu_budget
+        self.latency_target_ms = latency_target_ms
+        self.smoothing = smoothing
+        self.adjust_every = max(1, int(adjust_every))
+
+        self.skip = self.base_skip
+        self.inference_ms = 0.0
+        self.lag_ms = 0.0
+        self._latency_skip = self.base_skip
+        self._last_index = None
+        self._samples = 0
+
+    @property
+    def adaptive(self):
+        return bool(self.cpu_budget) or bool(self.latency_target_ms)
+
+    def should_process(self, frame_index):
+        """True if this source frame is due for detection"""
+        if self._last_index is not None and frame_index - self._last_index < self.skip:
+            return False
+        self._last_index = frame_index
+        return True
+
+    def record(self, inference_ms, lag_ms=None):
+        """Feed one measurement and re-evaluate the stride periodically"""
+        a = self.smoothing
+        self.inference_ms = inference_ms if not self._samples else (1 - a) * self.inference_ms + a * inference_ms
+        if lag_ms is not None:
+            self.lag_ms = lag_ms if not self._samples else (1 - a) * self.lag_ms + a * lag_ms
+        self._samples += 1
+        if self.adaptive and self._samples % self.adjust_every == 0:
+            self._adjust()
+
+    def analysis_fps(self):
+        return self.source_fps / self.skip
+
+    def _adjust(self):
+        skip = self.base_skip
+
+        if self.cpu_budget:
+            # detection seconds per second of video = inference_s * source_fps / skip
+            needed = self.inference_ms / 1000.0 * self.source_fps / self.cpu_budget
+            skip = max(skip, math.ceil(needed))
+
+        if self.latency_target_ms:
+            if self.lag_ms > self.latency_target_ms:
+                self._latency_skip += 1
+            elif self.lag_ms < 0.5 * self.latency_target_ms:
+                self._latency_skip -= 1
+            self._latency_skip = min(max(self._latency_skip, self.base_skip), self.max_skip)
+            skip = max(skip, self._latency_skip)
+
+        self.skip = min(skip, self.max_skip)
+
+    def stats(self):
+        return {
+            "frame_skip": self.skip,
+            "analysis_fps": round(self.analysis_fps(), 2),
+            "inference_ms": round(self.inference_ms, 1),
+        }
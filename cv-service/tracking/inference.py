@@ -0,0 +1,183 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+def to_detections(result):
+    """Convert one ultralytics result into (xyxy Nx4, conf N) numpy arrays"""
+    if result is None or result.boxes is None or len(result.boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32)
+    boxes = result.boxes
+    return (boxes.xyxy.cpu().numpy().astype(np.float32),
+            boxes.conf.cpu().numpy().astype(np.float32))
+
+
+class _Request:
+    __slots__ = ("camera_id", "frame", "model", "conf", "imgsz", "future", "submitted_at")
+
+    def __init__(self, camera_id, frame, model, conf, imgsz):
+        self.camera_id = camera_id
+        self.frame = frame
+        self.model = model
+        self.conf = conf
+        self.imgsz = imgsz
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+
+
+class InferenceScheduler:
+    """Batches the latest frame of every camera into shared detector passes
+
+    Workers call `infer()` from their own threads with the registry model
+    they hold; frames are only batched with frames for the same model, and
+    models with a fixed batch size (`SharedModel.max_batch`) get passes of
+    at most that many frames. Only
+    the newest frame per camera is kept; a batch is flushed as soon as every
+    registered camera has a frame waiting, `max_batch_size` is reached, or
+    the oldest frame has waited `max_wait_ms`.
+    """
+
+    def __init__(self, max_batch_size=8, max_wait_ms=20):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms) / 1000.0)
+
+        self._pending = {}           # camera_id -> _Request, insertion ordered
+        self._cameras = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+
+        # Statistics
+        self.batches_run = 0
+        self.frames_run = 0
+        self.frames_replaced = 0
+
+    def start(self):
+        """Start the batching thread"""
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        print(f"[scheduler] Batched inference started: max_batch_size={self.max_batch_size}, "
+              f"max_wait_ms={self.max_wait * 1000:.0f}")
+
+    def stop(self):
+        """Stop the batching thread and fail any waiting requests"""
+        with self._cond:
+            self.running = False
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._cond.notify_all()
+        for req in pending:
+            req.future.cancel()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def register(self, camera_id):
+        with self._cond:
+            self._cameras.add(camera_id)
+
+    def unregister(self, camera_id):
+        with self._cond:
+            self._cameras.discard(camera_id)
+            req = self._pending.pop(camera_id, None)
+            self._cond.notify_all()
+        if req:
+            req.future.cancel()
+
+    def submit(self, camera_id, frame, model, conf=0.35, imgsz=None):
+        """Queue a frame for the next batch; replaces any older pending frame"""
+        req = _Request(camera_id, frame, model, conf, imgsz or model.imgsz)
+        with self._cond:
+            if not self.running:
+                raise RuntimeError("Inference scheduler is not running")
+            old = self._pending.pop(camera_id, None)
+            if old:
+                self.frames_replaced += 1
+            self._pending[camera_id] = req
+            self._cond.notify_all()
+        if old:
+            old.future.cancel()
+        return req.future
+
+    def infer(self, camera_id, frame, model, conf=0.35, imgsz=None, timeout=None):
+        """Blocking helper: submit a frame and wait for its detections"""
+        return self.submit(camera_id, frame, model, conf, imgsz).result(timeout=timeout)
+
+    def stats(self):
+        return {
+            "batches_run": self.batches_run,
+            "frames_run": self.frames_run,
+            "frames_replaced": self.frames_replaced,
+            "avg_batch_size": round(self.frames_run / self.batches_run, 2) if self.batches_run else 0,
+            "cameras": len(self._cameras),
+        }
+
+    def _ready(self):
+        expected = min(self.max_batch_size, max(1, len(self._cameras)))
+        return len(self._pending) >= expected
+
+    def _take_batch(self):
+        with self._cond:
+            while self.running and not self._pending:
+                self._cond.wait()
+            if not self.running:
+                return []
+            oldest = next(iter(self._pending.values()))
+            deadline = oldest.submitted_at + self.max_wait
+            while self.running and not self._ready():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = []
+            for camera_id in list(self._pending)[:self.max_batch_size]:
+                batch.append(self._pending.pop(camera_id))
+            return batch
+
+    def _loop(self):
+        while self.running:
+            batch = self._take_batch()
+            if not batch:
+                continue
+            # Frames can only share a forward pass on the same model and input size
+            groups = {}
+            for req in batch:
+                groups.setdefault((id(req.model), req.imgsz), []).append(req)
+            for reqs in groups.values():
+                # Fixed-batch exports (TorchScript) run their frames one pass at a time
+                step = reqs[0].model.max_batch or len(reqs)
+                for i in range(0, len(reqs), step):
+                    self._run(reqs[i:i + step])
+
+    def _run(self, reqs):
+        reqs = [r for r in reqs if r.future.set_running_or_notify_cancel()]
+        if not reqs:
+            return
+        conf = min(r.conf for r in reqs)
+        try:
+            results = reqs[0].model.predict(
+                source=[r.frame for r in reqs],
+                conf=conf,
+                verbose=False,
+                classes=[0],  # Only person class
+                imgsz=reqs[0].imgsz
+            )
+        except Exception as e:
+            print(f"[scheduler] Batch inference failed: {e}")
+            for r in reqs:
+                r.future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.frames_run += len(reqs)
+        for r, result in zip(reqs, results):
+            boxes, confs = to_detections(result)
+            if r.conf > conf:
+                keep = confs >= r.conf
+                boxes, confs = boxes[keep], confs[keep]
+            r.future.set_result((boxes, confs))
@@ -0,0 +1,153 @@
+import importlib.util
+import json
+import os
+import threading
+import zipfile
+
+import numpy as np
+
+
+# Detector backends: "eager" runs the .pt weights in PyTorch; the others load
+# the graph written by export_models.py next to them (yolov8n.onnx, ...)
+EXPORT_SUFFIX = {"onnx": ".onnx", "torchscript": ".torchscript"}
+
+
+def export_metadata(path):
+    """Metadata ultralytics stores in a TorchScript export (imgsz, batch, ...); {} if unreadable
+
+    TorchScript files are zip archives and the metadata is the extra file
+    config.txt, so this needs no torch.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.endswith("/extra/config.txt"):
+                    return json.loads(archive.read(name))
+    except (OSError, ValueError, zipfile.BadZipFile):
+        pass
+    return {}
+
+
+class SharedModel:
+    """One loaded detector shared by every camera using the same settings"""
+
+    def __init__(self, key, model, max_batch=None):
+        self.key = key
+        self.name, self.imgsz, self.device = key
+        self.model = model
+        # Largest batch one forward pass takes; None for dynamic-batch models.
+        # TorchScript exports are traced at a fixed batch size
+        self.max_batch = max_batch
+        self.refcount = 0
+        # ultralytics predictors keep per-call state, so one forward pass at a time
+        self.lock = threading.Lock()
+
+    def predict(self, **kwargs):
+        kwargs.setdefault("imgsz", self.imgsz)
+        if self.device:
+            kwargs.setdefault("device", self.device)
+        with self.lock:
+            return self.model.predict(**kwargs)
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded detectors keyed by (model name, imgsz, device)
+
+    `acquire()` loads and warms a model the first time it is asked for and
+    hands the same instance to later callers; `release()` drops the model
+    once the last camera using it has stopped. With an exported `backend`
+    the exported file is loaded instead, falling back to the eager weights
+    if it is missing or, for fixed-shape TorchScript, exported at another
+    imgsz.
+    """
+
+    def __init__(self, warmup=True):
+        self.warmup = warmup
+        self._entries = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, name='yolov8n.pt', imgsz=640, device=None, backend="eager"):
+        name = self.resolve(name, backend, imgsz)
+        key = (name, int(imgsz), device)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry:
+                    entry.refcount += 1
+                    return entry
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # Someone else is loading this model - wait for them and retry
+            loading.wait()
+
+        try:
+            max_batch = None
+            if name.endswith(EXPORT_SUFFIX["torchscript"]):
+                max_batch = max(1, int(export_metadata(name).get("batch", 1)))
+            entry = SharedModel(key, self._load(name, imgsz, device), max_batch)
+            entry.refcount = 1
+            with self._lock:
+                self._entries[key] = entry
+            return entry
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            loading.set()
+
+    @staticmethod
+    def resolve(name, backend="eager", imgsz=None):
+        """Model file to load for `backend`; the eager weights if no usable export"""
+        if not backend or backend == "eager":
+            return name
+        if backend not in EXPORT_SUFFIX:
+            raise ValueError(f"Unknown detector backend: {backend}")
+        path = os.path.splitext(name)[0] + EXPORT_SUFFIX[backend]
+        if not os.path.isfile(path):
+            print(f"[models] No {backend} export at {path}, using {name}")
+            return name
+        if backend == "onnx" and importlib.util.find_spec("onnxruntime") is None:
+            print(f"[models] onnxruntime not installed, using {name}")
+            return name
+        if backend == "torchscript" and imgsz is not None:
+            exported = export_metadata(path).get("imgsz")
+            if exported and list(exported) != [int(imgsz), int(imgsz)]:
+                print(f"[models] {path} was exported at imgsz={exported}, not {imgsz}; using {name}")
+                return name
+        return path
+
+    def release(self, entry):
+        if entry is None:
+            return
+        with self._lock:
+            entry.refcount -= 1
+            if entry.refcount > 0 or self._entries.get(entry.key) is not entry:
+                return
+            del self._entries[entry.key]
+        entry.model = None
+        print(f"[models] Unloaded {entry.name} (imgsz={entry.imgsz})")
+
+    def stats(self):
+        with self._lock:
+            return [
+                {"model": e.name, "imgsz": e.imgsz, "device": e.device, "refcount": e.refcount}
+                for e in self._entries.values()
+            ]
+
+    def _load(self, name, imgsz, device):
+        from ultralytics import YOLO
+
+        print(f"[models] Loading {name} (imgsz={imgsz})")
+        model = YOLO(name, task="detect")
+        if self.warmup:
+            try:
+                dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+                model.predict(source=dummy, imgsz=imgsz, device=device, verbose=False)
+            except Exception as e:
+                print(f"[models] Warm-up failed for {name}: {e}")
+        return model
+
+
+registry = ModelRegistry()
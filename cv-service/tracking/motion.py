@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides whether a frame is worth a detector pass
+
+    Each frame is shrunk to `width` pixels wide, converted to gray and
+    blurred, then compared with the frame of the last detection. A pixel
+    counts as changed when it differs by more than `pixel_delta`; motion is
+    declared when the changed fraction of the frame exceeds `threshold`, or
+    the changed fraction inside any of `zones` exceeds that zone's own
+    threshold (so e.g. a bed can be more sensitive than a corridor).
+
+    Comparing against the last detected frame rather than the previous one
+    means slow movement still adds up to a detection. A detection is also
+    forced every `redetect_s` seconds of video so counts cannot go stale.
+    `should_detect()` only scores a frame; call `commit()` once the detector
+    actually ran on it to make it the new reference.
+    """
+
+    def __init__(self, threshold=0.002, zones=None, redetect_s=5.0, source_fps=25.0,
+                 width=160, pixel_delta=25):
+        self.threshold = threshold
+        self.zones = zones or []  # [(polygon in frame pixels, threshold), ...]
+        self.redetect_frames = max(1, int(round(redetect_s * source_fps))) if redetect_s else None
+        self.width = width
+        self.pixel_delta = pixel_delta
+
+        self._reference = None
+        self._reference_index = None
+        self._last = None  # (frame_index, shrunk frame) of the last frame scored
+        self._masks = None
+        self._scale = None
+
+        # Statistics
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self.score = 0.0
+
+    def should_detect(self, frame, frame_index):
+        """True if the detector should run on this frame (see `commit`)"""
+        small = self._shrink(frame)
+        self._last = (frame_index, small)
+        self.frames_checked += 1
+
+        due = (self._reference is None
+               or (self.redetect_frames and frame_index - self._reference_index >= self.redetect_frames))
+        if not due:
+            changed = cv2.absdiff(small, self._reference) > self.pixel_delta
+            due = self._moved(changed)
+        if due:
+            return True
+        self.frames_skipped += 1
+        return False
+
+    def commit(self, frame, frame_index):
+        """Make a frame the detector ran on the reference later frames are compared with"""
+        if self._last is not None and self._last[0] == frame_index:
+            small = self._last[1]
+        else:
+            small = self._shrink(frame)
+        self._reference = small
+        self._reference_index = frame_index
+
+    def stats(self):
+        return {
+            "motion_skipped": self.frames_skipped,
+            "motion_skip_ratio": round(self.frames_skipped / self.frames_checked, 3) if self.frames_checked else 0.0,
+        }
+
+    def _moved(self, changed):
+        self.score = float(changed.mean())
+        if self.score > self.threshold:
+            return True
+        for mask, area, threshold in self._masks:
+            if np.count_nonzero(changed & mask) / area > threshold:
+                return True
+        return False
+
+    def _shrink(self, frame):
+        h, w = frame.shape[:2]
+        if self._scale is None:
+            self._scale = min(1.0, self.width / float(w))
+            self._build_masks(int(round(h * self._scale)), int(round(w * self._scale)))
+        size = (int(round(w * self._scale)), int(round(h * self._scale)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _build_masks(self, h, w):
+        self._masks = []
+        for polygon, threshold in self.zones:
+            mask = np.zeros((h, w), dtype=np.uint8)
+            points = np.round(np.asarray(polygon, dtype=np.float32) * self._scale).astype(np.int32)
+            cv2.fillPoly(mask, [points.reshape(-1, 1, 2)], 1)
+            area = int(mask.sum())
+            if area:
+                self._masks.append((mask.astype(bool), area, threshold))
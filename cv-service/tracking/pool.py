@@ -0,0 +1,286 @@
+import multiprocessing as mp
+import os
+import threading
+import time
+
+
+def _serve(index, conn, batch_options):
+    """Worker process: runs the cameras the supervisor assigns to it"""
+    from .chunks import create_worker
+    from .emitter import emitter
+    from .inference import InferenceScheduler
+
+    scheduler = InferenceScheduler(**batch_options) if batch_options is not None else None
+    if scheduler:
+        scheduler.start()
+    emitter.start()
+    parent = os.getppid()
+    workers = {}
+    print(f"[pool-{index}] Worker process {os.getpid()} ready")
+
+    try:
+        while True:
+            if not conn.poll(1.0):
+                if os.getppid() != parent:  # supervisor is gone
+                    break
+                continue
+            seq, op, *args = conn.recv()
+            try:
+                if op == "start":
+                    camera_id, options = args
+                    if camera_id not in workers:
+                        w = create_worker(camera_id, scheduler=scheduler, **options)
+                        workers[camera_id] = w
+                        w.start()
+                    reply = True
+                elif op == "stop":
+                    w = workers.pop(args[0], None)
+                    if w:
+                        w.stop()
+                    reply = w is not None
+                elif op == "status":
+                    w = workers.get(args[0])
+                    reply = w.pipeline_stats() if w else None
+                elif op == "health":
+                    reply = {
+                        "cameras": list(workers.keys()),
+                        "scheduler": scheduler.stats() if scheduler else None,
+                        "emitter": emitter.stats(),
+                    }
+                elif op == "shutdown":
+                    conn.send((seq, "ok", True))
+                    break
+                else:
+                    raise ValueError(f"unknown command {op!r}")
+                conn.send((seq, "ok", reply))
+            except Exception as e:
+                conn.send((seq, "error", f"{type(e).__name__}: {e}"))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for w in workers.values():
+            w.stop()
+        if scheduler:
+            scheduler.stop()
+        emitter.stop()
+        print(f"[pool-{index}] Worker process {os.getpid()} exiting")
+
+
+class PoolError(RuntimeError):
+    """A worker process is unavailable or could not carry out a command"""
+
+
+class _Slot:
+    """Supervisor-side handle of one worker process"""
+
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.lock = threading.Lock()  # one request/response on the pipe at a time
+        self.seq = 0  # id of the last request; late replies to earlier ones are discarded
+        self.cameras = {}  # camera_id -> start options, replayed after a restart
+        self.restarts = 0
+        self.started_at = None
+        self.failures = 0  # consecutive deaths shortly after a (re)start
+        self.retry_at = 0.0
+
+
+class WorkerPool:
+    """Runs cameras in `processes` worker processes instead of threads of the API process
+
+    Each process has its own detector registry, batching scheduler and
+    webhook emitter, so decoding and NumPy work of different processes do
+    not share a GIL. Cameras go to the process with the fewest cameras. A
+    monitor thread restarts a process that died and starts its cameras
+    again (with exponential backoff if it keeps dying right after
+    starting); a crash only affects the cameras of that process. Only live
+    cameras are restarted: a file job would be analysed again from the
+    start and its events sent twice, so it is dropped instead.
+
+    Camera state changes only once the process has confirmed the command.
+    Calls raise PoolError if a process is unavailable, TimeoutError if it
+    does not answer in time.
+    """
+
+    def __init__(self, processes=2, batch_options=None, monitor_interval=2.0, timeout=30.0,
+                 min_uptime_s=10.0, max_backoff_s=60.0):
+        self.processes = max(1, int(processes))
+        self.batch_options = batch_options
+        self.monitor_interval = monitor_interval
+        self.timeout = timeout
+        self.min_uptime_s = min_uptime_s
+        self.max_backoff_s = max_backoff_s
+        self._ctx = mp.get_context("spawn")  # no forked torch/OpenCV thread state
+        self._slots = [_Slot(i) for i in range(self.processes)]
+        self._assignments = {}  # camera_id -> slot
+        self._lock = threading.Lock()
+        self._monitor = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for slot in self._slots:
+            self._spawn(slot)
+        self._monitor = threading.Thread(target=self._watch, daemon=True)
+        self._monitor.start()
+
+    def stop(self, timeout=10.0):
+        self.running = False
+        for slot in self._slots:
+            try:
+                self._request(slot, "shutdown", timeout=timeout)
+            except Exception:
+                pass
+            slot.process.join(timeout=timeout)
+            if slot.process.is_alive():
+                slot.process.terminate()
+        with self._lock:
+            self._assignments.clear()
+
+    def start_camera(self, camera_id, options):
+        """Start a camera in the least loaded process; False if it is already running"""
+        with self._lock:
+            if camera_id in self._assignments:
+                return False
+            slot = min(self._slots, key=lambda s: len(s.cameras))
+            self._assignments[camera_id] = slot  # reserved until the process confirms
+        try:
+            self._request(slot, "start", camera_id, options)
+        except Exception:
+            with self._lock:
+                self._assignments.pop(camera_id, None)
+            # A process that is merely slow still starts the camera later; have it
+            # stopped again right after so it cannot run untracked
+            self._send(slot, "stop", camera_id)
+            raise
+        with self._lock:
+            slot.cameras[camera_id] = options
+        return True
+
+    def stop_camera(self, camera_id):
+        with self._lock:
+            slot = self._assignments.get(camera_id)
+            if slot is None:
+                return False
+        try:
+            self._request(slot, "stop", camera_id)
+        except TimeoutError:
+            pass  # the stop is queued behind the slow command and runs after it
+        with self._lock:
+            self._assignments.pop(camera_id, None)
+            slot.cameras.pop(camera_id, None)
+        return True
+
+    def status(self, camera_id):
+        """Pipeline stats of a camera, or None if it is not running"""
+        with self._lock:
+            slot = self._assignments.get(camera_id)
+        if slot is None:
+            return None
+        return self._request(slot, "status", camera_id)
+
+    def cameras(self):
+        with self._lock:
+            return list(self._assignments.keys())
+
+    def stats(self):
+        """Per-process health for /health"""
+        stats = []
+        for slot in self._slots:
+            alive = slot.process is not None and slot.process.is_alive()
+            entry = {
+                "process": slot.index,
+                "pid": slot.process.pid if slot.process else None,
+                "alive": alive,
+                "restarts": slot.restarts,
+                "uptime_s": round(time.time() - slot.started_at, 1) if slot.started_at else None,
+                "cameras": list(slot.cameras.keys()),
+            }
+            if alive:
+                try:
+                    entry.update(self._request(slot, "health", timeout=2.0))
+                except Exception as e:
+                    entry["error"] = str(e)
+            stats.append(entry)
+        return stats
+
+    def _spawn(self, slot):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_serve, args=(slot.index, child_conn, self.batch_options),
+            name=f"cv-worker-{slot.index}")
+        process.start()
+        child_conn.close()
+        slot.process, slot.conn = process, parent_conn
+        slot.started_at = time.time()
+
+    def _send(self, slot, op, *args):
+        """Send a command without waiting for its reply (best effort)"""
+        with slot.lock:
+            slot.seq += 1
+            try:
+                slot.conn.send((slot.seq, op, *args))
+            except (OSError, ValueError):
+                pass
+
+    def _request(self, slot, op, *args, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with slot.lock:
+            slot.seq += 1
+            seq, conn = slot.seq, slot.conn
+            try:
+                conn.send((seq, op, *args))
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not conn.poll(remaining):
+                        raise TimeoutError(f"worker process {slot.index} did not answer {op!r}")
+                    reply_seq, status, reply = conn.recv()
+                    if reply_seq == seq:
+                        break
+                    # Late reply to a request that already timed out
+            except TimeoutError:
+                raise
+            except (EOFError, OSError, ValueError) as e:
+                raise PoolError(f"worker process {slot.index} is unavailable: {e}")
+        if status == "error":
+            raise PoolError(reply)
+        return reply
+
+    def _watch(self):
+        while self.running:
+            time.sleep(self.monitor_interval)
+            for slot in self._slots:
+                if not self.running or slot.process.is_alive():
+                    continue
+                now = time.time()
+                if not slot.retry_at:
+                    # Just noticed: back off if it keeps dying right after starting
+                    crashed_early = now - slot.started_at < self.min_uptime_s
+                    slot.failures = slot.failures + 1 if crashed_early else 0
+                    delay = min(self.max_backoff_s, 2 ** slot.failures) if slot.failures else 0
+                    slot.retry_at = now + delay
+                    print(f"[pool] Worker process {slot.index} (pid {slot.process.pid}) died "
+                          f"with exit code {slot.process.exitcode}; restarting {len(slot.cameras)} "
+                          f"camera(s) in {delay}s")
+                if now < slot.retry_at:
+                    continue
+                slot.retry_at = 0.0
+                with slot.lock:
+                    slot.conn.close()
+                    self._spawn(slot)
+                    slot.restarts += 1
+                with self._lock:
+                    # Restarting a file job would analyse it again and resend its events
+                    for camera_id, options in list(slot.cameras.items()):
+                        if options.get("file_path"):
+                            print(f"[pool] Dropping file job {camera_id} of crashed worker process {slot.index}")
+                            slot.cameras.pop(camera_id)
+                            self._assignments.pop(camera_id, None)
+                    cameras = list(slot.cameras.items())
+                for camera_id, options in cameras:
+                    try:
+                        self._request(slot, "start", camera_id, options)
+                    except Exception as e:
+                        print(f"[pool] Could not restart {camera_id}: {e}")
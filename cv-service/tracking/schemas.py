@@ -1,8 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Literal
 
 Point = Tuple[int, int]
 
+class MotionZone(BaseModel):
+    polygon: List[Point]
+    threshold: float = 0.01              # changed fraction of this zone that counts as motion
+
 class StartBody(BaseModel):
     cameraId: str
     rtsp: str | None = None              # RTSP URL for live cameras
@@ -16,6 +20,24 @@ class StartBody(BaseModel):
     imgsz: int = 640
     frame_skip: int = 1                  # 2–3 for CPU savings
     model: str = "yolov8n.pt"            # swapable
+    cpu_budget: float | None = None      # target share of one core for detection; raises frame_skip adaptively
+    latency_target_ms: int | None = None # target capture-to-result lag; raises frame_skip adaptively
+    record: Literal["off", "full", "sampled", "window"] | None = None  # annotated video; default full for files, off for live
+    record_every: int = 1                # "sampled": keep every Nth frame
+    record_start_s: float = 0.0          # "window": clip start in video seconds
+    record_duration_s: float | None = None  # "window": clip length in video seconds
+    tracking: bool = False               # DeepSort identities: enter/exit on `line`, occupancy in `zone`
+    motion_gate: bool = False            # skip detection while nothing moves, carrying the last result forward
+    motion_threshold: float = 0.002      # changed fraction of the whole frame that counts as motion
+    motion_zones: List[MotionZone] | None = None  # more (or less) sensitive areas, e.g. beds
+    redetect_s: float = 5.0              # force a detection at least this often (video seconds)
+    capture_process: bool = False        # decode in a separate process, frames passed in shared memory
+    sampling: Literal["decode", "grab", "seek"] | None = None  # skipped frames: decoded, only grabbed, or seeked over (files)
+    sample_fps: float | None = None      # analyse about this many frames per video second; raises frame_skip
+    chunked: bool = False                # MP4: analyse time segments in parallel processes and merge the results
+    chunk_processes: int | None = None   # segment processes; default CV_MP4_PROCESSES or one per core
+    video_start_ts: int | None = None    # MP4: wall-clock ms of the first frame; event ts = this + video time (default: job start)
+    batched: bool | None = None          # share detector batches with other cameras; default live only (true: MP4 jobs sharing a GPU)
 
 class CVEvent(BaseModel):
     cameraId: str
@@ -0,0 +1,248 @@
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .capture import FrameSampler, sampling_stats
+
+# Control words shared by producer and consumer, then the capture process's sampling counters
+_WRITE_SEQ, _READ_SEQ, _EOF, _POSITION, _SEEKED, _READ_S = range(6)
+
+
+class SharedFrameRing:
+    """Fixed-size ring of frame slots in shared memory
+
+    One block holds `slots` frames of `shape` (uint8), a second block the
+    per-slot header (sequence number, captured_at, source frame index,
+    pts_ms) and the control words.
+    The producer writes into the oldest slot other than the one holding the
+    frame the consumer has claimed (`_READ_SEQ`), marks it -1 while writing
+    and sets its sequence number once the pixels are in place. A consumer
+    claims a frame before checking its slot, so a frame that checks out
+    stays intact until the consumer claims the next one.
+
+    Create it in the owning process with `create=True` and attach to it from
+    the other process with the `names` of the first.
+    """
+
+    def __init__(self, shape, slots=4, names=None, create=False):
+        self.shape = tuple(shape)
+        self.slots = max(2, int(slots))
+        frame_bytes = int(np.prod(self.shape))
+        header_words = 4 * self.slots + 6
+        if create:
+            self._frames = shared_memory.SharedMemory(create=True, size=frame_bytes * self.slots)
+            self._header = shared_memory.SharedMemory(create=True, size=header_words * 8)
+        else:
+            self._frames = shared_memory.SharedMemory(name=names[0])
+            self._header = shared_memory.SharedMemory(name=names[1])
+        self.owner = create
+        self.frames = np.ndarray((self.slots,) + self.shape, dtype=np.uint8, buffer=self._frames.buf)
+        words = np.ndarray((header_words,), dtype=np.float64, buffer=self._header.buf)
+        self.slot_seq = words[:self.slots]
+        self.slot_time = words[self.slots:2 * self.slots]
+        self.slot_index = words[2 * self.slots:3 * self.slots]
+        self.slot_pts = words[3 * self.slots:4 * self.slots]
+        self.control = words[4 * self.slots:]
+        if create:
+            words[:] = 0
+
+    @property
+    def names(self):
+        return (self._frames.name, self._header.name)
+
+    def write(self, frame, captured_at, frame_index, pts_ms):
+        """Copy a frame into the oldest unclaimed slot; returns its sequence number (1-based)"""
+        seq = int(self.control[_WRITE_SEQ]) + 1
+        age = self.slot_seq.copy()
+        claimed = self.control[_READ_SEQ]
+        if claimed:
+            age[age == claimed] = np.inf
+        slot = int(age.argmin())
+        self.slot_seq[slot] = -1
+        self.frames[slot][...] = frame
+        self.slot_time[slot] = captured_at
+        self.slot_index[slot] = frame_index
+        self.slot_pts[slot] = pts_ms
+        self.slot_seq[slot] = seq
+        self.control[_WRITE_SEQ] = seq
+        return seq
+
+    def slot_of(self, seq):
+        """Slot holding frame `seq`, or None if it was overwritten (or not written yet)"""
+        hits = np.flatnonzero(self.slot_seq == seq)
+        return int(hits[0]) if hits.size else None
+
+    def view(self, seq):
+        """(frame view, frame_index, captured_at, pts_ms) of `seq`, or None if that slot was reused
+
+        Only safe to use after claiming `seq` (see SharedFrameGrabber.read).
+        """
+        slot = self.slot_of(seq)
+        if slot is None:
+            return None
+        return (self.frames[slot], int(self.slot_index[slot]), float(self.slot_time[slot]),
+                float(self.slot_pts[slot]))
+
+    def close(self):
+        self.frames = self.slot_seq = self.slot_time = self.slot_index = self.slot_pts = self.control = None
+        for block in (self._frames, self._header):
+            try:
+                block.close()
+            except BufferError:
+                pass  # a frame view is still alive; the mapping goes away with it
+        if self.owner:
+            for block in (self._frames, self._header):
+                try:
+                    block.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def _capture_main(source, api, camera_id, shape, slots, names, live, stop_event, sampling, stride, fps):
+    """Capture process: decode `source` into the shared ring until stopped or EOF"""
+    import cv2
+
+    ring = SharedFrameRing(shape, slots, names=names)
+    cap = cv2.VideoCapture(source, api) if api is not None else cv2.VideoCapture(source)
+    sampler = FrameSampler(cap, sampling, stride=stride, fps=fps)
+    height, width = shape[:2]
+    try:
+        while not stop_event.is_set() and cap.isOpened():
+            item = sampler.read()
+            ring.control[_POSITION] = sampler.position
+            ring.control[_SEEKED] = sampler.frames_seeked
+            ring.control[_READ_S] = sampler.read_s
+            if item is None:
+                print(f"[{camera_id}] End of video or failed to read frame")
+                break
+            frame, frame_index, pts_ms = item
+            captured_at = time.monotonic()
+            if frame.shape != ring.shape:
+                frame = cv2.resize(frame, (width, height))
+            if not live:
+                # Files: never overwrite a slot the consumer has not taken yet
+                # (nor the one it is working on)
+                while (not stop_event.is_set()
+                       and ring.control[_WRITE_SEQ] - ring.control[_READ_SEQ] >= ring.slots - 1):
+                    time.sleep(0.002)
+            ring.write(frame, captured_at, frame_index, pts_ms)
+    except Exception as e:
+        print(f"[{camera_id}] Error grabbing frames: {e}")
+    finally:
+        cap.release()
+        ring.control[_EOF] = 1
+        ring.close()
+
+
+class SharedFrameGrabber:
+    """FrameGrabber with decoding in a separate process and frames in shared memory
+
+    Same interface as FrameGrabber, but `read()` returns a NumPy view of a
+    shared-memory slot instead of a copy (`zero_copy` is True). The capture
+    process leaves that slot alone until the next `read()`, so consumers
+    that keep a frame beyond the current iteration must copy it. `stop()`
+    ends the capture process and unlinks the shared memory.
+
+    Sampling works as with a FrameSampler, except that the stride is fixed
+    when the capture process starts.
+    """
+
+    zero_copy = True
+
+    def __init__(self, source, camera_id, shape, capacity=2, live=True, api=None,
+                 sampling="decode", stride=1, fps=25.0):
+        self.source = source
+        self.api = api
+        self.sampling = sampling
+        self.stride = stride
+        self.fps = fps
+        self.camera_id = camera_id
+        self.live = live
+        # Room for the buffered frames plus the one being processed and the one being written
+        self.ring = SharedFrameRing(shape, slots=max(1, int(capacity)) + 2, create=True)
+        self._ctx = mp.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._process = None
+        self._last_seq = 0
+        self._consumer = None
+        self.running = False
+
+        # Statistics
+        self.frames_dropped = 0
+        self.frames_overwritten = 0
+
+    @property
+    def finished(self):
+        ring = self.ring
+        return ring.control is None or (
+            ring.control[_EOF] == 1 and self._last_seq >= ring.control[_WRITE_SEQ])
+
+    @property
+    def frames_read(self):
+        return int(self.ring.control[_WRITE_SEQ]) if self.ring.control is not None else 0
+
+    def start(self):
+        self.running = True
+        self._process = self._ctx.Process(
+            target=_capture_main,
+            args=(self.source, self.api, self.camera_id, self.ring.shape, self.ring.slots,
+                  self.ring.names, self.live, self._stop, self.sampling, self.stride, self.fps),
+            name=f"capture-{self.camera_id}", daemon=True)
+        self._process.start()
+
+    def stop(self, timeout=2.0):
+        self.running = False
+        self._stop.set()
+        if self._process:
+            self._process.join(timeout=timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        # Unmap from the consuming thread (or once it is gone), never under its feet
+        consumer = self._consumer
+        if consumer is None or consumer is threading.current_thread() or not consumer.is_alive():
+            if self.ring.control is not None:
+                self.ring.close()
+
+    def read(self, timeout=1.0):
+        """Next frame to analyse as (frame view, frame_index, captured_at, pts_ms), or None"""
+        self._consumer = threading.current_thread()
+        deadline = time.monotonic() + timeout
+        while self.running and self.ring.control is not None:
+            written = int(self.ring.control[_WRITE_SEQ])
+            if written > self._last_seq:
+                seq = written if self.live else self._last_seq + 1
+                # Claim the frame first so the producer keeps off its slot, then check it
+                self.ring.control[_READ_SEQ] = seq
+                item = self.ring.view(seq)
+                if item is None:
+                    # Overwritten before we claimed it (live only); take the newest
+                    self.frames_overwritten += 1
+                    self.frames_dropped += 1
+                    self._last_seq = seq
+                    continue
+                self.frames_dropped += seq - self._last_seq - 1
+                self._last_seq = seq
+                return item
+            if self.finished or time.monotonic() >= deadline:
+                return None
+            time.sleep(0.002)
+        return None
+
+    def stats(self):
+        control = self.ring.control
+        if control is None:
+            position = seeked = read_s = buffered = 0
+        else:
+            position, seeked, read_s = int(control[_POSITION]), int(control[_SEEKED]), float(control[_READ_S])
+            buffered = int(control[_WRITE_SEQ]) - self._last_seq
+        return {
+            "frames_read": self.frames_read,
+            "frames_dropped": self.frames_dropped,
+            "frames_overwritten": self.frames_overwritten,
+            "buffered": buffered,
+            **sampling_stats(self.sampling, self.fps, position, self.frames_read, seeked, read_s),
+        }
@@ -0,0 +1,100 @@
+import hashlib
+import hmac
+import json
+import math
+from decimal import Decimal
+
+import numpy as np
+
+
+def _js_number(x):
+    """Format a finite float exactly like JavaScript's Number.prototype.toString
+
+    repr() already gives the shortest round-tripping digits, as JS does; only
+    the layout differs (JS prints 1e-7 and 0.00001 where Python prints 1e-07
+    and 1e-05, and integral values without ".0").
+    """
+    if not math.isfinite(x):
+        raise ValueError(f"Out of range float values are not JSON compliant: {x!r}")
+    if x == 0:
+        return "0"
+    sign, digits, exp = Decimal(repr(x)).as_tuple()
+    n = len(digits) + exp  # position of the decimal point relative to the first digit
+    digits = "".join(map(str, digits)).rstrip("0")
+    k = len(digits)
+    sign = "-" if sign else ""
+    if k <= n <= 21:
+        return sign + digits + "0" * (n - k)
+    if 0 < n <= 21:
+        return sign + digits[:n] + "." + digits[n:]
+    if -6 < n <= 0:
+        return sign + "0." + "0" * -n + digits
+    e = n - 1
+    return sign + digits[0] + ("." + digits[1:] if k > 1 else "") + "e" + ("+" if e >= 0 else "-") + str(abs(e))
+
+
+def _encode(obj, parts):
+    """Append the canonical JSON of obj to parts (see canonical_bytes)"""
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, dict):
+        items = sorted(((str(k), v) for k, v in obj.items()), key=lambda kv: kv[0])
+        parts.append("{")
+        for i, (k, v) in enumerate(items):
+            if i:
+                parts.append(",")
+            parts.append(json.dumps(k, ensure_ascii=False))
+            parts.append(":")
+            _encode(v, parts)
+        parts.append("}")
+    elif isinstance(obj, (list, tuple)):
+        parts.append("[")
+        for i, v in enumerate(obj):
+            if i:
+                parts.append(",")
+            _encode(v, parts)
+        parts.append("]")
+    elif isinstance(obj, float):
+        parts.append(_js_number(obj))
+    elif obj is None or isinstance(obj, (str, bool, int)):
+        parts.append(json.dumps(obj, ensure_ascii=False))
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def canonical_bytes(obj):
+    """Compact, key-sorted UTF-8 JSON; byte-for-byte what canonicalStringify in utils/cvSignature.js
+    produces for the parsed object (numbers formatted like JSON.stringify)"""
+    parts = []
+    _encode(obj, parts)
+    return "".join(parts).encode('utf-8')
+
+
+def sign_bytes(secret, message):
+    """Hex HMAC-SHA256 of exactly these bytes"""
+    if not secret:
+        return ""
+    return hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def _with_sig(body, sig):
+    # "sig" is appended after the signed keys; the receiver strips it before verifying
+    if body == b'{}':
+        return b'{"sig":"' + sig.encode('ascii') + b'"}'
+    return body[:-1] + b',"sig":"' + sig.encode('ascii') + b'"}'
+
+
+def signed_event(event, secret):
+    """Wire bytes for one event: canonical JSON of the event plus its signature"""
+    body = canonical_bytes(event)
+    return _with_sig(body, sign_bytes(secret, body))
+
+
+def signed_batch(events, secret):
+    """Wire bytes for {"events": [...]} signed once over the whole batch
+
+    Each event is serialized once and the batch body is assembled from those
+    bytes, which is identical to the canonical JSON of the batch object.
+    """
+    body = b'{"events":[' + b','.join(canonical_bytes(e) for e in events) + b']}'
+    return _with_sig(body, sign_bytes(secret, body))
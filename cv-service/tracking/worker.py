@@ -1,44 +1,114 @@
 #!/usr/bin/env python3
 
+import os
 import cv2
 import numpy as np
 import time
-import requests
-import hmac
-import hashlib
 import threading
-from ultralytics import YOLO
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
+
+from .capture import FrameGrabber, FrameSampler
+from .clock import VideoClock
+from .counting import LineCounter, ZoneCounter, foot_point
+from .emitter import emitter as default_emitter
+from .governor import FrameRateGovernor
+from .inference import to_detections
+from .models import registry as default_registry
+from .motion import MotionGate
+from .shm import SharedFrameGrabber
+from .writer import AnnotatedWriter
 
 class SimpleHumanTracker:
     """Simple, working human detection and counting - no complex tracking"""
     
-    def __init__(self, camera_id, rtsp_url=None, hls_url=None, file_path=None, webhook=None, secret=None, line=None, zone=None):
+    def __init__(self, camera_id, rtsp_url=None, hls_url=None, file_path=None, webhook=None, secret=None, line=None, zone=None, scheduler=None, model_name='yolov8n.pt', model_backend='eager', registry=None, capture_buffer=2,
+                 conf=0.35, imgsz=640, frame_skip=1, cpu_budget=None, latency_target_ms=None,
+                 record=None, record_every=1, record_start_s=0.0, record_duration_s=None,
+                 emitter=None, tracking=False, stats_heartbeat_s=30.0,
+                 motion_gate=False, motion_threshold=0.002, motion_zones=None, redetect_s=5.0,
+                 capture_process=False, sampling=None, sample_fps=None, segment=None,
+                 video_start_ts=None, batched=None):
         self.camera_id = camera_id
         self.rtsp_url = rtsp_url
         self.file_path = file_path
         self.hls_url = hls_url
         self.webhook = webhook
         self.secret = secret
+        self.emitter = emitter or default_emitter
         
-        # Video capture
+        # Video capture - decoded on its own thread (FrameGrabber), or in its own
+        # process with frames handed over in shared memory (SharedFrameGrabber)
         self.cap = None
+        self.grabber = None
+        self.capture_buffer = capture_buffer
+        self.capture_process = capture_process
+        self.sampling = sampling or "decode"
+        self.sample_fps = sample_fps
         self.running = False
         self.frame_count = 0
+        self.lag_ms = 0.0
+        
+        # Part of a chunked MP4 job (see tracking.chunks): (first_frame, last_frame, count_from);
+        # frames before count_from only warm up the tracker
+        self.segment = segment
+        self.count_from = segment[2] if segment else 0
+        
+        # Simple YOLO detection - shared model from the registry, optionally batched.
+        # By default only live sources are batched: a file waits up to max_wait per
+        # frame for a batch and is paced to the live cameras. batched=True puts a file
+        # in the shared batches too (worth it when several MP4 jobs share one GPU)
+        self.batched = (not file_path) if batched is None else batched
+        self.scheduler = scheduler if self.batched else None
+        self.registry = registry or default_registry
+        self.model_name = model_name or 'yolov8n.pt'
+        self.conf = conf
+        self.imgsz = imgsz
+        self.model = self.registry.acquire(self.model_name, imgsz=imgsz, backend=model_backend)
+        
+        # Analysis rate - frame_skip, optionally adapted to a CPU or latency budget
+        self.frame_skip = frame_skip
+        self.cpu_budget = cpu_budget
+        self.latency_target_ms = latency_target_ms
+        self.governor = FrameRateGovernor(frame_skip)
         
-        # Simple YOLO detection
-        self.model = YOLO('yolov8n.pt')
+        # Optional motion pre-filter - static frames keep the last detections
+        self.motion_gate = motion_gate
+        self.motion_threshold = motion_threshold
+        self.motion_zones = motion_zones
+        self.redetect_s = redetect_s
+        self.motion = None
         
         # Simple counting - just track current people visible
         self.current_people_count = 0
         self.total_frames_processed = 0
         
-        # Statistics
-        self.last_stats_time = time.time()
+        # Optional identity tracking (DeepSort) for enter/exit counting and zone occupancy
+        self.tracking = tracking
+        self.deepsort = None
+        self.line_counter = LineCounter(line) if line else None
+        self.zone_counter = ZoneCounter(zone) if zone else None
+        self.track_ids_seen = set()
+        self.occupancy = 0
+        
+        # Statistics - with tracking, only changes are sent plus a periodic heartbeat.
+        # Windows and event timestamps run on video time for files (see VideoClock)
+        self.video_start_ts = video_start_ts
+        self.clock = VideoClock(live=not file_path, origin_ms=video_start_ts)
+        self.last_stats_time = self.clock.now()
         self.stats_interval = 1.0
+        self.stats_heartbeat_s = stats_heartbeat_s
+        self.last_sent_counts = None
+        self.last_sent_time = 0.0
         
-        # Video output
+        # Video output - off for live cameras and full for files unless asked otherwise
+        self.record = record or ("full" if file_path else "off")
+        self.record_every = record_every
+        self.record_start_s = record_start_s
+        self.record_duration_s = record_duration_s
         self.output_writer = None
         self.output_path = None
+        self.last_boxes = np.zeros((0, 4), dtype=np.float32)
+        self.last_confs = np.zeros((0,), dtype=np.float32)
         
         print(f"[{self.camera_id}] SimpleHumanTracker initialized - basic but working")
     
@@ -46,18 +116,20 @@ class SimpleHumanTracker:
         """Start processing video"""
         try:
             # Initialize video capture
+            api = None
             if self.file_path:
-                self.cap = cv2.VideoCapture(self.file_path)
+                source = self.file_path
                 print(f"[{self.camera_id}] Processing MP4 file: {self.file_path}")
             elif self.hls_url:
                 # Prefer HLS if provided (more robust than RTSP)
-                self.cap = cv2.VideoCapture(self.hls_url)
+                source = self.hls_url
                 print(f"[{self.camera_id}] Processing HLS stream: {self.hls_url}")
             elif self.rtsp_url:
-                self.cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG)
+                source, api = self.rtsp_url, cv2.CAP_FFMPEG
                 print(f"[{self.camera_id}] Processing RTSP stream: {self.rtsp_url}")
             else:
                 raise ValueError("No video source specified")
+            self.cap = cv2.VideoCapture(source, api) if api is not None else cv2.VideoCapture(source)
             
             if not self.cap.isOpened():
                 raise RuntimeError("Failed to open video source")
@@ -70,10 +142,72 @@ class SimpleHumanTracker:
             
             print(f"[{self.camera_id}] Video: {width}x{height}, {fps:.2f} FPS, {total_frames} frames")
             
+            self.clock = VideoClock(fps, live=not self.file_path, origin_ms=self.video_start_ts)
+            self.last_stats_time = self.clock.now()
+            
+            if self.tracking:
+                self.init_tracker()
+            
+            self.governor = FrameRateGovernor(
+                frame_skip=self.frame_skip,
+                source_fps=fps,
+                cpu_budget=self.cpu_budget,
+                latency_target_ms=self.latency_target_ms,
+                sample_fps=self.sample_fps
+            )
+            
+            # Skipped frames are decoded anyway ("decode"), only grabbed ("grab"),
+            # or jumped over ("seek", files only)
+            if self.sampling == "seek" and not self.file_path:
+                print(f"[{self.camera_id}] Seek sampling needs a file; grabbing instead")
+                self.sampling = "grab"
+            
+            if self.motion_gate:
+                self.motion = MotionGate(
+                    threshold=self.motion_threshold,
+                    zones=self.motion_zones,
+                    redetect_s=self.redetect_s,
+                    source_fps=self.governor.source_fps
+                )
+            
             # Initialize video writer
             self.init_video_writer(width, height, fps)
             
             self.running = True
+            if self.scheduler:
+                self.scheduler.register(self.camera_id)
+            
+            # Live sources drop stale frames; files are read in order with backpressure
+            if self.capture_process:
+                # The capture process opens the source itself; this one only probed it
+                self.cap.release()
+                self.cap = None
+                self.grabber = SharedFrameGrabber(
+                    source, self.camera_id, (height, width, 3),
+                    capacity=self.capture_buffer,
+                    live=not self.file_path,
+                    api=api,
+                    sampling=self.sampling,
+                    stride=self.governor.skip,
+                    fps=self.governor.source_fps
+                )
+            else:
+                start_position = 0
+                if self.segment:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.segment[0] - 1)
+                    start_position = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+                self.grabber = FrameGrabber(
+                    self.cap, self.camera_id,
+                    capacity=self.capture_buffer,
+                    live=not self.file_path,
+                    sampler=FrameSampler(
+                        self.cap, self.sampling,
+                        stride=lambda: self.governor.skip,
+                        fps=self.governor.source_fps,
+                        start=start_position
+                    )
+                )
+            self.grabber.start()
             
             # Start processing in a separate thread
             self.processing_thread = threading.Thread(target=self.process_video)
@@ -86,21 +220,42 @@ class SimpleHumanTracker:
             print(f"[{self.camera_id}] Error starting: {e}")
             import traceback
             traceback.print_exc()
+            # Undo what was set up: a capture process and its shared memory must not outlive us
+            self.running = False
+            if self.scheduler:
+                self.scheduler.unregister(self.camera_id)
+            if self.grabber:
+                self.grabber.stop()
+                self.grabber = None
+            elif self.cap:
+                self.cap.release()
+            if self.output_writer:
+                self.output_writer.close(timeout=0)
+                self.output_writer = None
+            self.release_model()
     
     def init_video_writer(self, width, height, fps):
         """Initialize video writer for output with bounding boxes"""
+        if self.record == "off":
+            return
         try:
             # Create output filename
             base_name = self.file_path.split('/')[-1].replace('.mp4', '') if self.file_path else self.camera_id
             self.output_path = f"simple_{base_name}_with_boxes.mp4"
             
-            # Initialize video writer
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            self.output_writer = cv2.VideoWriter(
-                self.output_path, fourcc, fps, (width, height)
+            # Drawing and encoding run on the writer's own thread
+            self.output_writer = AnnotatedWriter(
+                self.camera_id, self.output_path, fps, (width, height),
+                mode=self.record,
+                every=self.record_every,
+                start_s=self.record_start_s,
+                duration_s=self.record_duration_s,
+                # Sampled sources only hand over the analysed frames
+                offered_fps=self.governor.analysis_fps() if self.sampling != "decode" else None
             )
+            self.output_writer.start()
             
-            print(f"[{self.camera_id}] Video writer initialized: {self.output_path}")
+            print(f"[{self.camera_id}] Video writer initialized: {self.output_path} ({self.record})")
             
         except Exception as e:
             print(f"[{self.camera_id}] Error initializing video writer: {e}")
@@ -111,164 +266,291 @@ class SimpleHumanTracker:
         try:
             print(f"[{self.camera_id}] Starting simple video processing...")
             
-            while self.running and self.cap.isOpened():
-                ret, frame = self.cap.read()
-                if not ret:
-                    print(f"[{self.camera_id}] End of video or failed to read frame")
+            while self.running:
+                item = self.grabber.read(timeout=1.0)
+                if item is None:
+                    if self.grabber.finished:
+                        break
+                    continue
+                
+                frame, self.frame_count, captured_at, pts_ms = item
+                if self.segment and self.frame_count > self.segment[1]:
                     break
+                self.clock.advance(self.frame_count, pts_ms)
                 
-                self.frame_count += 1
+                # Process frame with simple detection when the governor says it is due
+                # and something moved; otherwise the last detections and counts carry forward
+                if self.governor.should_process(self.frame_count) and \
+                        (self.motion is None or self.motion.should_detect(frame, self.frame_count)):
+                    started = time.monotonic()
+                    detected = self.process_frame_simple(frame)
+                    finished = time.monotonic()
+                    
+                    # Only frames the detector ran on become the motion reference and
+                    # feed the governor (skipped or dropped frames would add ~0 ms samples);
+                    # lag is capture to processed result (smoothed)
+                    if detected:
+                        if self.motion is not None:
+                            self.motion.commit(frame, self.frame_count)
+                        lag_ms = (finished - captured_at) * 1000.0
+                        self.governor.record((finished - started) * 1000.0, lag_ms)
+                        self.lag_ms = self.governor.lag_ms
                 
-                # Process frame with simple detection
-                self.process_frame_simple(frame)
+                # Hand the frame and latest detections to the writer stage
+                if self.output_writer:
+                    self.record_frame(frame)
                 
-                # Send stats periodically
-                current_time = time.time()
+                # Send stats periodically (video time for files)
+                current_time = self.clock.now()
                 if current_time - self.last_stats_time >= self.stats_interval:
                     self.send_stats()
                     self.last_stats_time = current_time
+            
+            # Files: report the last, partial window too
+            if self.file_path and self.running and self.frame_count:
+                self.send_stats()
                     
         except Exception as e:
             print(f"[{self.camera_id}] Error processing video: {e}")
             import traceback
             traceback.print_exc()
         finally:
-            if self.cap:
+            if self.scheduler:
+                self.scheduler.unregister(self.camera_id)
+            if self.grabber:
+                self.grabber.stop()
+            elif self.cap:
                 self.cap.release()
             if self.output_writer:
-                self.output_writer.release()
+                self.output_writer.close()
+            self.release_model()
             print(f"[{self.camera_id}] Simple video processing completed")
     
     def process_frame_simple(self, frame):
-        """Simple frame processing - just detect people and draw boxes"""
+        """Simple frame processing - just detect people and draw boxes; True if detection ran"""
         try:
             # Skip first few frames to avoid startup noise
             if self.frame_count < 5:
-                return
+                return False
             
             # Run YOLO detection with high confidence
-            results = self.model.predict(
-                source=frame,
-                conf=0.7,  # High confidence to avoid false positives
-                verbose=False,
-                classes=[0],  # Only person class
-                imgsz=640
-            )
+            boxes, confs = self.detect(frame, conf=self.conf, imgsz=self.imgsz)
+            if boxes is None:
+                return False
             
             # Count people in this frame
-            people_in_frame = 0
-            
-            # Process detections and draw bounding boxes
-            for result in results:
-                if result.boxes is not None:
-                    for box in result.boxes:
-                        # Only process people (class 0)
-                        if int(box.cls) == 0:
-                            # Get bounding box coordinates
-                            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                            confidence = float(box.conf)
-                            
-                            # Convert to integers for drawing
-                            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                            
-                            # Draw bounding box
-                            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 3)
-                            
-                            # Draw confidence score
-                            cv2.putText(frame, f"Person {confidence:.2f}", 
-                                       (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                            
-                            # Count this person
-                            people_in_frame += 1
+            people_in_frame = len(boxes)
             
-            # Update current count
+            # Update current count; boxes are kept for the writer stage
             self.current_people_count = people_in_frame
             self.total_frames_processed += 1
+            self.last_boxes, self.last_confs = boxes, confs
             
-            # Draw statistics on frame
-            cv2.putText(frame, f"People: {self.current_people_count}", 
-                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 3)
-            cv2.putText(frame, f"Frame: {self.frame_count}", 
-                       (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 3)
+            if self.deepsort is not None:
+                self.update_tracks(frame, boxes, confs)
             
-            # Save frame with bounding boxes
-            if self.output_writer:
-                self.output_writer.write(frame)
-                
             # Log every 30 frames
             if self.frame_count % 30 == 0:
                 print(f"[{self.camera_id}] Frame {self.frame_count}: {people_in_frame} people detected")
+            return True
                 
         except Exception as e:
             print(f"[{self.camera_id}] Error processing frame: {e}")
             import traceback
             traceback.print_exc()
+            return False
+    
+    def init_tracker(self):
+        """Load the bundled DeepSort tracker (needs the ReID checkpoint)"""
+        from deep_sort import DeepSort
+        
+        default_ckpt = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'deep_sort', 'deep', 'checkpoint', 'ckpt.t7')
+        ckpt = os.getenv('DEEPSORT_REID_CKPT', default_ckpt)
+        threads = os.getenv('DEEPSORT_THREADS')
+        backend = os.getenv('DEEPSORT_REID_BACKEND', 'eager')
+        self.deepsort = DeepSort(
+            ckpt, min_confidence=0.0,  # detector already applied conf
+            backend=backend,
+            num_threads=int(threads) if threads else None,
+            channels_last=os.getenv('DEEPSORT_CHANNELS_LAST', '0') == '1',
+            calibration=os.getenv('DEEPSORT_REID_CALIBRATION') or None,
+            reuse_refresh=int(os.getenv('DEEPSORT_REID_REFRESH', '30')),  # 0 = embed every crop
+        )
+        print(f"[{self.camera_id}] DeepSort tracking enabled ({ckpt}, {backend})")
+    
+    def update_tracks(self, frame, boxes, confs):
+        """Feed detections to DeepSort, then update line crossings and zone occupancy"""
+        bbox_xywh = np.column_stack((
+            (boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
+            boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]
+        )) if len(boxes) else np.zeros((0, 4), dtype=np.float32)
+        outputs = self.deepsort.update(bbox_xywh, confs, frame)
+        counting = self.frame_count >= self.count_from
+        
+        points = []
+        for x1, y1, x2, y2, track_id in outputs:
+            track_id = int(track_id)
+            if counting:
+                self.track_ids_seen.add(track_id)
+            point = foot_point(x1, y1, x2, y2)
+            points.append(point)
+            
+            if self.line_counter:
+                event = self.line_counter.update(track_id, point, count=counting)
+                if event:
+                    print(f"[{self.camera_id}] Track {track_id} {event}")
+                    self.emit(event, {
+                        "trackId": track_id,
+                        "count_in": self.line_counter.count_in,
+                        "count_out": self.line_counter.count_out,
+                        "frame_count": self.frame_count
+                    })
+        
+        if self.line_counter:
+            # Keep positions of occluded tracks so a crossing behind an occlusion still counts
+            self.line_counter.forget({t.track_id for t in self.deepsort.tracker.tracks})
+        self.occupancy = self.zone_counter.count(points) if self.zone_counter else len(points)
+        return outputs
+    
+    def record_frame(self, frame):
+        """Queue a frame for annotation and encoding if the record mode wants it"""
+        writer = self.output_writer
+        if writer.wants(self.frame_count):
+            if getattr(self.grabber, 'zero_copy', False):
+                frame = frame.copy()  # the writer draws on it later; the shared slot gets reused
+            writer.submit(frame, self.frame_count, self.last_boxes, self.last_confs, self.current_people_count)
+        elif writer.finished(self.frame_count):
+            # Time window is over - finalise the clip without waiting on the encoder
+            writer.close(timeout=0)
+            self.output_writer = None
+    
+    def detect(self, frame, conf, imgsz):
+        """Run person detection, batched through the shared scheduler if we have one"""
+        if self.scheduler:
+            try:
+                return self.scheduler.infer(self.camera_id, frame, self.model, conf=conf, imgsz=imgsz, timeout=5.0)
+            except (CancelledError, FutureTimeout):
+                # Superseded, stopped or scheduler overloaded - drop this frame
+                return None, None
+            except RuntimeError:
+                if self.scheduler.running:
+                    raise  # the batch itself failed
+                # Scheduler shut down (service stopping) - end processing instead of failing every frame
+                print(f"[{self.camera_id}] Inference scheduler stopped, ending processing")
+                self.running = False
+                return None, None
+        
+        results = self.model.predict(
+            source=frame,
+            conf=conf,
+            verbose=False,
+            classes=[0],  # Only person class
+            imgsz=imgsz
+        )
+        return to_detections(results[0] if results else None)
     
     def send_stats(self):
         """Send simple statistics"""
+        if self.deepsort is not None:
+            return self.send_tracking_stats()
+        
         stats = {
             "count_in": self.current_people_count,  # Current people visible
             "count_out": 0,  # Not tracking exits
             "occupancy": self.current_people_count,  # Current occupancy
             "total_detected": self.current_people_count,  # Current detection
             "frame_count": self.frame_count,
-            "total_frames_processed": self.total_frames_processed
+            "total_frames_processed": self.total_frames_processed,
+            "dropped_frames": self.grabber.frames_dropped if self.grabber else 0,
+            "lag_ms": round(self.lag_ms, 1),
+            **self.governor.stats(),
+            **(self.motion.stats() if self.motion else {}),
+            **self.clock.stats()
         }
         
         print(f"[{self.camera_id}] Simple Stats: {stats}")
         self.emit("people-stats", stats)
     
+    def send_tracking_stats(self):
+        """Send tracked counts when they change, or as a periodic heartbeat"""
+        count_in = self.line_counter.count_in if self.line_counter else 0
+        count_out = self.line_counter.count_out if self.line_counter else 0
+        counts = (count_in, count_out, self.occupancy)
+        now = self.clock.now()
+        if counts == self.last_sent_counts and now - self.last_sent_time < self.stats_heartbeat_s:
+            return
+        self.last_sent_counts = counts
+        self.last_sent_time = now
+        
+        stats = {
+            "count_in": count_in,  # Line crossings in
+            "count_out": count_out,  # Line crossings out
+            "occupancy": self.occupancy,  # Tracked people in zone (or in view)
+            "total_detected": len(self.track_ids_seen),  # Unique identities so far
+            "frame_count": self.frame_count,
+            "total_frames_processed": self.total_frames_processed,
+            "dropped_frames": self.grabber.frames_dropped if self.grabber else 0,
+            "lag_ms": round(self.lag_ms, 1),
+            **self.governor.stats(),
+            **(self.motion.stats() if self.motion else {}),
+            **self.clock.stats()
+        }
+        
+        print(f"[{self.camera_id}] Tracking Stats: {stats}")
+        self.emit("people-stats", stats)
+    
     def emit(self, evt_type, data):
-        """Emit event to webhook"""
+        """Queue event for the shared webhook emitter (never blocks on the network)"""
         if not self.webhook:
             return
             
         payload = {
             "cameraId": self.camera_id,
-            "ts": int(time.time() * 1000),
+            "ts": self.clock.ts_ms(),
             "type": evt_type,
-            "data": data,
-            "secret": self.secret
+            "data": data
         }
         
-        # Sign payload
-        sig = self.sign(payload)
-        payload["sig"] = sig
-        
-        try:
-            response = requests.post(self.webhook, json=payload, timeout=1.5)
-            if response.status_code != 200:
-                print(f"[{self.camera_id}] Webhook error: {response.status_code}")
-        except Exception as e:
-            print(f"[{self.camera_id}] Error sending webhook: {e}")
+        # Serialized and signed once on the emitter thread (see tracking.signing)
+        self.emitter.emit(self.webhook, payload, self.secret)
     
-    def sign(self, payload):
-        """Sign payload with secret"""
-        if not self.secret:
-            return ""
-        
-        # Remove sig field for signing
-        payload_copy = payload.copy()
-        if 'sig' in payload_copy:
-            del payload_copy['sig']
-        
-        # Create signature
-        message = str(payload_copy)
-        signature = hmac.new(
-            self.secret.encode('utf-8'),
-            message.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        
-        return signature
+    def pipeline_stats(self):
+        """Per-camera capture and latency counters"""
+        stats = {
+            "frame_count": self.frame_count,
+            "total_frames_processed": self.total_frames_processed,
+            "lag_ms": round(self.lag_ms, 1),
+            **self.governor.stats(),
+            **self.clock.stats(),
+        }
+        if self.motion:
+            stats.update(self.motion.stats())
+        if self.grabber:
+            stats.update(self.grabber.stats())
+        if self.output_writer:
+            stats.update(self.output_writer.stats())
+        if self.deepsort and self.deepsort.embedding_cache:
+            stats.update(self.deepsort.embedding_cache.stats())
+        return stats
+    
+    def release_model(self):
+        """Hand our shared model back to the registry (safe to call more than once)"""
+        model, self.model = self.model, None
+        self.registry.release(model)
     
     def stop(self):
         """Stop processing"""
         self.running = False
-        if self.cap:
+        if self.scheduler:
+            self.scheduler.unregister(self.camera_id)
+        if not getattr(self, 'processing_thread', None):
+            self.release_model()
+        # The grabber owns the capture and releases it from its own thread
+        if self.grabber:
+            self.grabber.stop()
+        elif self.cap:
             self.cap.release()
-        if self.output_writer:
-            self.output_writer.release()
         print(f"[{self.camera_id}] Simple processing stopped")
         
         # Show final output path
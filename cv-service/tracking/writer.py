@@ -0,0 +1,128 @@
+import queue
+import threading
+
+import cv2
+
+
+class AnnotatedWriter:
+    """Draws detections and encodes the annotated video on its own thread
+
+    The processing thread only hands over (frame, detections) through a
+    bounded queue; if the disk or encoder falls behind, frames are dropped
+    from the recording rather than stalling detection.
+
+    Modes: "full" records every frame it is offered, "sampled" every
+    `every`-th of them, and "window" every frame between `start_s` and
+    `start_s + duration_s` of video time. When the source is sampled, only
+    every few source frames are offered; `offered_fps` is that rate, and the
+    video is encoded at the rate frames actually reach it.
+    """
+
+    def __init__(self, camera_id, path, fps, size, mode="full", every=1,
+                 start_s=0.0, duration_s=None, queue_size=32, offered_fps=None):
+        self.camera_id = camera_id
+        self.path = path
+        self.fps = fps if fps and fps > 0 else 25.0
+        self.offered_fps = offered_fps or self.fps
+        self.size = size
+        self.mode = mode
+        self.every = max(1, int(every or 1))
+        self.start_s = start_s or 0.0
+        self.duration_s = duration_s
+        self._offered = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closing = threading.Event()
+        self._writer = None
+        self._thread = None
+
+        # Statistics
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out_fps = self.offered_fps / self.every if self.mode == "sampled" else self.offered_fps
+        self._writer = cv2.VideoWriter(self.path, fourcc, out_fps, self.size)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def wants(self, frame_index):
+        """True if this source frame belongs in the recording (call once per frame offered)"""
+        if self.mode == "sampled":
+            self._offered += 1
+            return self._offered % self.every == 0
+        if self.mode == "window":
+            t = frame_index / self.fps
+            if t < self.start_s:
+                return False
+            return self.duration_s is None or t < self.start_s + self.duration_s
+        return self.mode == "full"
+
+    def finished(self, frame_index):
+        """True once a time window has fully passed and nothing more will be recorded"""
+        return (self.mode == "window" and self.duration_s is not None
+                and frame_index / self.fps >= self.start_s + self.duration_s)
+
+    def submit(self, frame, frame_index, boxes, confs, people):
+        if self._closing.is_set():
+            return False
+        try:
+            self._queue.put_nowait((frame, frame_index, boxes, confs, people))
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    def close(self, timeout=10.0):
+        """Flush queued frames and finalise the file
+
+        Never blocks on the queue: the writer thread drains what is queued
+        and then finishes on its own. Waits up to `timeout` for that (0
+        returns at once).
+        """
+        if not self._thread:
+            return
+        self._closing.set()
+        if timeout:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def stats(self):
+        return {
+            "record_mode": self.mode,
+            "frames_written": self.frames_written,
+            "record_dropped": self.frames_dropped,
+        }
+
+    def _loop(self):
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self._closing.is_set():
+                        break
+                    continue
+                frame, frame_index, boxes, confs, people = item
+                self._draw(frame, frame_index, boxes, confs, people)
+                self._writer.write(frame)
+                self.frames_written += 1
+        except Exception as e:
+            print(f"[{self.camera_id}] Error writing video: {e}")
+        finally:
+            self._writer.release()
+            print(f"[{self.camera_id}] Annotated video saved to: {self.path} ({self.frames_written} frames)")
+
+    @staticmethod
+    def _draw(frame, frame_index, boxes, confs, people):
+        for (x1, y1, x2, y2), confidence in zip(boxes, confs):
+            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 3)
+            cv2.putText(frame, f"Person {confidence:.2f}",
+                        (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+
+        cv2.putText(frame, f"People: {people}",
+                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 3)
+        cv2.putText(frame, f"Frame: {frame_index}",
+                    (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 3)
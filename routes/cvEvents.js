@@ -1,9 +1,10 @@
 // routes/cvEvents.js
 const express = require('express');
-const crypto = require('crypto');
 const router = express.Router();
 
 const CVEvent = require('../models/CVEvent');
+const { verifiedEvents } = require('../utils/cvSignature');
+const { ingestAll, batchStatus } = require('../utils/cvIngest');
 
 // Optional: if you want to update room occupancy live.
 // If you don't have these models/fields, you can delete this block safely.
@@ -13,70 +14,51 @@ try {
   Camera = require('../models/Camera');
 } catch (_) { /* optional models not present */ }
 
-const SHARED_SECRET = process.env.CV_SHARED_SECRET || 'dev-secret';
-
 /**
- * Canonical (deep) sort for stable JSON stringification.
- * Must match the Python side (json.dumps sort_keys=True, separators=(',', ':')).
+ * Persist one CV event whose signature has already been checked.
  */
-function deepSort(obj) {
-  if (Array.isArray(obj)) return obj.map(deepSort);
-  if (obj && typeof obj === 'object') {
-    const out = {};
-    for (const k of Object.keys(obj).sort()) out[k] = deepSort(obj[k]);
-    return out;
-  }
-  return obj;
-}
-
-function canonicalStringify(o) {
-  return JSON.stringify(deepSort(o)); // Node uses ',' ':' by default
-}
+async function ingestEvent(event) {
+  // persist raw CV event
+  const created = await CVEvent.create(event);
 
-function verifySig(unsignedPayload, sigHex) {
-  try {
-    const msg = canonicalStringify(unsignedPayload);
-    const h = crypto.createHmac('sha256', SHARED_SECRET).update(msg).digest('hex');
-    // timing-safe compare
-    return crypto.timingSafeEqual(Buffer.from(h), Buffer.from(sigHex || '', 'hex'));
-  } catch {
-    return false;
+  // OPTIONAL: update derived state (e.g., room occupancy) if your schema supports it
+  if (event.type === 'people-stats' && Room && Camera) {
+    const { cameraId, ts, data } = event;
+    // Example: Room has a 'camera' field referencing Camera _id, and an 'occupancy' number.
+    try {
+      await Room.updateOne(
+        { camera: cameraId },
+        { $set: { occupancy: Number(data?.occupancy ?? 0), occUpdatedAt: new Date(ts) } }
+      );
+    } catch (e) {
+      // keep webhook hot; don't fail on derived update
+      console.warn('Room occupancy update skipped:', e.message);
+    }
   }
+  return created;
 }
 
 /**
  * POST /api/cv-events
  * Body: { cameraId, ts, type, data, sig }
+ *   or a batch from the cv-service emitter, signed once: { events: [{ cameraId, ts, type, data }, ...], sig }
+ * A batch answers with one result per event; 207 if only some were stored.
  */
 router.post('/', async (req, res) => {
   try {
-    const { sig, ...unsigned } = req.body || {};
-    if (process.env.CV_DISABLE_SIG === '1') {
-        // skip in local dev
-      } else if (!verifySig(unsigned, sig)) {
-        return res.status(401).json({ error: 'bad signature' });
-      }
-      
-
-    // persist raw CV event
-    await CVEvent.create(unsigned);
+    const events = verifiedEvents(req.body);
+    if (!events) {
+      return res.status(401).json({ error: 'bad signature' });
+    }
 
-    // OPTIONAL: update derived state (e.g., room occupancy) if your schema supports it
-    if (unsigned.type === 'people-stats' && Room && Camera) {
-      const { cameraId, ts, data } = unsigned;
-      // Example: Room has a 'camera' field referencing Camera _id, and an 'occupancy' number.
-      try {
-        await Room.updateOne(
-          { camera: cameraId },
-          { $set: { occupancy: Number(data?.occupancy ?? 0), occUpdatedAt: new Date(ts) } }
-        );
-      } catch (e) {
-        // keep webhook hot; don't fail on derived update
-        console.warn('Room occupancy update skipped:', e.message);
-      }
+    if (!Array.isArray(req.body.events)) {
+      await ingestEvent(events[0]);
+      return res.json({ ok: true, accepted: 1 });
     }
 
-    return res.json({ ok: true });
+    const results = await ingestAll(events, ingestEvent);
+    const accepted = results.filter(r => r.ok).length;
+    return res.status(batchStatus(results)).json({ ok: accepted === results.length, accepted, results });
   } catch (e) {
     console.error('cv-events error:', e);
     return res.status(500).json({ error: 'server error' });
@@ -1,45 +1,78 @@
 const router = require('express').Router();
 const MP4Event = require('../models/MP4Event');
 const MP4File = require('../models/MP4File');
+const { verifiedEvents, plaintextSecretOk } = require('../utils/cvSignature');
+const { ingestAll, batchStatus } = require('../utils/cvIngest');
 
-// Webhook endpoint for CV service to send MP4 analytics events
-router.post('/', async (req, res) => {
-  try {
-    const { secret, cameraId, type, ts, data } = req.body;
-    
-    // Verify secret (basic security)
-    if (secret !== (process.env.CV_SHARED_SECRET || 'dev-secret')) {
-      return res.status(401).json({ error: 'Invalid secret' });
-    }
+// Persist one MP4 analytics event whose signature has already been checked.
+async function ingestEvent(event) {
+  const { cameraId, type, ts, data } = event || {};
 
-    // Extract filename from cameraId (format: mp4-filename)
-    const filename = cameraId.replace('mp4-', '');
-    
-    // Validate MP4 file exists
-    const mp4File = await MP4File.findOne({ filename });
-    if (!mp4File) {
-      return res.status(400).json({ error: 'MP4 file not found' });
-    }
+  // Extract filename from cameraId (format: mp4-filename)
+  const filename = cameraId.replace('mp4-', '');
+
+  // Validate MP4 file exists
+  const mp4File = await MP4File.findOne({ filename });
+  if (!mp4File) {
+    const err = new Error('MP4 file not found');
+    err.status = 400;
+    throw err;
+  }
 
-    // Create event
-    const event = await MP4Event.create({
-      mp4FileId: mp4File._id,
-      filename: filename,
-      type,
-      ts: ts || Date.now(),
-      data
-    });
+  // Create event
+  const created = await MP4Event.create({
+    mp4FileId: mp4File._id,
+    filename: filename,
+    type,
+    ts: ts || Date.now(),
+    data
+  });
 
-    // Update MP4 file analytics results if it's a completion event
-    if (type === 'people-stats' && data) {
+  // Update MP4 file analytics results if it's a completion event. The event
+  // is stored already, so a failure here must not fail (and resend) it
+  if (type === 'people-stats' && data) {
+    try {
       await MP4File.findByIdAndUpdate(mp4File._id, {
         'analyticsResults.peopleCount': data.occupancy || 0,
         'analyticsResults.framesProcessed': data.frames_processed || 0
       });
+    } catch (e) {
+      console.warn('MP4 analytics results update skipped:', e.message);
     }
+  }
+  return created;
+}
 
-    res.json({ ok: true, eventId: event._id });
+// Webhook endpoint for CV service to send MP4 analytics events.
+// Accepts a single signed event or a batch signed once: { events: [...], sig }.
+// A batch answers with one result per event; 207 if only some were stored.
+router.post('/', async (req, res) => {
+  try {
+    const body = req.body || {};
+    const batch = Array.isArray(body.events);
+
+    // Older cv-service builds sent the shared secret in plaintext instead of
+    // signing; only accepted with CV_ACCEPT_PLAINTEXT_SECRET=1
+    const events = body.secret !== undefined
+      ? (plaintextSecretOk(body.secret) ? [body] : null)
+      : verifiedEvents(body);
+    if (!events) {
+      return res.status(401).json({ error: 'Invalid signature' });
+    }
+
+    if (!batch) {
+      const created = await ingestEvent(events[0]);
+      return res.json({ ok: true, eventId: created._id });
+    }
+
+    // one unknown file shouldn't reject the rest of a batch
+    const results = await ingestAll(events, ingestEvent);
+    const eventIds = results.filter(r => r.ok).map(r => r.id);
+    res.status(batchStatus(results)).json({ ok: eventIds.length === results.length, eventIds, results });
   } catch (e) {
+    if (e.status) {
+      return res.status(e.status).json({ error: e.message });
+    }
     console.error('MP4 webhook error:', e);
     res.status(500).json({ error: 'Internal error' });
   }
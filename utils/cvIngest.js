@@ -0,0 +1,35 @@
+// utils/cvIngest.js
+
+/**
+ * Store the events of one cv-service webhook body one at a time.
+ * Returns one { ok, id } or { ok: false, status, error } per event, in order.
+ * An error with a `status` is a rejected event (e.g. unknown file); anything
+ * else is a server error the sender may retry.
+ */
+async function ingestAll(events, ingestEvent) {
+  const results = [];
+  for (const event of events) {
+    try {
+      const created = await ingestEvent(event);
+      results.push({ ok: true, id: created?._id ?? created?.id });
+    } catch (e) {
+      if (!e.status) console.error('CV event ingest error:', e);
+      results.push({ ok: false, status: e.status || 500, error: e.status ? e.message : 'server error' });
+    }
+  }
+  return results;
+}
+
+/**
+ * HTTP status for a batch: 200 if every event was stored, 207 if only some
+ * were (the emitter then resends only the events that failed with a 5xx,
+ * never the whole batch), otherwise the failure itself.
+ */
+function batchStatus(results) {
+  const stored = results.filter(r => r.ok).length;
+  if (stored === results.length) return 200;
+  if (stored > 0) return 207;
+  return results.some(r => r.status >= 500) ? 500 : results[0].status;
+}
+
+module.exports = { ingestAll, batchStatus };
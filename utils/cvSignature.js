@@ -0,0 +1,66 @@
+// utils/cvSignature.js
+const crypto = require('crypto');
+
+const SHARED_SECRET = process.env.CV_SHARED_SECRET || 'dev-secret';
+
+/**
+ * Canonical (deep) sort for stable JSON stringification.
+ * Must match the Python side (cv-service/tracking/signing.py canonical_bytes):
+ * compact, key-sorted, non-ASCII unescaped, and numbers formatted as
+ * Number#toString formats them (1e-7, 0.00001, 3 - not 1e-07, 1e-05, 3.0).
+ */
+function deepSort(obj) {
+  if (Array.isArray(obj)) return obj.map(deepSort);
+  if (obj && typeof obj === 'object') {
+    const out = {};
+    for (const k of Object.keys(obj).sort()) out[k] = deepSort(obj[k]);
+    return out;
+  }
+  return obj;
+}
+
+function canonicalStringify(o) {
+  return JSON.stringify(deepSort(o)); // Node uses ',' ':' by default
+}
+
+function verifySig(unsignedPayload, sigHex) {
+  try {
+    const msg = canonicalStringify(unsignedPayload);
+    const h = crypto.createHmac('sha256', SHARED_SECRET).update(msg).digest();
+    // timing-safe compare
+    const given = Buffer.from(sigHex || '', 'hex');
+    return given.length === h.length && crypto.timingSafeEqual(h, given);
+  } catch {
+    return false;
+  }
+}
+
+/**
+ * Verify a webhook body from cv-service and return its events.
+ * Accepts a single signed event { ..., sig } or a batch { events: [...], sig }
+ * signed once over the whole batch. Returns null if the signature is bad.
+ */
+function verifiedEvents(body) {
+  const { sig, ...unsigned } = body || {};
+  if (process.env.CV_DISABLE_SIG !== '1' && !verifySig(unsigned, sig)) {
+    return null;
+  }
+  return Array.isArray(unsigned.events) ? unsigned.events : [unsigned];
+}
+
+/**
+ * Plaintext shared secret sent by older cv-service builds instead of a
+ * signature. Off unless CV_ACCEPT_PLAINTEXT_SECRET=1, and never checked
+ * against the 'dev-secret' default.
+ */
+function plaintextSecretOk(secret) {
+  const expected = process.env.CV_SHARED_SECRET;
+  if (process.env.CV_ACCEPT_PLAINTEXT_SECRET !== '1' || !expected || typeof secret !== 'string') {
+    return false;
+  }
+  const a = crypto.createHash('sha256').update(secret).digest();
+  const b = crypto.createHash('sha256').update(expected).digest();
+  return crypto.timingSafeEqual(a, b);
+}
+
+module.exports = { canonicalStringify, verifySig, verifiedEvents, plaintextSecretOk };